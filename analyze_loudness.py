@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from src.frontend import audio_ops
+
+
+def measure(path: str):
+    """Runs in a worker process. Returns (path, lufs or None, peak_db, status)."""
+    try:
+        samples, rate = audio_ops.decode(path)
+    except Exception as e:
+        return path, None, None, f"decode failed: {e}"
+    peak_db, _ = audio_ops.peak_rms_db(samples)
+    lufs = audio_ops.integrated_loudness(samples, rate)
+    if lufs is None:
+        return path, None, peak_db, "silent"
+    return path, lufs, peak_db, "measured"
+
+
+def gain_for(entry: dict, target: float, max_boost: float, ceiling: float) -> float:
+    """Gain that brings the entry to `target` LUFS, capped so the peak stays under `ceiling` dBFS."""
+    gain = min(target - entry["lufs"], max_boost)
+    if "peak_db" in entry:
+        gain = min(gain, ceiling - entry["peak_db"])
+    return round(gain, 2)
+
+
+def write_registry(path: str, registry: dict):
+    """Keeps registry.json's hand-edited layout: one entry per line."""
+    lines = ["{"]
+    keys = list(registry.keys())
+    for i, key in enumerate(keys):
+        comma = "," if i < len(keys) - 1 else ""
+        items = registry[key]
+        if not isinstance(items, list) or not items:
+            lines.append(f"  {json.dumps(key)}: {json.dumps(items, ensure_ascii=False)}{comma}")
+            continue
+        lines.append(f"  {json.dumps(key)}: [")
+        for j, item in enumerate(items):
+            lines.append(f"    {json.dumps(item, ensure_ascii=False)}{',' if j < len(items) - 1 else ''}")
+        lines.append(f"  ]{comma}")
+    lines.append("}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the integrated loudness of every BGM track and sound effect and store a per-file playback gain.")
+    parser.add_argument("--registry", default="assets/registry.json")
+    parser.add_argument("--bgm-dir", default="assets/bgm")
+    parser.add_argument("--map", default="assets/sound_map.json")
+    parser.add_argument("--target", type=float, default=-18.0, help="BGM loudness target (LUFS)")
+    parser.add_argument("--sfx-target", type=float, default=-18.0, help="Sound effect loudness target (LUFS)")
+    parser.add_argument("--max-boost", type=float, default=12.0, help="Largest gain applied to quiet files (dB)")
+    parser.add_argument("--peak-ceiling", type=float, default=-1.0, help="Boosted peaks stay below this (dBFS)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Re-measure files whose loudness value is still current")
+    parser.add_argument("--gains-only", action="store_true",
+                        help="Only recompute gains from the stored loudness (no decoding; does not need soundfile)")
+    args = parser.parse_args()
+
+    with open(args.registry, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+    with open(args.map, "r", encoding="utf-8") as f:
+        sound_map = json.load(f)
+
+    # (entry, file path, target) for every asset; entries sharing a file are measured once
+    assets = [(entry, os.path.join(args.bgm_dir, entry["file"]), args.target) for entry in registry.get("music", [])]
+    assets += [(entry, entry["file"], args.sfx_target) for entry in sound_map.values() if "file" in entry]
+    # Size + mtime of the file each loudness was measured from (as build_sound_cache.py): replaced files are re-measured
+    stamps = {}
+    for _, path, _ in assets:
+        if path not in stamps and os.path.exists(path):
+            st = os.stat(path)
+            stamps[path] = [st.st_size, st.st_mtime_ns]
+    todo = sorted({path for entry, path, _ in assets
+                   if path in stamps and (args.force or "lufs" not in entry or entry.get("lufs_stamp") != stamps[path])})
+
+    if args.gains_only:
+        if todo:
+            print(f"{len(todo)} unmeasured or changed files keep their current values (--gains-only).")
+        todo = []
+    elif todo and audio_ops.soundfile is None:
+        print(f"soundfile is not installed (pip install -r requirements.txt): cannot decode {len(todo)} "
+              f"unmeasured or changed files. Pass --gains-only to recompute the existing gains only.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    measured = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for path, lufs, peak_db, status in pool.map(measure, todo, chunksize=4):
+            if lufs is None:
+                print(f"{path}: {status}")
+            else:
+                measured[path] = (round(lufs, 2), round(peak_db, 2))
+
+    # Gains are derived from the stored loudness, so changing a target never needs a re-decode
+    gained = 0
+    attempted = set(todo)
+    for entry, path, target in assets:
+        if path in measured:
+            entry["lufs"], entry["peak_db"] = measured[path]
+            entry["lufs_stamp"] = stamps[path]
+        elif path in attempted:
+            # Changed and now silent or undecodable: the old values describe another file
+            for key in ("lufs", "peak_db", "gain_db", "lufs_stamp"):
+                entry.pop(key, None)
+        if "lufs" in entry:
+            entry["gain_db"] = gain_for(entry, target, args.max_boost, args.peak_ceiling)
+            gained += 1
+
+    write_registry(args.registry, registry)
+    with open(args.map, "w", encoding="utf-8") as f:
+        json.dump(sound_map, f, indent=4, ensure_ascii=False)
+
+    print(f"{gained}/{len(assets)} assets have a gain ({len(measured)} files measured "
+          f"in {time.perf_counter() - start:.1f} s) -> {args.registry}, {args.map}")
+
+
+if __name__ == "__main__":
+    main()
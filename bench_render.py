@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+from PySide6.QtCore import QEventLoop, QTimer
+
+from src.frontend.visual_manager import VisualManager
+from src.frontend.render_backend import GameView, BACKENDS, UPDATE_MODES
+
+
+def parse_size(text: str):
+    w, h = text.lower().split("x")
+    return (int(w), int(h))
+
+
+def spin(ms: int):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def run_case(view, visual, size, backend, update_mode, item_cache, seconds, backgrounds, characters):
+    view.configure(backend, update_mode)
+    visual.set_item_cache(item_cache)
+    view.resize(*size)
+    view.fitInView(0, 0, 1920, 1080)
+    zoom = view.transform().m11() * view.devicePixelRatioF()
+    visual.set_display_size(1920 * zoom, 1080 * zoom)
+
+    visual.clear_all_sprites()
+    visual.set_background(backgrounds[0], 0)
+    for i, (name, body, face) in enumerate(characters):
+        visual.add_character(name, body, face, x=200 + i * 600, y=100, scale=0.8)
+    spin(300) # Settle the first frames (and a failed GL context's fallback)
+    view.paint_ms.clear()
+
+    # One background crossfade and a motion per character every second
+    for second in range(seconds):
+        visual.set_background(backgrounds[(second + 1) % len(backgrounds)], 1000)
+        for name, _, _ in characters:
+            visual.animate_sprite(name, "shake" if second % 2 == 0 else "jump")
+        spin(1000)
+
+    frames = list(view.paint_ms)
+    return {
+        "size": f"{size[0]}x{size[1]}", "backend": view.backend, "update_mode": view.update_mode,
+        "item_cache": item_cache, "fps": len(frames) / seconds,
+        "paint_avg": sum(frames) / len(frames) if frames else 0.0,
+        "paint_p95": percentile(frames, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-frame paint cost of fades and sprite animations per render backend.")
+    parser.add_argument("--sizes", nargs="+", default=["1920x1080"], help="Window sizes WxH")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["raster", "opengl"])
+    parser.add_argument("--update-modes", nargs="+", choices=["auto"] + list(UPDATE_MODES), default=["auto"])
+    parser.add_argument("--item-cache", choices=["off", "on", "both"], default="both")
+    parser.add_argument("--seconds", type=int, default=4)
+    parser.add_argument("--characters", type=int, default=2)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    with open("assets/background_map.json", "r", encoding="utf-8") as f:
+        bg_map = json.load(f)
+    with open("assets/character_map.json", "r", encoding="utf-8") as f:
+        char_map = json.load(f)
+    backgrounds = [key for key, data in bg_map.items() if os.path.exists(data["file"])][:2]
+    characters = []
+    for name, data in char_map.items():
+        face = next(iter(data.get("expressions", {}).values()), None)
+        if data.get("body") and os.path.exists(data["body"]):
+            characters.append((name, data["body"], face))
+        if len(characters) == args.characters:
+            break
+    if not backgrounds:
+        print("No backgrounds found in assets/background_map.json")
+        return 1
+
+    # One scene and view, reconfigured per case like the settings page does
+    scene = QGraphicsScene(0, 0, 1920, 1080)
+    visual = VisualManager(scene, decode_threads=0)
+    view = GameView(scene)
+    view.show()
+
+    caches = {"off": [False], "on": [True], "both": [False, True]}[args.item_cache]
+    print(f"{'size':<11}{'backend':<9}{'update':<10}{'cache':<7}{'fps':>6}{'paint avg':>11}{'p95':>8}")
+    for size, backend, mode, cache in itertools.product(args.sizes, args.backends, args.update_modes, caches):
+        r = run_case(view, visual, parse_size(size), backend, mode, cache, args.seconds, backgrounds, characters)
+        print(f"{r['size']:<11}{r['backend']:<9}{r['update_mode']:<10}{'on' if r['item_cache'] else 'off':<7}"
+              f"{r['fps']:>6.0f}{r['paint_avg']:>9.2f}ms{r['paint_p95']:>6.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QGuiApplication
+
+from src.frontend.bg_cache import BackgroundDiskCache, DEFAULT_CACHE_DIR, snap_display_size
+
+
+def parse_size(text: str):
+    w, h = text.lower().split("x")
+    return (int(w), int(h))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-scale backgrounds in background_map.json into the on-disk background cache.")
+    parser.add_argument("--map", default="assets/background_map.json")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--sizes", nargs="+", default=["1920x1080"],
+                        help="Target sizes WxH; the runtime snaps display sizes to 16:9 at heights 720/900/1080/1440/2160")
+    parser.add_argument("--display", metavar="WxH", help="Also build for the entry a window of this device-pixel size would use")
+    parser.add_argument("--format", choices=list(BackgroundDiskCache.EXTENSIONS), default="raw")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--prune", action="store_true", help="Delete entries of backgrounds no longer in the map")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv) # Image format plugins
+
+    with open(args.map, "r", encoding="utf-8") as f:
+        bg_map = json.load(f)
+    sources = sorted({data["file"] for data in bg_map.values() if os.path.exists(data.get("file", ""))})
+    missing = len(bg_map) - len(sources)
+
+    sizes = [parse_size(s) for s in args.sizes]
+    if args.display:
+        sizes.append(snap_display_size(*parse_size(args.display)))
+    sizes = sorted(set(sizes))
+
+    cache = BackgroundDiskCache(args.cache_dir, args.format)
+    built = 0
+    start = time.perf_counter()
+
+    def build(path):
+        nonlocal built
+        for size in sizes:
+            if cache.lookup(path, size) is None:
+                image = cache.load(path, size)
+                if image.isNull():
+                    print(f"Failed: {path}")
+                    return
+                built += 1
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(build, sources))
+    cache.save_index()
+
+    if args.prune:
+        freed = cache.prune({cache.source_hash(p) for p in sources})
+        print(f"Pruned {freed / 1024 / 1024:.1f} MiB")
+
+    total = sum(os.path.getsize(os.path.join(args.cache_dir, n)) for n in os.listdir(args.cache_dir)) if os.path.isdir(args.cache_dir) else 0
+    print(f"{len(sources)} backgrounds x {len(sizes)} size(s): {built} built, "
+          f"{len(sources) * len(sizes) - built} up to date ({time.perf_counter() - start:.1f} s)")
+    if missing:
+        print(f"{missing} map entries point to missing files")
+    print(f"Cache: {args.cache_dir} ({total / 1024 / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
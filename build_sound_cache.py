@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from src.frontend.sound_meta import DEFAULT_META_PATH, SOUND_META_VERSION
+from src.frontend import audio_ops
+
+
+def header_info(path: str):
+    """(duration_s, rate, channels) without decoding, or None."""
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / f.getframerate(), f.getframerate(), f.getnchannels()
+        except (wave.Error, EOFError):
+            return None
+    return audio_ops.ogg_info(path)
+
+
+def analyze(path: str, wav_path: str, wav_max_ms: int, decode: bool = True):
+    """Runs in a worker process. Returns (path, entry or None, status)."""
+    st = os.stat(path)
+    entry = {"stamp": [st.st_size, st.st_mtime_ns]}
+    if not decode:
+        info = header_info(path)
+        if info is None:
+            return path, None, "unreadable without decoding (drop --headers-only)"
+        entry.update(duration_ms=round(info[0] * 1000), sample_rate=info[1], channels=info[2])
+        return path, entry, "headers only"
+
+    try:
+        samples, rate = audio_ops.decode(path)
+    except Exception as e:
+        return path, None, f"decode failed: {e}"
+    duration_ms = round(len(samples) * 1000 / rate)
+    peak_db, rms_db = audio_ops.peak_rms_db(samples)
+    entry.update(duration_ms=duration_ms, sample_rate=rate, channels=samples.shape[1],
+                 peak_db=round(peak_db, 2), rms_db=round(rms_db, 2))
+    if wav_path and duration_ms <= wav_max_ms:
+        audio_ops.write_wav(wav_path, samples, rate)
+        entry["wav"] = wav_path.replace("\\", "/")
+    return path, entry, "decoded"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode every sound effect once and cache duration, loudness and short PCM copies.")
+    parser.add_argument("--map", default="assets/sound_map.json")
+    parser.add_argument("--out", default=DEFAULT_META_PATH)
+    parser.add_argument("--wav-dir", default="assets/.cache/sound")
+    parser.add_argument("--wav-max-ms", type=int, default=3000, help="Write WAV copies of effects up to this length (0 = none)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Re-analyze files that did not change")
+    parser.add_argument("--headers-only", action="store_true",
+                        help="Only record lengths from file headers (no loudness, no WAV copies); does not need soundfile")
+    args = parser.parse_args()
+    if audio_ops.soundfile is None and not args.headers_only:
+        print("soundfile is not installed (pip install -r requirements.txt); "
+              "pass --headers-only to record lengths from file headers only.")
+        sys.exit(1)
+    decode = not args.headers_only
+
+    with open(args.map, "r", encoding="utf-8") as f:
+        sound_map = json.load(f)
+    files = sorted({data["file"] for data in sound_map.values() if os.path.exists(data.get("file", ""))})
+
+    old = {}
+    try:
+        with open(args.out, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == SOUND_META_VERSION:
+            old = data.get("sounds", {})
+    except (FileNotFoundError, ValueError):
+        pass
+
+    if args.wav_max_ms > 0 and decode:
+        os.makedirs(args.wav_dir, exist_ok=True)
+
+    sounds, todo = {}, []
+    for path in files:
+        st = os.stat(path)
+        entry = old.get(path)
+        wav_ok = not entry or "wav" not in entry or os.path.exists(entry["wav"])
+        if not args.force and entry and entry.get("stamp") == [st.st_size, st.st_mtime_ns] and wav_ok \
+                and ("peak_db" in entry or not decode):
+            sounds[path] = entry
+        else:
+            stem = os.path.splitext(path.replace("\\", "/").replace("/", "__"))[0]
+            wav_path = os.path.join(args.wav_dir, stem + ".wav") if args.wav_max_ms > 0 and decode else None
+            todo.append((path, wav_path))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(analyze, path, wav_path, args.wav_max_ms, decode) for path, wav_path in todo]
+        for future in futures:
+            path, entry, status = future.result()
+            if entry:
+                sounds[path] = entry
+            else:
+                print(f"{path}: {status}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"version": SOUND_META_VERSION, "sounds": sounds}, f, indent=1, ensure_ascii=False)
+
+    # Drop WAV copies no longer referenced
+    if os.path.isdir(args.wav_dir):
+        referenced = {os.path.normpath(e["wav"]) for e in sounds.values() if "wav" in e}
+        for name in os.listdir(args.wav_dir):
+            path = os.path.normpath(os.path.join(args.wav_dir, name))
+            if name.endswith(".wav") and path not in referenced:
+                os.remove(path)
+
+    total_s = sum(e["duration_ms"] for e in sounds.values()) / 1000
+    wavs = sum(1 for e in sounds.values() if "wav" in e)
+    print(f"{len(sounds)} files ({len(todo)} analyzed, {total_s / 60:.1f} min of audio), {wavs} WAV copies "
+          f"-> {args.out} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QGuiApplication, QImage
+
+from src.frontend.sprite_mips import DEFAULT_MIPS_DIR, MIPS_VERSION
+from src.frontend.image_ops import alpha_bbox
+
+
+def build_body(body_path: str, out_dir: str, levels: int, old: dict):
+    st = os.stat(body_path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    if old and old.get("stamp") == stamp and len(old["levels"]) == levels \
+            and all(os.path.exists(os.path.join(out_dir, level["file"])) for level in old["levels"]):
+        return body_path, old, "up to date"
+
+    image = QImage(body_path)
+    if image.isNull():
+        return body_path, None, "unreadable"
+    box = alpha_bbox(image)
+    if box is None:
+        return body_path, None, "fully transparent"
+    x, y, w, h = box
+    trimmed = image.copy(x, y, w, h)
+
+    # Folder + file name keeps entries of different characters apart
+    stem = os.path.splitext(body_path.replace("\\", "/").replace("/", "__"))[0]
+    entry = {"stamp": stamp, "source_size": [image.width(), image.height()], "offset": [x, y], "levels": []}
+    level_image = trimmed
+    for level in range(levels):
+        if level > 0:
+            level_image = trimmed.scaled(max(1, round(w / 2 ** level)), max(1, round(h / 2 ** level)),
+                                         Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        name = f"{stem}_L{level}.png"
+        level_image.save(os.path.join(out_dir, name))
+        entry["levels"].append({"file": name, "scale": level_image.width() / w,
+                                "size": [level_image.width(), level_image.height()]})
+    return body_path, entry, "built"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim sprite bodies to their alpha bounding box and build 1/2, 1/4 mip levels.")
+    parser.add_argument("--map", default="assets/character_map.json")
+    parser.add_argument("--out", default=DEFAULT_MIPS_DIR)
+    parser.add_argument("--levels", type=int, default=3, help="1 = trimmed only, 3 = trimmed + 1/2 + 1/4")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv) # Image format plugins
+
+    with open(args.map, "r", encoding="utf-8") as f:
+        char_map = json.load(f)
+    bodies = sorted({data["body"] for data in char_map.values() if data.get("body") and os.path.exists(data["body"])})
+    os.makedirs(args.out, exist_ok=True)
+
+    index_path = os.path.join(args.out, "index.json")
+    old_bodies = {}
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        if old.get("version") == MIPS_VERSION:
+            old_bodies = old.get("bodies", {})
+    except (FileNotFoundError, ValueError):
+        pass
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda p: build_body(p, args.out, args.levels, old_bodies.get(p)), bodies))
+
+    index = {"version": MIPS_VERSION, "bodies": {}}
+    src_px = trimmed_px = 0
+    for path, entry, status in results:
+        print(f"{path}: {status}")
+        if entry:
+            index["bodies"][path] = entry
+            src_px += entry["source_size"][0] * entry["source_size"][1]
+            trimmed_px += entry["levels"][0]["size"][0] * entry["levels"][0]["size"][1]
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, ensure_ascii=False)
+
+    # Drop files no longer referenced
+    referenced = {level["file"] for entry in index["bodies"].values() for level in entry["levels"]} | {"index.json"}
+    for name in os.listdir(args.out):
+        if name not in referenced:
+            os.remove(os.path.join(args.out, name))
+
+    if src_px:
+        print(f"{len(index['bodies'])} bodies: trimmed to {trimmed_px / src_px:.0%} of the original pixels "
+              f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
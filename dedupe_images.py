@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import index_assets
+
+HASH_CACHE = "assets/.cache/image_hashes.json"
+HASH_VERSION = 1
+IMAGE_KINDS = ("characters", "backgrounds")
+THUMB_SIZE = 32
+
+
+def fingerprint(path: str):
+    """Runs in a worker process. Returns (path, record or None, error)."""
+    from PySide6.QtGui import QImage
+    from src.frontend.image_ops import image_to_array, luminance, dhash, phash
+
+    try:
+        image = QImage(path)
+        if image.isNull():
+            return path, None, "cannot decode"
+        # Premultiplied: files that only differ under fully transparent pixels look the same and count as the same
+        pixels = hashlib.sha1(image_to_array(image, True).tobytes()).hexdigest()
+        thumb = luminance(image, THUMB_SIZE, THUMB_SIZE).round().astype("uint8").tobytes()
+        return path, {"width": image.width(), "height": image.height(), "pixels": pixels,
+                      "dhash": f"{dhash(image):016x}", "phash": f"{phash(image):016x}",
+                      "thumb": base64.b64encode(thumb).decode("ascii")}, None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def compare(pair):
+    """Runs in a worker process. Returns (path_a, path_b, largest per-channel difference)."""
+    from PySide6.QtGui import QImage
+    from src.frontend.image_ops import max_difference
+
+    a, b = pair
+    return a, b, max_difference(QImage(a), QImage(b))
+
+
+def load_cache(force: bool) -> dict:
+    """{"images": {file sha1: fingerprint}, "pairs": {"sha1:sha1": difference}}: keyed by content, so renames keep it valid."""
+    empty = {"version": HASH_VERSION, "images": {}, "pairs": {}}
+    if force:
+        return empty
+    try:
+        with open(HASH_CACHE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return empty
+    return data if data.get("version") == HASH_VERSION else empty
+
+
+def save_cache(cache: dict):
+    os.makedirs(os.path.dirname(HASH_CACHE), exist_ok=True)
+    with open(HASH_CACHE, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+
+def collect(kinds, cache: dict, workers: int) -> dict:
+    """path -> fingerprint (plus size and sha1) for every image of `kinds`; new files are fingerprinted into `cache`."""
+    manifest = index_assets.run(kinds, workers=workers, quiet=True)["files"]
+    roots = tuple(index_assets.KINDS[kind][0] + "/" for kind in kinds)
+    paths = sorted(p for p in manifest if p.startswith(roots) and p.lower().endswith(index_assets.IMAGE_EXTENSIONS))
+
+    images = cache["images"]
+    todo = [p for p in paths if manifest[p]["sha1"] not in images]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, record, error in pool.map(fingerprint, todo, chunksize=8):
+                if record is None:
+                    print(f"{path}: {error}")
+                else:
+                    images[manifest[path]["sha1"]] = record
+    records = {}
+    for path in paths:
+        record = images.get(manifest[path]["sha1"])
+        if record:
+            records[path] = dict(record, size=manifest[path]["size"], sha1=manifest[path]["sha1"])
+    return records
+
+
+def verify_pairs(records: dict, candidates, cache: dict, tolerance: int, workers: int):
+    """The candidate pairs whose full-resolution images differ by at most `tolerance`; differences are cached per pair of contents."""
+    known = cache["pairs"]
+
+    def key(a, b):
+        return ":".join(sorted((records[a]["sha1"], records[b]["sha1"])))
+
+    todo = [(a, b) for a, b in candidates if key(a, b) not in known]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for a, b, diff in pool.map(compare, todo, chunksize=4):
+                known[key(a, b)] = diff
+    return [(a, b) for a, b in candidates if known[key(a, b)] <= tolerance]
+
+
+def candidate_pairs(records: dict, max_bits: int, tolerance: int):
+    """
+    Pairs of same-size images that may look the same: pHash and dHash at
+    most `max_bits` apart, and no 32x32 luma cell more than `tolerance`
+    levels apart. Global hashes alone cannot tell faces apart that only
+    differ in the mouth; the thumbnails drop most of those pairs before the
+    full-resolution comparison.
+    """
+    import numpy as np
+    from src.frontend.image_ops import hamming_pairs
+
+    paths = list(records)
+    phashes = [int(records[p]["phash"], 16) for p in paths]
+    thumbs = {}
+    pairs = []
+    for i, j, _ in hamming_pairs(phashes, max_bits):
+        a, b = records[paths[i]], records[paths[j]]
+        if (a["width"], a["height"]) != (b["width"], b["height"]):
+            continue # Faces are drawn at (0, 0) on the body: the canvas must match
+        if a["pixels"] == b["pixels"]:
+            continue # Same pixels: grouped without a comparison
+        if bin(int(a["dhash"], 16) ^ int(b["dhash"], 16)).count("1") > max_bits:
+            continue
+        for path in (paths[i], paths[j]):
+            if path not in thumbs:
+                thumbs[path] = np.frombuffer(base64.b64decode(records[path]["thumb"]), np.uint8).astype(np.int16)
+        if np.abs(thumbs[paths[i]] - thumbs[paths[j]]).max() <= tolerance:
+            pairs.append((paths[i], paths[j]))
+    return pairs
+
+
+def cluster(records: dict, near_pairs=()):
+    """
+    Groups pixel-identical images (as displayed) and the given verified
+    near-duplicate pairs. Returns [(paths, exact)] for groups of two or more.
+    """
+    index = {path: i for i, path in enumerate(records)}
+    parent = list(range(len(index)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        parent[find(i)] = find(j)
+
+    first = {}
+    for path, i in index.items():
+        r = records[path]
+        key = (r["width"], r["height"], r["pixels"])
+        if key in first:
+            union(i, first[key])
+        else:
+            first[key] = i
+    for a, b in near_pairs:
+        union(index[a], index[b])
+
+    groups = {}
+    for path, i in index.items():
+        groups.setdefault(find(i), []).append(path)
+    return [(members, len({records[p]["pixels"] for p in members}) == 1)
+            for members in groups.values() if len(members) > 1]
+
+
+def load_maps() -> dict:
+    maps = {}
+    for kind in IMAGE_KINDS:
+        with open(index_assets.KINDS[kind][1], "r", encoding="utf-8") as f:
+            maps[kind] = json.load(f)
+    return maps
+
+
+def references(maps: dict) -> Counter:
+    """How many map entries point at each image path."""
+    refs = Counter()
+    for entry in maps["characters"].values():
+        if entry.get("body"):
+            refs[entry["body"]] += 1
+        refs.update(entry.get("expressions", {}).values())
+    refs.update(entry.get("file") for entry in maps["backgrounds"].values())
+    return refs
+
+
+def rewrite_maps(maps: dict, alias: dict) -> int:
+    """Points map entries at the kept file of their cluster. Returns the number of entries changed."""
+    changed = 0
+    for entry in maps["characters"].values():
+        if entry.get("body") in alias:
+            entry["body"] = alias[entry["body"]]
+            changed += 1
+        for face_id, path in entry.get("expressions", {}).items():
+            if path in alias:
+                entry["expressions"][face_id] = alias[path]
+                changed += 1
+    for entry in maps["backgrounds"].values():
+        if entry.get("file") in alias:
+            entry["file"] = alias[entry["file"]]
+            changed += 1
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate and near-duplicate sprites and backgrounds with perceptual hashes.")
+    parser.add_argument("kinds", nargs="*", help=f"Image kinds to check: {', '.join(IMAGE_KINDS)} (default: both)")
+    parser.add_argument("--distance", type=int, default=4, help="Bits (of 64) pHash and dHash may differ by for a near-duplicate candidate; -1 for exact only")
+    parser.add_argument("--tolerance", type=int, default=8, help="Largest per-channel difference (0-255) between near-duplicates at full resolution")
+    parser.add_argument("--rewrite", action="store_true", help="Point map entries of pixel-identical images at one file")
+    parser.add_argument("--near", action="store_true", help="With --rewrite, also merge near-duplicates (changes what is shown)")
+    parser.add_argument("--delete", action="store_true", help="With --rewrite, delete the files no map refers to any more")
+    parser.add_argument("--list", type=int, default=20, help="Clusters to print (largest savings first)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Recompute every fingerprint")
+    args = parser.parse_args()
+    unknown = [kind for kind in args.kinds if kind not in IMAGE_KINDS]
+    if unknown:
+        parser.error(f"unknown image kind: {', '.join(unknown)}")
+    if (args.near or args.delete) and not args.rewrite:
+        parser.error("--near and --delete need --rewrite")
+    kinds = args.kinds or list(IMAGE_KINDS)
+
+    start = time.perf_counter()
+    cache = load_cache(args.force)
+    records = collect(kinds, cache, args.workers)
+    near_pairs = []
+    if args.distance >= 0:
+        candidates = candidate_pairs(records, args.distance, args.tolerance)
+        near_pairs = verify_pairs(records, candidates, cache, args.tolerance, args.workers)
+        print(f"{len(candidates)} candidate pairs from the hashes, {len(near_pairs)} within {args.tolerance} levels")
+    save_cache(cache)
+    maps = load_maps()
+    refs = references(maps)
+    clusters = cluster(records, near_pairs)
+
+    # Keep the file most entries already use, then the smallest
+    alias, totals = {}, {True: [0, 0, 0], False: [0, 0, 0]} # exact -> clusters, files, bytes saved
+    report = []
+    for members, exact in clusters:
+        members.sort(key=lambda p: (-refs[p], records[p]["size"], p))
+        keep, dropped = members[0], members[1:]
+        saved = sum(records[p]["size"] for p in dropped)
+        totals[exact][0] += 1
+        totals[exact][1] += len(dropped)
+        totals[exact][2] += saved
+        report.append((saved, exact, keep, dropped))
+        if exact or args.near:
+            alias.update((p, keep) for p in dropped)
+
+    report.sort(key=lambda r: -r[0])
+    for saved, exact, keep, dropped in report[:args.list]:
+        label = "same pixels" if exact else "near"
+        print(f"{saved / 1024:>8.0f} KiB  {label:<11} {keep}  <=  {', '.join(os.path.basename(p) for p in dropped)}")
+    if len(report) > args.list:
+        print(f"... {len(report) - args.list} more clusters")
+
+    total_bytes = sum(r["size"] for r in records.values())
+    for exact, name in ((True, "pixel-identical"), (False, f"near-duplicate (<= {args.tolerance} levels)")):
+        n_clusters, n_files, saved = totals[exact]
+        print(f"{name}: {n_clusters} clusters, {n_files} redundant files, {saved / 1024 / 1024:.1f} MiB")
+    print(f"{len(records)} images, {total_bytes / 1024 / 1024:.1f} MiB checked in {time.perf_counter() - start:.1f} s")
+
+    if not args.rewrite:
+        return
+    before = {kind: json.dumps(maps[kind]) for kind in IMAGE_KINDS}
+    changed = rewrite_maps(maps, alias)
+    for kind in IMAGE_KINDS:
+        if json.dumps(maps[kind]) == before[kind]:
+            continue
+        with open(index_assets.KINDS[kind][1], "w", encoding="utf-8") as f:
+            json.dump(maps[kind], f, indent=4, ensure_ascii=False)
+    print(f"{changed} map entries now point at {len(set(alias.values()))} kept files")
+    # Remembered by the indexer, so the next index run does not map the dropped files again
+    index_assets.add_aliases(alias)
+    if args.delete:
+        still_used = references(maps)
+        removed = [p for p in alias if not still_used[p] and os.path.exists(p)]
+        for path in removed:
+            os.remove(path)
+        print(f"Deleted {len(removed)} files ({sum(records[p]['size'] for p in removed) / 1024 / 1024:.1f} MiB)")
+    else:
+        print("Re-run pack_assets.py / pack_face_atlas.py; use --delete to drop the unreferenced files.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import os
+import re
+import json
+import time
+import wave
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from analyze_loudness import write_registry
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = "assets/.cache/asset_manifest.json"
+
+# kind -> (asset folder, map file it feeds)
+KINDS = {
+    "characters": ("assets/fg", "assets/character_map.json"),
+    "backgrounds": ("assets/bg", "assets/background_map.json"),
+    "sounds": ("assets/sound", "assets/sound_map.json"),
+    "music": ("assets/bgm", "assets/registry.json"),
+}
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+SPRITE_EXTENSIONS = (".png", ".webp") # Bodies and faces need alpha
+AUDIO_EXTENSIONS = (".ogg", ".mp3", ".wav")
+SOUND_DESCRIPTIONS = "音效详情表.txt" # In assets/sound, "<number>. <description>" per line
+
+
+# --- Walking ---
+
+def walk(root: str, old_dirs: dict, new_dirs: dict, force: bool):
+    """
+    Paths of all files under `root`. A folder whose mtime did not change
+    (no file added, removed or renamed in it) is not listed again: its
+    listing comes from the manifest. Returns (files, folders listed).
+    """
+    files, listed = [], 0
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            continue
+        entry = old_dirs.get(folder)
+        if force or not entry or entry["mtime_ns"] != mtime:
+            names, subdirs = [], []
+            with os.scandir(folder) as it:
+                for item in it:
+                    (subdirs if item.is_dir() else names).append(item.name)
+            entry = {"mtime_ns": mtime, "files": sorted(names), "dirs": sorted(subdirs)}
+            listed += 1
+        new_dirs[folder] = entry
+        files.extend(f"{folder}/{name}" for name in entry["files"])
+        stack.extend(f"{folder}/{name}" for name in entry["dirs"])
+    return files, listed
+
+
+# --- Per-file metadata (worker processes) ---
+
+def describe(path: str):
+    """Runs in a worker process. Returns (path, record or None, error)."""
+    try:
+        st = os.stat(path)
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha1.update(chunk)
+        record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1.hexdigest()}
+        lower = path.lower()
+        if lower.endswith(IMAGE_EXTENSIONS):
+            record.update(image_meta(path))
+        elif lower.endswith(AUDIO_EXTENSIONS):
+            record.update(audio_meta(path))
+        return path, record, None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def image_meta(path: str) -> dict:
+    from PySide6.QtGui import QImage, QImageReader
+    from src.frontend.image_ops import alpha_bbox
+
+    reader = QImageReader(path)
+    size = reader.size()
+    meta = {"width": size.width(), "height": size.height()}
+    if path.lower().endswith(SPRITE_EXTENSIONS):
+        image = QImage(path)
+        if image.hasAlphaChannel():
+            meta["alpha_bbox"] = list(alpha_bbox(image) or (0, 0, 0, 0))
+    return meta
+
+
+def audio_meta(path: str) -> dict:
+    from src.frontend import audio_ops
+
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as f:
+            info = f.getnframes() / f.getframerate(), f.getframerate(), f.getnchannels()
+    else:
+        info = audio_ops.ogg_info(path) if path.lower().endswith(".ogg") else None
+    if info is None:
+        return {}
+    return {"duration_ms": round(info[0] * 1000), "sample_rate": info[1], "channels": info[2]}
+
+
+# --- Maps ---
+# Existing entries (hand-picked keys, descriptions, extra fields) are kept;
+# files not in a map yet are added under their file name, except aliases
+# (duplicates whose entries were pointed at another file by dedupe_images.py);
+# entries whose file is gone are reported, and removed only with --prune.
+
+def _unique_key(key: str, taken) -> str:
+    candidate, n = key, 2
+    while candidate in taken:
+        candidate, n = f"{key}_{n}", n + 1
+    return candidate
+
+
+def merge_file_map(old: dict, files, description, prune: bool, aliases=()):
+    """background_map / sound_map: {key: {"file": path, "description": ...}}. Returns (map, added, missing)."""
+    present = set(files)
+    mapped = {entry.get("file") for entry in old.values()}
+    new = {}
+    missing = []
+    for key, entry in old.items():
+        if entry.get("file") not in present:
+            missing.append(key)
+            if prune:
+                continue
+        new[key] = entry
+    added = 0
+    for path in files:
+        if path not in mapped and path not in aliases:
+            key = _unique_key(os.path.splitext(os.path.basename(path))[0], new)
+            new[key] = {"file": path, "description": description(path)}
+            added += 1
+    return new, added, missing
+
+
+def merge_character_map(old: dict, files, prune: bool, aliases=()):
+    """
+    character_map: {name: {"body": path, "expressions": {id: path}}}. The
+    character is the part of its folder name before the first underscore;
+    bodies are "*_CF_*.png", expressions "*_face_<id>.png" (or .webp).
+    """
+    present = set(files)
+    new = {name: dict(entry, expressions=dict(entry.get("expressions", {}))) for name, entry in old.items()}
+    added, missing = 0, []
+    for name, entry in new.items():
+        if entry.get("body") and entry["body"] not in present:
+            missing.append(entry["body"])
+            if prune:
+                entry["body"] = ""
+        for face_id, path in list(entry["expressions"].items()):
+            if path not in present:
+                missing.append(path)
+                if prune:
+                    del entry["expressions"][face_id]
+
+    root = KINDS["characters"][0]
+    for path in files:
+        rel = path[len(root) + 1:]
+        if "/" not in rel or not path.lower().endswith(SPRITE_EXTENSIONS) or path in aliases:
+            continue
+        folder, file_name = rel.split("/", 1)
+        entry = new.setdefault(folder.split("_")[0], {"body": "", "expressions": {}})
+        if "_face_" in file_name:
+            face_id = re.search(r"face_(.+)$", os.path.splitext(file_name)[0]).group(1)
+            if face_id not in entry["expressions"] and path not in entry["expressions"].values():
+                entry["expressions"][face_id] = path
+                added += 1
+        elif "_CF_" in file_name and not entry.get("body"):
+            entry["body"] = path
+            added += 1
+    return new, added, missing
+
+
+def merge_music(registry: dict, files, prune: bool):
+    """registry["music"]: [{"name", "file" (relative to assets/bgm), "description"}]."""
+    root = KINDS["music"][0]
+    present = {path[len(root) + 1:] for path in files}
+    music, missing = [], []
+    for entry in registry.get("music", []):
+        if entry.get("file") not in present:
+            missing.append(entry.get("name"))
+            if prune:
+                continue
+        music.append(entry)
+    known = {entry.get("file") for entry in music}
+    names = {entry.get("name") for entry in music}
+    added = 0
+    for file_name in sorted(present - known):
+        name = _unique_key(os.path.splitext(os.path.basename(file_name))[0], names)
+        names.add(name)
+        music.append({"name": name, "file": file_name, "description": "Auto-scanned music"})
+        added += 1
+    return dict(registry, music=music), added, missing
+
+
+def rename_in_maps(renames: dict) -> int:
+    """
+    Points character / background / sound map entries at renamed files
+    (old path -> new path), keeping their keys and other fields, so a
+    following run() sees them as mapped. Returns the number of entries changed.
+    """
+    changed = 0
+    for kind in ("characters", "backgrounds", "sounds"):
+        map_path = KINDS[kind][1]
+        data = _load_json(map_path, {})
+        before = changed
+        for entry in data.values():
+            if kind == "characters":
+                if entry.get("body") in renames:
+                    entry["body"] = renames[entry["body"]]
+                    changed += 1
+                for face_id, path in entry.get("expressions", {}).items():
+                    if path in renames:
+                        entry["expressions"][face_id] = renames[path]
+                        changed += 1
+            elif entry.get("file") in renames:
+                entry["file"] = renames[entry["file"]]
+                changed += 1
+        if changed != before:
+            _write_json(map_path, data)
+    return changed
+
+
+def read_sound_descriptions(sound_dir: str) -> dict:
+    """se number -> description from the sound pack's description table."""
+    descriptions = {}
+    path = os.path.join(sound_dir, SOUND_DESCRIPTIONS)
+    if not os.path.exists(path):
+        return descriptions
+    with open(path, "r", encoding="gb18030", errors="ignore") as f:
+        for line in f:
+            match = re.match(r"(\d+)\.\s*(.*)", line.strip())
+            if match:
+                descriptions[int(match.group(1))] = match.group(2)
+    return descriptions
+
+
+def _load_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _write_json(path: str, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+# --- Entry point ---
+
+def run(kinds=None, manifest_path: str = DEFAULT_MANIFEST, workers: int = None,
+        force: bool = False, prune: bool = False, quiet: bool = False):
+    """Indexes the given asset kinds (default all) and updates their maps. Returns the manifest."""
+    kinds = list(kinds or KINDS)
+    start = time.perf_counter()
+    manifest = _load_json(manifest_path, {})
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {}
+    old_dirs, old_files = manifest.get("dirs", {}), manifest.get("files", {})
+    new_dirs, new_files = dict(old_dirs), dict(old_files)
+    aliases = manifest.get("aliases", {}) # dropped duplicate -> kept file (dedupe_images.py --rewrite)
+
+    # 1. Walk (unchanged folders come from the manifest)
+    files_by_kind, listed = {}, 0
+    for kind in kinds:
+        root = KINDS[kind][0]
+        for folder in [d for d in new_dirs if d == root or d.startswith(root + "/")]:
+            del new_dirs[folder] # Re-added below if still there
+        files, n = walk(root, old_dirs, new_dirs, force)
+        listed += n
+        extensions = IMAGE_EXTENSIONS if kind in ("characters", "backgrounds") else AUDIO_EXTENSIONS
+        files_by_kind[kind] = sorted(p for p in files if p.lower().endswith(extensions))
+        present = set(files_by_kind[kind])
+        for path in [p for p in new_files if p.startswith(root + "/") and p not in present]:
+            del new_files[path]
+
+    # 2. Hash + metadata for new or changed files only
+    todo = []
+    for files in files_by_kind.values():
+        for path in files:
+            record = old_files.get(path)
+            st = os.stat(path)
+            if force or not record or record["size"] != st.st_size or record["mtime_ns"] != st.st_mtime_ns:
+                todo.append(path)
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 4) as pool:
+            for path, record, error in pool.map(describe, todo, chunksize=8):
+                if record is None:
+                    print(f"{path}: {error}")
+                    new_files.pop(path, None)
+                else:
+                    new_files[path] = record
+
+    # 3. Maps
+    for kind in kinds:
+        files = [p for p in files_by_kind[kind] if p in new_files]
+        map_path = KINDS[kind][1]
+        if kind == "characters":
+            old = _load_json(map_path, {})
+            new, added, missing = merge_character_map(old, files, prune, aliases)
+        elif kind == "backgrounds":
+            old = _load_json(map_path, {})
+            new, added, missing = merge_file_map(old, files, lambda p: "Auto-scanned background", prune, aliases)
+        elif kind == "sounds":
+            old = _load_json(map_path, {})
+            descriptions = read_sound_descriptions(KINDS["sounds"][0])
+
+            def describe_sound(path):
+                # se001 -> 1, se025-2 -> 25
+                match = re.search(r"se(\d+)", os.path.basename(path), re.IGNORECASE)
+                return descriptions.get(int(match.group(1)), "Auto-scanned sound") if match else "Auto-scanned sound"
+            new, added, missing = merge_file_map(old, files, describe_sound, prune)
+        else:
+            old = _load_json(map_path, {"music": [], "backgrounds": []})
+            new, added, missing = merge_music(old, files, prune)
+
+        if new != old:
+            if kind == "music":
+                write_registry(map_path, new) # Keeps the registry's one-entry-per-line layout
+            else:
+                _write_json(map_path, new)
+        if not quiet:
+            note = f", {len(missing)} entries point to missing files" + (" (removed)" if prune else "") if missing else ""
+            print(f"{kind}: {len(files)} files, {added} added{note} -> {map_path}")
+
+    # Aliases whose file was deleted need no remembering
+    aliases = {path: kept for path, kept in aliases.items() if os.path.exists(path)}
+    manifest = {"version": MANIFEST_VERSION, "dirs": new_dirs, "files": new_files, "aliases": aliases}
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    if not quiet:
+        print(f"{listed} folders listed, {len(todo)} files hashed in {time.perf_counter() - start:.2f} s -> {manifest_path}")
+    return manifest
+
+
+def add_aliases(aliases: dict, manifest_path: str = DEFAULT_MANIFEST):
+    """Records duplicates (path -> kept path) that must not be added back to the maps."""
+    manifest = _load_json(manifest_path, {})
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "dirs": {}, "files": {}}
+    manifest["aliases"] = dict(manifest.get("aliases", {}), **aliases)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def load_manifest(manifest_path: str = DEFAULT_MANIFEST) -> dict:
+    """path -> record (size, mtime_ns, sha1 and image / audio metadata) of the last run."""
+    manifest = _load_json(manifest_path, {})
+    return manifest.get("files", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index characters, backgrounds, sounds and music incrementally and update their maps.")
+    parser.add_argument("kinds", nargs="*", help=f"Asset kinds to index: {', '.join(KINDS)} (default: all)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Re-list every folder and re-hash every file")
+    parser.add_argument("--prune", action="store_true", help="Remove map entries whose file is gone")
+    args = parser.parse_args()
+    unknown = [kind for kind in args.kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"unknown asset kind: {', '.join(unknown)}")
+    run(args.kinds, args.manifest, args.workers, args.force, args.prune)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+from src.llm_chain import LLMChain
+from src.memory_manager import MemoryManager
+from src.frontend.engine_core import EngineCore, VirtualClock
+from src.frontend.stubs import StubVisualManager, StubAudioManager
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+GENERATED_INPUTS = [
+    "你好", "今天天气怎么样？", "我们去天台吧。", "你在看什么书？", "放学后一起回家吗？",
+    "刚才的事情是怎么回事？", "我有点饿了。", "要不要去社团看看？", "谢谢你。", "明天见。",
+]
+
+
+# --- Stand-in Server ---
+
+class StandInServer:
+    """
+    Minimal OpenAI-compatible endpoint (POST .../chat/completions, GET .../models).
+
+    Every reply carries all the tags the chain validates (<game>, <finally>,
+    <summary_little>, <summary_big>, <guide>), so any stage accepts it. The
+    Director part contains real stage directions built from the asset maps.
+    """
+
+    def __init__(self, latency_ms: float = 200, summary_latency_ms: float = 400, jitter: float = 0.25, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.summary_latency_ms = summary_latency_ms
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._server = None
+
+        self.backgrounds = self._load_keys("assets/background_map.json") or ["None"]
+        self.sounds = self._load_keys("assets/sound_map.json") or ["None"]
+        self.characters = {}
+        try:
+            with open("assets/character_map.json", "r", encoding="utf-8") as f:
+                for name, data in json.load(f).items():
+                    self.characters[name] = list(data.get("expressions", {}).keys())[:20] or ["default"]
+        except Exception:
+            self.characters = {"chiguo": ["default"]}
+
+    @staticmethod
+    def _load_keys(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return list(json.load(f).keys())
+        except Exception:
+            return []
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _director_output(self) -> str:
+        rnd = self.random
+        name = rnd.choice(list(self.characters))
+        expr = rnd.choice(self.characters[name])
+        parts = [
+            f"[Background-{rnd.choice(self.backgrounds)}]",
+            f"[Join-{name}-pos_center]",
+            f"[fg-{name}-{expr}]",
+            f"【{name}】『今天也一起努力吧。』[r]",
+            f"[sound-{rnd.choice(self.sounds)}-0]",
+            f"[{name}-好感-+1]",
+            "风吹过走廊，窗外传来远处的声音。[r]",
+            f"[fg-{name}-{rnd.choice(self.characters[name])}]",
+            f"【{name}】『嗯……那就这样决定了。』[C]",
+        ]
+        return "".join(parts)
+
+    def _reply(self, body: dict) -> str:
+        guide = json.dumps({"options": ["继续日常。", "出现意外。", "角色心事。"]}, ensure_ascii=False)
+        return (
+            "<game>风吹过走廊。她回头看了你一眼。</game>"
+            f"<finally>{self._director_output()}</finally>"
+            "<summary_little>主角与角色在学校交谈。</summary_little>"
+            "<summary_big>故事在校园中缓缓展开。</summary_big>"
+            f"<guide>{guide}</guide>"
+        )
+
+    def _latency_s(self, body: dict) -> float:
+        messages = body.get("messages", [])
+        user_text = messages[-1].get("content", "") if messages else ""
+        is_background = "summary" in user_text or "plot directions" in user_text
+        base = self.summary_latency_ms if is_background else self.latency_ms
+        return max(0.0, base * (1 + self.random.uniform(-self.jitter, self.jitter))) / 1000.0
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            raw = await reader.readexactly(length) if length else b""
+            method, path = request_line.split(" ")[:2]
+            self.requests += 1
+
+            if method == "GET" and path.endswith("/models"):
+                payload = {"object": "list", "data": [{"id": "stand-in", "object": "model", "owned_by": "local"}]}
+            else:
+                body = json.loads(raw or b"{}")
+                await asyncio.sleep(self._latency_s(body))
+                payload = {
+                    "id": f"chatcmpl-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stand-in"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self._reply(body)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                + f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except Exception as e:
+            print(f"[StandInServer] Error: {e}", file=sys.stderr)
+        finally:
+            writer.close()
+
+
+# --- Metrics ---
+
+class LoadStats:
+    def __init__(self):
+        self.samples = {} # stage -> list of ms
+        self.stalls = 0
+        self.turns = 0
+        self.bytes_written = 0
+
+    def add(self, stage: str, ms: float):
+        self.samples.setdefault(stage, []).append(ms)
+
+    @staticmethod
+    def percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+        return sorted_values[index]
+
+    def summary(self):
+        result = {}
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            result[stage] = {
+                "count": len(values),
+                "p50": self.percentile(values, 50),
+                "p90": self.percentile(values, 90),
+                "p99": self.percentile(values, 99),
+                "max": values[-1],
+            }
+        return result
+
+
+def instrument(chain: LLMChain, stats: LoadStats):
+    """Wraps pipeline stages of one chain with timers (instance attributes only)."""
+
+    def wrap_async(name, stage):
+        original = getattr(chain, name)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                stats.add(stage, (time.perf_counter() - start) * 1000)
+        setattr(chain, name, timed)
+
+    wrap_async("run_storyteller", "storyteller")
+    wrap_async("run_director", "director")
+    wrap_async("_generate_small_summary", "small_summary")
+    wrap_async("_generate_big_summary", "big_summary")
+    wrap_async("_run_architect", "plot_planning")
+
+    memory = chain.memory
+    original_save = memory._save_persistent_data
+    paths = [memory.path_gamestate, memory.path_summary_big, memory.path_summary_small,
+             memory.path_history, memory.path_plot_plan]
+
+    def timed_save():
+        start = time.perf_counter()
+        original_save()
+        stats.add("persist", (time.perf_counter() - start) * 1000)
+        # Every save rewrites these files completely
+        stats.bytes_written += sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    memory._save_persistent_data = timed_save
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Sessions ---
+
+async def run_session(index: int, args, config: dict, inputs, stats: LoadStats, root_dir: str):
+    base_dir = os.path.join(root_dir, f"session_{index}").replace("\\", "/")
+    memory = MemoryManager(base_dir=base_dir, save_dir=f"{base_dir}/saves")
+    memory.raw_history_limit = args.raw_history_limit
+    chain = LLMChain(config=config, memory=memory)
+    if args.plot_planning_freq is not None:
+        memory.plot_planning_threshold = args.plot_planning_freq
+    instrument(chain, stats)
+
+    clock = VirtualClock()
+    engine = EngineCore(StubVisualManager(), StubAudioManager(), chain, clock=clock)
+    engine.set_auto_mode(True)
+
+    original_start = engine._start_sequence
+    def timed_start(text):
+        start = time.perf_counter()
+        original_start(text)
+        stats.add("engine_parse", (time.perf_counter() - start) * 1000)
+    engine._start_sequence = timed_start
+
+    for turn in range(args.turns):
+        user_input = inputs(index, turn)
+
+        # Summary / plot-planning tasks block the chain; a player would wait here
+        stall_start = None
+        while chain.is_blocking:
+            if stall_start is None:
+                stall_start = time.perf_counter()
+                stats.stalls += 1
+            await asyncio.sleep(0.005)
+        if stall_start is not None:
+            stats.add("summary_stall", (time.perf_counter() - stall_start) * 1000)
+
+        start = time.perf_counter()
+        await engine.handle_turn(user_input)
+        stats.add("turn", (time.perf_counter() - start) * 1000)
+
+        # Play the whole sequence back in virtual time (typewriter, [r], [C] delays)
+        start = time.perf_counter()
+        clock.run_until_idle()
+        stats.add("engine_playback", (time.perf_counter() - start) * 1000)
+        stats.turns += 1
+
+    # Let pending background tasks finish so their cost is counted
+    while chain.is_blocking:
+        await asyncio.sleep(0.01)
+
+    archive_path = memory.turn_archive.path
+    if os.path.exists(archive_path):
+        stats.bytes_written += os.path.getsize(archive_path)
+
+
+def make_inputs(args):
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            lines = json.loads(text)
+        except json.JSONDecodeError:
+            lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if not lines:
+            raise SystemExit(f"No inputs in {args.script}")
+        return lambda session, turn: lines[(session + turn) % len(lines)]
+
+    rnd = random.Random(args.seed)
+    return lambda session, turn: rnd.choice(GENERATED_INPUTS)
+
+
+def load_config(args) -> dict:
+    config = {}
+    if os.path.exists(args.config):
+        try:
+            with open(args.config, "r") as f:
+                config = json.load(f)
+        except Exception as e:
+            print(f"Failed to read {args.config}: {e}")
+    return config
+
+
+def print_report(stats: LoadStats, wall_s: float, args, server=None):
+    print(f"\nSessions: {args.sessions}  Turns/session: {args.turns}  "
+          f"raw_history_limit: {args.raw_history_limit}  plot_planning_threshold: {args.plot_planning_freq}")
+    print(f"{'stage':<18}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, s in sorted(stats.summary().items()):
+        print(f"{stage:<18}{s['count']:>7}{s['p50']:>10.1f}{s['p90']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+    print(f"\nTurns: {stats.turns} in {wall_s:.2f} s -> {stats.turns / wall_s if wall_s else 0:.2f} turns/s")
+    stall_total = sum(stats.samples.get("summary_stall", []))
+    print(f"Summary-trigger stalls: {stats.stalls} ({stall_total / 1000:.2f} s total)")
+    print(f"Disk bytes written: {stats.bytes_written / 1024:.1f} KiB")
+    rss = peak_rss_mb()
+    print(f"Peak RSS: {rss:.1f} MiB" if rss is not None else "Peak RSS: n/a on this platform")
+    if server:
+        print(f"Stand-in requests served: {server.requests}")
+
+
+async def main_async(args):
+    config = load_config(args)
+    server = None
+    if args.stand_in:
+        server = StandInServer(latency_ms=args.latency_ms, summary_latency_ms=args.summary_latency_ms, seed=args.seed)
+        base_url = await server.start()
+        for group in ("story", "summary", "logic"):
+            config[f"url_{group}"] = base_url
+            config[f"key_{group}"] = "stand-in"
+            config[f"model_{group}"] = "stand-in"
+
+    root_dir = args.out_dir or tempfile.mkdtemp(prefix="galgame_load_")
+    inputs = make_inputs(args)
+    stats = LoadStats()
+
+    start = time.perf_counter()
+    log = sys.stdout if args.verbose else open(os.devnull, "w", encoding="utf-8")
+    try:
+        with contextlib.redirect_stdout(log):
+            await asyncio.gather(*(run_session(i, args, config, inputs, stats, root_dir) for i in range(args.sessions)))
+    finally:
+        wall_s = time.perf_counter() - start
+        if server:
+            await server.stop()
+
+    print_report(stats, wall_s, args, server)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "stages": stats.summary(),
+                "turns": stats.turns,
+                "wall_s": wall_s,
+                "turns_per_s": stats.turns / wall_s if wall_s else 0,
+                "stalls": stats.stalls,
+                "bytes_written": stats.bytes_written,
+                "peak_rss_mb": peak_rss_mb(),
+            }, f, indent=4)
+
+    if not args.out_dir:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test: LLMChain.execute_turn -> engine parsing -> MemoryManager persistence.")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=30, help="Turns per session")
+    parser.add_argument("--script", help="Input script: one line per turn, or a JSON list (default: generated inputs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stand-in", action="store_true", help="Serve the LLM endpoints from a local stand-in server")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Stand-in latency for Storyteller/Director calls")
+    parser.add_argument("--summary-latency-ms", type=float, default=400, help="Stand-in latency for summary/planner calls")
+    parser.add_argument("--config", default="config.json", help="Endpoint configuration (ignored with --stand-in)")
+    parser.add_argument("--raw-history-limit", type=int, default=20)
+    parser.add_argument("--plot-planning-freq", type=int, default=None, help="Override plot_planning_threshold")
+    parser.add_argument("--out-dir", help="Keep per-session memory files here (default: temp dir, deleted)")
+    parser.add_argument("--json", help="Also write the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
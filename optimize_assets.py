@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import index_assets
+
+IMAGE_KINDS = ("characters", "backgrounds")
+FAMILIES = ("bodies", "faces", "other sprites", "backgrounds")
+SOURCE_DIRS = (".", "src")
+_ASSET_LITERAL = re.compile(r"""["'](assets/[^"'\s]+)["']""")
+
+
+def source_references() -> set:
+    """Asset paths written literally in the Python sources: only the maps are rewritten, so these keep their extension."""
+    paths = set()
+    for folder in SOURCE_DIRS:
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if not d.startswith((".", "__")) and d != "assets"]
+            for name in files:
+                if name.endswith(".py"):
+                    with open(os.path.join(root, name), "r", encoding="utf-8", errors="ignore") as f:
+                        paths.update(_ASSET_LITERAL.findall(f.read()))
+            if folder == ".":
+                break # Only the root scripts; src is walked on its own
+    return paths
+
+
+def family_of(path: str) -> str:
+    if path.startswith(index_assets.KINDS["backgrounds"][0] + "/"):
+        return "backgrounds"
+    name = os.path.basename(path)
+    return "faces" if "_face_" in name else "bodies" if "_CF_" in name else "other sprites"
+
+
+def _decode(data: bytes, ext: str, runs: int = 2):
+    """(QImage, best decode time in ms): the first decode in a worker also loads the format plugin."""
+    from PySide6.QtGui import QImage
+
+    best = None
+    for _ in range(runs):
+        image = QImage()
+        start = time.perf_counter()
+        image.loadFromData(data, ext[1:].upper())
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return image, best
+
+
+def optimize(task):
+    """
+    Runs in a worker process. Encodes the candidates for one image, keeps
+    the smallest that passes its check, and writes it unless `dry_run`.
+    Returns a result dict (path, new_path, family, bytes and decode ms
+    before / after, method) or one with "error".
+    """
+    from src.frontend.image_ops import encode_image, quantize, distinct_colours, max_difference, psnr
+
+    path, options = task
+    result = {"path": path, "new_path": path, "family": family_of(path), "method": "kept"}
+    try:
+        with open(path, "rb") as f:
+            original = f.read()
+        stem, ext = os.path.splitext(path)
+        ext = ext.lower()
+        image, decode_ms = _decode(original, ext)
+        if image.isNull():
+            return dict(result, error="cannot decode")
+        result.update(before=len(original), after=len(original), decode_before=decode_ms, decode_after=decode_ms)
+
+        # (method, extension, data, check): "exact" must decode to the same pixels,
+        # "psnr" must stay above --min-psnr, None is an explicit lossy setting
+        candidates = []
+        if ext == ".png":
+            candidates.append(("png recompressed", ".png", encode_image(image, "png", 0), "exact"))
+            if result["family"] == "faces" and options["quantize_faces"]:
+                indexed = quantize(image, options["colors"])
+                candidates.append((f"png {options['colors']} colours", ".png", encode_image(indexed, "png", 0), "psnr"))
+            elif distinct_colours(image) <= 256:
+                candidates.append(("png palette", ".png", encode_image(quantize(image), "png", 0), "exact"))
+            if options["webp"]:
+                candidates.append(("webp lossless", ".webp", encode_image(image, "webp", 100), "exact"))
+        if result["family"] == "backgrounds" and options["bg_quality"] is not None:
+            quality = options["bg_quality"]
+            fmt = options["bg_format"]
+            candidates.append((f"{fmt} q{quality}", "." + fmt, encode_image(image, fmt, quality), None))
+            if options["webp"] and fmt != "webp":
+                candidates.append((f"webp q{quality}", ".webp", encode_image(image, "webp", quality), None))
+
+        best = None
+        for method, new_ext, data, check in sorted(candidates, key=lambda c: len(c[2])):
+            if len(data) >= len(original) * (1 - options["min_saving"]):
+                break
+            new_path = stem + new_ext if new_ext != ext else path
+            if new_path != path and (os.path.exists(new_path) or path in options["pinned"]):
+                continue # Would overwrite another asset, or break a path written in the code
+            decoded, ms = _decode(data, new_ext)
+            if decoded.isNull() or decoded.size() != image.size():
+                continue
+            if check == "exact" and max_difference(image, decoded) != 0:
+                continue
+            if check == "psnr" and psnr(image, decoded) < options["min_psnr"]:
+                continue # Too few colours for this face
+            best = (method, new_path, data, ms)
+            break
+        if best is None:
+            return result
+
+        method, new_path, data, ms = best
+        result.update(method=method, new_path=new_path, after=len(data), decode_after=ms)
+        if not options["dry_run"]:
+            tmp = new_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, new_path)
+        return result
+    except Exception as e:
+        return dict(result, error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress sprites and backgrounds, update the maps, and report sizes and decode times.")
+    parser.add_argument("kinds", nargs="*", help=f"Image kinds to optimize: {', '.join(IMAGE_KINDS)} (default: both)")
+    parser.add_argument("--quantize-faces", action="store_true", help="Palette-quantize expression faces (lossy, guarded by --min-psnr)")
+    parser.add_argument("--colors", type=int, default=256, help="Palette size for quantized faces (<= 256)")
+    parser.add_argument("--min-psnr", type=float, default=40.0, help="Reject quantized faces below this PSNR (dB)")
+    parser.add_argument("--bg-quality", type=int, help="Re-encode backgrounds at this quality (0-100); default: lossless only")
+    parser.add_argument("--bg-format", choices=("jpg", "webp"), default="jpg")
+    parser.add_argument("--webp", action="store_true", help="Also try WebP (lossless for sprites, --bg-quality for backgrounds); files that switch get a .webp path in the maps")
+    parser.add_argument("--min-saving", type=float, default=0.02, help="Keep the original unless the result is at least this fraction smaller")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, write nothing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+    unknown = [kind for kind in args.kinds if kind not in IMAGE_KINDS]
+    if unknown:
+        parser.error(f"unknown image kind: {', '.join(unknown)}")
+    if not 2 <= args.colors <= 256:
+        parser.error("--colors must be between 2 and 256")
+    kinds = args.kinds or list(IMAGE_KINDS)
+    options = {"quantize_faces": args.quantize_faces, "colors": args.colors, "min_psnr": args.min_psnr,
+               "bg_quality": args.bg_quality, "bg_format": args.bg_format, "webp": args.webp,
+               "min_saving": args.min_saving, "dry_run": args.dry_run, "pinned": source_references()}
+
+    start = time.perf_counter()
+    manifest = index_assets.run(kinds, workers=args.workers, quiet=True)["files"]
+    roots = tuple(index_assets.KINDS[kind][0] + "/" for kind in kinds)
+    paths = sorted(p for p in manifest if p.startswith(roots) and p.lower().endswith(index_assets.IMAGE_EXTENSIONS))
+    pinned = sorted(set(paths) & options["pinned"])
+    if pinned:
+        print(f"{len(pinned)} files are referenced in the code and keep their format: {', '.join(pinned)}")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(optimize, [(p, options) for p in paths], chunksize=4):
+            if "error" in result:
+                print(f"{result['path']}: {result['error']}")
+            if "before" in result:
+                results.append(result)
+
+    # Per family: files, changed, bytes and total decode ms before / after
+    print(f"{'family':<14}{'files':>7}{'changed':>9}{'before MiB':>12}{'after MiB':>11}{'decode ms':>11}{'after':>9}")
+    for family in FAMILIES:
+        rows = [r for r in results if r["family"] == family]
+        if not rows:
+            continue
+        changed = sum(1 for r in rows if r["method"] != "kept")
+        before = sum(r["before"] for r in rows) / 1024 / 1024
+        after = sum(r["after"] for r in rows) / 1024 / 1024
+        print(f"{family:<14}{len(rows):>7}{changed:>9}{before:>12.1f}{after:>11.1f}"
+              f"{sum(r['decode_before'] for r in rows):>11.0f}{sum(r['decode_after'] for r in rows):>9.0f}")
+    methods = {}
+    for r in results:
+        if r["method"] != "kept":
+            methods[r["method"]] = methods.get(r["method"], 0) + 1
+    if methods:
+        print("Methods: " + ", ".join(f"{m} x{n}" for m, n in sorted(methods.items(), key=lambda item: -item[1])))
+
+    if args.dry_run:
+        print(f"Dry run in {time.perf_counter() - start:.1f} s, nothing written.")
+        return
+    # Maps follow files whose extension changed; the indexer then re-hashes what was rewritten
+    renames = {r["path"]: r["new_path"] for r in results if r["new_path"] != r["path"]}
+    if renames:
+        print(f"{index_assets.rename_in_maps(renames)} map entries moved to new file names")
+        for old in renames:
+            os.remove(old)
+    index_assets.run(kinds, workers=args.workers, quiet=True)
+    print(f"Done in {time.perf_counter() - start:.1f} s. Rebuild derived caches: pack_face_atlas.py, "
+          f"build_sprite_mips.py, build_bg_cache.py, pack_assets.py.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import time
+import argparse
+
+import index_assets
+from src.frontend.asset_archive import ARCHIVE_EXTENSION, archive_key, read_index, write_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack character, background, sound and music files into memory-mappable archives.")
+    parser.add_argument("kinds", nargs="*", help=f"Asset kinds to pack: {', '.join(index_assets.KINDS)} (default: all)")
+    parser.add_argument("--out-dir", default="assets", help="Archives are written as <out-dir>/<folder>.pak")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Rewrite archives that are up to date")
+    args = parser.parse_args()
+    unknown = [kind for kind in args.kinds if kind not in index_assets.KINDS]
+    if unknown:
+        parser.error(f"unknown asset kind: {', '.join(unknown)}")
+    kinds = args.kinds or list(index_assets.KINDS)
+
+    start = time.perf_counter()
+    # The indexer brings the maps and the manifest up to date; its hashes go into the archive index
+    manifest = index_assets.run(kinds, workers=args.workers, quiet=True)["files"]
+
+    for kind in kinds:
+        root = index_assets.KINDS[kind][0]
+        files = sorted(p for p in manifest if p.startswith(root + "/"))
+        out = os.path.join(args.out_dir, os.path.basename(root) + ARCHIVE_EXTENSION)
+        if not files:
+            print(f"{kind}: no files in {root}")
+            continue
+        # Hash, size and mtime: a touched file would otherwise stay shadowed by its old stamp
+        wanted = {archive_key(p): [manifest[p]["sha1"], manifest[p]["size"], manifest[p]["mtime_ns"]] for p in files}
+        if not args.force and os.path.exists(out):
+            try:
+                current = {name: entry[2:5] for name, entry in read_index(out).items()}
+            except (OSError, ValueError):
+                current = None
+            if current == wanted:
+                print(f"{kind}: {out} is up to date ({len(files)} files)")
+                continue
+        index = write_archive(out, files, {p: manifest[p]["sha1"] for p in files})
+        size_mb = os.path.getsize(out) / (1024 * 1024)
+        print(f"{kind}: {len(index)} files -> {out} ({size_mb:.1f} MB)")
+    print(f"Packed in {time.perf_counter() - start:.1f} s. Loose files edited after packing are loaded "
+          f"instead of their packed copies until this is re-run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QGuiApplication, QImage, QPainter
+
+from src.frontend.face_atlas import DEFAULT_ATLAS_DIR, ATLAS_VERSION
+from src.frontend.image_ops import alpha_bbox, shelf_pack
+
+
+def source_stamp(paths):
+    """Size + mtime of every source, to skip characters whose faces did not change."""
+    stamp = {}
+    for path in paths:
+        st = os.stat(path)
+        stamp[path] = [st.st_size, st.st_mtime_ns]
+    return stamp
+
+
+def pack_character(name: str, expressions: dict, out_dir: str, page_size: int, padding: int, force: bool):
+    faces = sorted({path for path in expressions.values() if os.path.exists(path)})
+    if not faces:
+        return name, 0, 0, "no faces"
+
+    index_path = os.path.join(out_dir, f"{name}.json")
+    stamp = source_stamp(faces)
+    if not force and os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                old = json.load(f)
+            if old.get("version") == ATLAS_VERSION and old.get("sources") == stamp and old.get("page_size") == page_size:
+                return name, len(faces), len(old["pages"]), "up to date"
+        except Exception:
+            pass
+
+    # Trim every face to its alpha bounding box
+    images, boxes = {}, {}
+    for path in faces:
+        image = QImage(path)
+        box = alpha_bbox(image)
+        if box is None:
+            box = (0, 0, 1, 1) # Fully transparent face: keep a 1px placeholder
+        images[path] = image
+        boxes[path] = box
+
+    placements = shelf_pack([(boxes[p][2], boxes[p][3]) for p in faces], page_size, padding)
+    page_count = max(p[0] for p in placements) + 1
+
+    pages = []
+    for page in range(page_count):
+        # Shrink the last page to what is used
+        used = [(x + boxes[faces[i]][2], y + boxes[faces[i]][3])
+                for i, (pg, x, y) in enumerate(placements) if pg == page]
+        width = max(u[0] for u in used)
+        height = max(u[1] for u in used)
+        canvas = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        canvas.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(canvas)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        for i, (pg, x, y) in enumerate(placements):
+            if pg == page:
+                bx, by, bw, bh = boxes[faces[i]]
+                painter.drawImage(x, y, images[faces[i]], bx, by, bw, bh)
+        painter.end()
+        page_name = f"{name}_{page}.png"
+        canvas.save(os.path.join(out_dir, page_name))
+        pages.append(page_name)
+
+    index = {
+        "version": ATLAS_VERSION,
+        "character": name,
+        "page_size": page_size,
+        "pages": pages,
+        "faces": {
+            path: {"page": pg, "rect": [x, y, boxes[path][2], boxes[path][3]], "offset": [boxes[path][0], boxes[path][1]]}
+            for path, (pg, x, y) in zip(faces, placements)
+        },
+        "sources": stamp,
+    }
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+    # Remove pages of a previous, larger build
+    for stale in os.listdir(out_dir):
+        if re.fullmatch(rf"{re.escape(name)}_\d+\.png", stale) and stale not in pages:
+            os.remove(os.path.join(out_dir, stale))
+    return name, len(faces), page_count, "packed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack expression faces into per-character atlas pages with a JSON rect index.")
+    parser.add_argument("--map", default="assets/character_map.json")
+    parser.add_argument("--out", default=DEFAULT_ATLAS_DIR)
+    parser.add_argument("--page-size", type=int, default=2048)
+    parser.add_argument("--padding", type=int, default=1)
+    parser.add_argument("--characters", nargs="*", help="Only these characters (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--force", action="store_true", help="Repack even if the sources did not change")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv) # Image format plugins
+
+    with open(args.map, "r", encoding="utf-8") as f:
+        char_map = json.load(f)
+    os.makedirs(args.out, exist_ok=True)
+
+    names = args.characters or list(char_map.keys())
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(
+            lambda n: pack_character(n, char_map[n].get("expressions", {}), args.out, args.page_size, args.padding, args.force),
+            names))
+
+    total_faces = 0
+    for name, faces, pages, status in results:
+        total_faces += faces
+        print(f"{name:<12}{faces:>5} faces {pages:>3} page(s)  {status}")
+
+    src_bytes = sum(os.path.getsize(p) for n in names for p in set(char_map[n].get("expressions", {}).values()) if os.path.exists(p))
+    atlas_bytes = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out))
+    print(f"{total_faces} faces: {src_bytes / 1024 / 1024:.1f} MiB in files -> {atlas_bytes / 1024 / 1024:.1f} MiB atlas "
+          f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import argparse
+
+# Headless by default: no display needed
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+from src.frontend.engine_recorder import load_recording, diff_recordings, summarize_commands, find_stalls
+from src.frontend.engine_replay import EngineReplayer
+
+
+def print_report(title, events, stall_ms):
+    print(f"\n== {title} ==")
+    summary = summarize_commands(events)
+    if summary:
+        print(f"{'command':<14}{'calls':>7}{'avg ms':>10}{'max ms':>10}{'total ms':>11}")
+        for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]):
+            print(f"{name:<14}{s['calls']:>7}{s['avg_ms']:>10.3f}{s['max_ms']:>10.3f}{s['total_ms']:>11.3f}")
+    else:
+        print("No asset commands recorded.")
+
+    stalls = find_stalls(events, stall_ms)
+    print(f"Typewriter stalls > {stall_ms:.0f} ms: {len(stalls)}")
+    for stall in stalls[:10]:
+        print(f"  at {stall['t_ms']:.0f} ms: {stall['gap_ms']} ms gap")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a GameEngine recording without a display or an LLM.")
+    parser.add_argument("recording", help="JSONL file written by EngineRecorder")
+    parser.add_argument("--out", default="recordings/replay.jsonl", help="Where to write the replay recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale (2 = twice as fast)")
+    parser.add_argument("--visual", choices=["stub", "real"], default="stub",
+                        help="'real' renders into an offscreen QGraphicsScene to measure actual command cost")
+    parser.add_argument("--diff", metavar="OTHER", help="Diff the outputs of the recording against another recording instead of replaying")
+    parser.add_argument("--stall-ms", type=float, default=100.0, help="Gap between typewriter updates reported as a stall")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    original = load_recording(args.recording)
+
+    if args.diff:
+        other = load_recording(args.diff)
+        diffs = diff_recordings(original, other)
+        print_report(args.recording, original, args.stall_ms)
+        print_report(args.diff, other, args.stall_ms)
+        print(f"\n{len(diffs)} output difference(s)" if diffs else "\nOutputs identical.")
+        for line in diffs:
+            print("  " + line)
+        return 1 if diffs else 0
+
+    app = QApplication(sys.argv)
+
+    visual = None
+    if args.visual == "real":
+        from src.frontend.visual_manager import VisualManager
+        scene = QGraphicsScene(0, 0, 1920, 1080)
+        visual = VisualManager(scene)
+
+    replayer = EngineReplayer(original, visual=visual, out_path=args.out, speed=args.speed)
+    out_path = replayer.run(timeout_s=args.timeout)
+    replayed = load_recording(out_path)
+
+    print_report(f"original: {args.recording}", original, args.stall_ms)
+    print_report(f"replay: {out_path}", replayed, args.stall_ms)
+
+    # Outputs of turns recorded without their player input cannot be replayed
+    diffs = diff_recordings(replayer.expected, replayed)
+    print(f"\n{len(diffs)} output difference(s)" if diffs else "\nReplay matches the original outputs.")
+    for line in diffs:
+        print("  " + line)
+    return 1 if diffs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
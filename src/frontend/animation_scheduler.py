@@ -0,0 +1,196 @@
+import time
+from PySide6.QtCore import QObject, QTimer, QEasingCurve, Qt
+
+
+class Tween:
+    """One animated property: value(t) from keyframes [(0, start), ..., (1, end)] with easing."""
+
+    __slots__ = ("key", "setter", "keyframes", "duration_ms", "easing", "group", "on_finished", "elapsed_ms")
+
+    def __init__(self, key, setter, keyframes, duration_ms, easing, group, on_finished):
+        self.key = key
+        self.setter = setter
+        self.keyframes = keyframes
+        self.duration_ms = max(0, duration_ms)
+        self.easing = QEasingCurve(easing)
+        self.group = group
+        self.on_finished = on_finished
+        self.elapsed_ms = 0.0
+
+    def value_at(self, progress: float):
+        t = self.easing.valueForProgress(min(max(progress, 0.0), 1.0))
+        frames = self.keyframes
+        for i in range(1, len(frames)):
+            t1, v1 = frames[i]
+            if t <= t1 or i == len(frames) - 1:
+                t0, v0 = frames[i - 1]
+                local = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+                return v0 + (v1 - v0) * local
+        return frames[-1][1]
+
+    def end_value(self):
+        return self.keyframes[-1][1]
+
+
+class AnimationScheduler(QObject):
+    """
+    Owns every tween of the visual and audio managers.
+
+    - One frame timer drives all tweens; it only runs while tweens exist.
+    - Starting a tween on a (target, property) that is already animating
+      cancels the old one (cancel-and-replace), so rapid commands never stack
+      competing animations. Pass start=None to continue from the current value.
+    - Tweens can be tagged with a group and cancelled or finished together.
+    - Frame budget: if applying tweens takes longer than budget_ms, the rest
+      are applied next frame (they are time-based, so they catch up).
+    - reduce_motion: tweens jump straight to their end value.
+    """
+
+    FRAME_MS = 16
+
+    def __init__(self, budget_ms: float = 4.0, reduce_motion: bool = False):
+        super().__init__()
+        self.budget_ms = budget_ms
+        self.reduce_motion = reduce_motion
+        self._tweens = {} # key -> Tween (insertion order = start order)
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(self.FRAME_MS)
+        self._timer.timeout.connect(self._tick)
+        self._last_tick = None
+        self._resume_index = 0
+
+        self.frames = 0
+        self.over_budget_frames = 0
+        self.max_tick_ms = 0.0
+        self.replaced = 0
+
+    @staticmethod
+    def _key(target, prop: str):
+        return (id(target), prop)
+
+    def animate(self, target, prop: str, end, duration_ms: int, setter, start=None, getter=None,
+                keyframes=None, easing=QEasingCurve.Type.Linear, group=None, on_finished=None) -> Tween:
+        """
+        Animates `prop` of `target` via `setter(value)`. Values may be floats or
+        anything supporting + and * float (QPointF). `keyframes` is an optional
+        list of (progress, value) between start and end, e.g. for a shake.
+        """
+        key = self._key(target, prop)
+        if key in self._tweens:
+            self.replaced += 1
+            del self._tweens[key] # Replaced without jumping to its end value
+        if start is None:
+            start = getter() if getter else end
+        frames = [(0.0, start)] + list(keyframes or []) + [(1.0, end)]
+
+        tween = Tween(key, setter, frames, duration_ms, easing, group, on_finished)
+        if self.reduce_motion or tween.duration_ms == 0:
+            self._finish(tween)
+            return tween
+
+        setter(start)
+        self._tweens[key] = tween
+        if not self._timer.isActive():
+            self._last_tick = time.perf_counter()
+            self._timer.start()
+        return tween
+
+    def is_animating(self, target, prop: str) -> bool:
+        return self._key(target, prop) in self._tweens
+
+    def cancel(self, target, prop: str, finish: bool = False):
+        """Stops the tween of target.prop; finish=True applies its end value first."""
+        tween = self._tweens.pop(self._key(target, prop), None)
+        if tween and finish:
+            self._finish(tween)
+
+    def cancel_target(self, target, finish: bool = False):
+        for key in [k for k in self._tweens if k[0] == id(target)]:
+            tween = self._tweens.pop(key)
+            if finish:
+                self._finish(tween)
+
+    def cancel_group(self, group, finish: bool = False):
+        for key in [k for k, t in self._tweens.items() if t.group == group]:
+            tween = self._tweens.pop(key)
+            if finish:
+                self._finish(tween)
+
+    def finish_all(self):
+        """Jumps every running tween to its end (e.g. when the player skips)."""
+        for tween in list(self._tweens.values()):
+            self._tweens.pop(tween.key, None)
+            self._finish(tween)
+
+    def set_reduce_motion(self, enabled: bool):
+        self.reduce_motion = enabled
+        if enabled:
+            self.finish_all()
+
+    def active_count(self) -> int:
+        return len(self._tweens)
+
+    def _finish(self, tween: Tween):
+        try:
+            tween.setter(tween.end_value())
+        except RuntimeError:
+            pass # Target was deleted on the C++ side
+        if tween.on_finished:
+            tween.on_finished()
+
+    def _tick(self):
+        now = time.perf_counter()
+        delta_ms = (now - self._last_tick) * 1000
+        self._last_tick = now
+
+        tweens = list(self._tweens.values())
+        if not tweens:
+            self._timer.stop()
+            return
+        for tween in tweens:
+            tween.elapsed_ms += delta_ms
+
+        # Resume where the last over-budget frame stopped, so no tween starves
+        start = self._resume_index % len(tweens)
+        ordered = tweens[start:] + tweens[:start]
+        finished = []
+        processed = 0
+        for tween in ordered:
+            if self._tweens.get(tween.key) is not tween:
+                continue # Replaced or cancelled by a callback this frame
+            progress = tween.elapsed_ms / tween.duration_ms
+            try:
+                tween.setter(tween.value_at(progress))
+            except RuntimeError:
+                self._tweens.pop(tween.key, None) # Target was deleted
+                continue
+            processed += 1
+            if progress >= 1.0:
+                finished.append(tween)
+            if (time.perf_counter() - now) * 1000 > self.budget_ms and processed < len(ordered):
+                self.over_budget_frames += 1
+                self._resume_index = start + processed
+                break
+        else:
+            self._resume_index = 0
+
+        for tween in finished:
+            if self._tweens.get(tween.key) is tween:
+                del self._tweens[tween.key]
+                if tween.on_finished:
+                    tween.on_finished()
+
+        self.frames += 1
+        self.max_tick_ms = max(self.max_tick_ms, (time.perf_counter() - now) * 1000)
+        if not self._tweens:
+            self._timer.stop()
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._tweens),
+            "frames": self.frames,
+            "over_budget_frames": self.over_budget_frames,
+            "max_tick_ms": self.max_tick_ms,
+            "replaced": self.replaced,
+        }
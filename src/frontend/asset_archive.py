@@ -0,0 +1,200 @@
+import os
+import json
+import mmap
+import glob
+import struct
+import hashlib
+import threading
+from typing import Optional
+
+ARCHIVE_EXTENSION = ".pak"
+ARCHIVE_VERSION = 1
+
+# magic, version, index offset, index length; the index (UTF-8 JSON) follows the data
+_MAGIC = b"VNPK"
+_HEADER = struct.Struct("<4sIQQ")
+
+
+def archive_key(path: str) -> str:
+    """Name of an asset inside archives: relative to the working directory, '/' separated (as in the maps)."""
+    path = os.path.normpath(path)
+    if os.path.isabs(path):
+        rel = os.path.relpath(path)
+        if not rel.startswith(".."):
+            path = rel
+    return path.replace("\\", "/")
+
+
+def write_archive(path: str, files, hashes: dict = None) -> dict:
+    """
+    Packs `files` (paths, stored under archive_key(path)) into one archive
+    and returns its index. Files are stored as-is: images and OGG are
+    already compressed. `hashes` (path -> SHA-1, e.g. from the asset
+    manifest) avoids hashing files again. Each entry also records the
+    file's size and mtime so edited loose files can win at mount time.
+    Written next to `path` and renamed.
+    """
+    hashes = hashes or {}
+    index = {}
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as out:
+        out.write(_HEADER.pack(_MAGIC, ARCHIVE_VERSION, 0, 0))
+        for file_path in files:
+            with open(file_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+            offset = out.tell()
+            out.write(data)
+            sha1 = hashes.get(file_path) or hashlib.sha1(data).hexdigest()
+            index[archive_key(file_path)] = [offset, len(data), sha1, st.st_size, st.st_mtime_ns]
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        index_offset = out.tell()
+        out.write(index_bytes)
+        out.seek(0)
+        out.write(_HEADER.pack(_MAGIC, ARCHIVE_VERSION, index_offset, len(index_bytes)))
+    os.replace(tmp, path)
+    return index
+
+
+def is_shadowed(key: str, entry) -> bool:
+    """The loose file at `key` changed since it was packed (archives without stamps only compare sizes)."""
+    try:
+        st = os.stat(key)
+    except OSError:
+        return False # Shipped without loose files
+    if len(entry) < 5:
+        return st.st_size != entry[1]
+    return [st.st_size, st.st_mtime_ns] != list(entry[3:5])
+
+
+def read_index(path: str) -> dict:
+    """Index of an archive without mapping its data: name -> [offset, length, sha1, size, mtime_ns]."""
+    with open(path, "rb") as f:
+        magic, version, index_offset, index_length = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{path} is not a version {ARCHIVE_VERSION} asset archive")
+        f.seek(index_offset)
+        return json.loads(f.read(index_length).decode("utf-8"))
+
+
+class AssetArchive:
+    """
+    One packed archive, memory-mapped read-only. read() returns a
+    memoryview slice of the mapping: no file open, seek or copy per asset,
+    and pages are only read from disk when touched. Thread-safe for reads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index = read_index(path)
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def read(self, key: str) -> Optional[memoryview]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        return self._view[entry[0]:entry[0] + entry[1]]
+
+    def sha1(self, key: str) -> Optional[str]:
+        entry = self.index.get(key)
+        return entry[2] if entry else None
+
+    def verify(self, key: str) -> bool:
+        data = self.read(key)
+        return data is not None and hashlib.sha1(data).hexdigest() == self.sha1(key)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+class AssetArchives:
+    """
+    The mounted archives, looked up before the file system. Paths are the
+    ones the maps use ("assets/fg/..."), so callers resolve assets the same
+    way whether they are packed or loose. Later mounts take precedence.
+    Entries whose loose file was edited after packing are dropped at mount
+    time, so the loose file is loaded until the archive is rebuilt.
+
+    Also serves as an AudioStreamer byte source (contains / read by key).
+    """
+
+    def __init__(self, paths=()):
+        self.archives = []
+        for path in paths:
+            self.mount(path)
+
+    @classmethod
+    def discover(cls, folder: str = "assets") -> "AssetArchives":
+        return cls(sorted(glob.glob(os.path.join(folder, "*" + ARCHIVE_EXTENSION))))
+
+    def mount(self, path: str) -> bool:
+        try:
+            archive = AssetArchive(path)
+        except (OSError, ValueError) as e:
+            print(f"[AssetArchives] Cannot mount {path}: {e}")
+            return False
+        shadowed = [key for key, entry in archive.index.items() if is_shadowed(key, entry)]
+        for key in shadowed:
+            del archive.index[key]
+        if shadowed:
+            print(f"[AssetArchives] {len(shadowed)} files in {path} changed since packing; "
+                  f"loading the loose files instead (re-run pack_assets.py)")
+        self.archives.insert(0, archive)
+        return True
+
+    def unmount_all(self):
+        for archive in self.archives:
+            archive.close()
+        self.archives.clear()
+
+    def _find(self, key: str):
+        for archive in self.archives:
+            if key in archive:
+                return archive
+        return None
+
+    def contains(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def read(self, key: str) -> Optional[memoryview]:
+        archive = self._find(key)
+        return archive.read(key) if archive else None
+
+    def sha1(self, path: str) -> Optional[str]:
+        key = archive_key(path)
+        archive = self._find(key)
+        return archive.sha1(key) if archive else None
+
+    def data(self, path: str) -> Optional[memoryview]:
+        """Bytes of a packed asset by file path, or None if it is not packed."""
+        return self.read(archive_key(path)) if self.archives else None
+
+    def exists(self, path: str) -> bool:
+        """Packed or on disk."""
+        return bool(path) and ((self.archives and self.contains(archive_key(path))) or os.path.exists(path))
+
+    def __len__(self) -> int:
+        return sum(len(archive) for archive in self.archives)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_archives() -> AssetArchives:
+    """The archives in assets/, mounted on first use and shared by the visual, audio and engine sides."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AssetArchives.discover()
+        return _default
@@ -1,31 +1,30 @@
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PySide6.QtCore import QUrl, QPropertyAnimation, QObject, Property, QEasingCurve
+from PySide6.QtCore import QObject
 import os
 
+from .animation_scheduler import AnimationScheduler
+from .audio_source import AudioStreamer, FileByteSource
+from .asset_archive import AssetArchives, default_archives
+from .bgm_engine import BgmEngine
+from .sfx_pool import SfxPool
+
 class AudioManager(QObject):
-    def __init__(self):
+    def __init__(self, animator: AnimationScheduler = None, sfx_polyphony: int = 4, streamer: AudioStreamer = None,
+                 archives: AssetArchives = None):
         super().__init__()
+        # Shared with VisualManager; owns the BGM crossfades
+        self.animator = animator or AnimationScheduler()
+        # Resolves every audio path: from memory (byte cache / packed archive) or a local file
+        self.archives = archives if archives is not None else default_archives()
+        self.streamer = streamer or AudioStreamer(sources=[self.archives, FileByteSource()])
         
-        # 1. BGM Channel (Dual for Cross-fade)
-        self.player_bgm_a = QMediaPlayer()
-        self.output_bgm_a = QAudioOutput()
-        self.player_bgm_a.setAudioOutput(self.output_bgm_a)
-        self.player_bgm_a.errorOccurred.connect(lambda e, s: print(f"[Audio BGM A Error] {e}: {s}"))
-        
-        self.player_bgm_b = QMediaPlayer()
-        self.output_bgm_b = QAudioOutput()
-        self.player_bgm_b.setAudioOutput(self.output_bgm_b)
-        self.player_bgm_b.errorOccurred.connect(lambda e, s: print(f"[Audio BGM B Error] {e}: {s}"))
-        
-        self.bgm_active = "A" # A or B
-        self._bgm_master_volume = 1.0 # 0.0 to 1.0
-
-        # 2. SFX Channel
-        self.player_sfx = QMediaPlayer()
-        self.output_sfx = QAudioOutput()
-        self.player_sfx.setAudioOutput(self.output_sfx)
-        self.player_sfx.errorOccurred.connect(lambda e, s: print(f"[Audio SFX Error] {e}: {s}"))
+        # 1. BGM Channel (two decks, crossfaded)
+        self.bgm = BgmEngine(self.animator, self.streamer)
+
+        # 2. SFX Channel (one-shots overlap on a voice pool)
+        self.sfx_pool = SfxPool(sfx_polyphony, streamer=self.streamer)
         self._sfx_volume = 1.0
+        self._loop_gain = 1.0
 
         # 2.1 SFX Loop Channel (Ambience)
         self.player_sfx_loop = QMediaPlayer()
@@ -41,16 +40,18 @@ class AudioManager(QObject):
         self._voice_volume = 1.0
 
     # --- Volume Properties for UI ---
+    @staticmethod
+    def db_to_gain(gain_db: float) -> float:
+        return 10 ** (gain_db / 20) if gain_db else 1.0
+
     def set_bgm_volume(self, val: float):
-        """Sets master volume for BGM (0.0 - 1.0). affects both players."""
-        self._bgm_master_volume = val
-        self.output_bgm_a.setVolume(val) 
-        self.output_bgm_b.setVolume(val)
+        """Sets master volume for BGM (0.0 - 1.0). affects both decks."""
+        self.bgm.set_volume(val)
 
     def set_sfx_volume(self, val: float):
         self._sfx_volume = val
-        self.output_sfx.setVolume(val)
-        self.output_sfx_loop.setVolume(val)
+        self.sfx_pool.set_volume(val)
+        self.output_sfx_loop.setVolume(min(1.0, val * self._loop_gain))
 
     def set_voice_volume(self, val: float):
         self._voice_volume = val
@@ -58,96 +59,52 @@ class AudioManager(QObject):
 
     # --- Playback Methods ---
 
-    # Properties for Animation (Cross-fade internal logic)
-    # We rename to explicit internal volumes to avoid confusion with master volume
-    def get_fade_vol_a(self): return self.output_bgm_a.volume()
-    def set_fade_vol_a(self, v): self.output_bgm_a.setVolume(v * self._bgm_master_volume)
-    
-    def get_fade_vol_b(self): return self.output_bgm_b.volume()
-    def set_fade_vol_b(self, v): self.output_bgm_b.setVolume(v * self._bgm_master_volume)
-        
-    # Expose for PropertyAnimation
-    fade_a = Property(float, get_fade_vol_a, set_fade_vol_a)
-    fade_b = Property(float, get_fade_vol_b, set_fade_vol_b)
+    def play_bgm(self, file_path: str, fade_duration: int = 2000, gain_db: float = 0.0,
+                 loop_start_ms: int = None, loop_end_ms: int = None):
+        """
+        Crossfades to a track. gain_db: its loudness correction from analyze_loudness.py;
+        loop_start_ms / loop_end_ms: optional loop points (see BgmEngine).
+        """
+        self.bgm.play(file_path, fade_duration, self.db_to_gain(gain_db), loop_start_ms, loop_end_ms)
 
-    def play_bgm(self, file_path: str, fade_duration: int = 2000):
+    def play_sfx(self, file_path: str, loop: bool = False, gain_db: float = 0.0):
         abs_path = os.path.abspath(file_path)
-        url = QUrl.fromLocalFile(abs_path)
-        
-        if self.bgm_active == "A":
-            # Switch to B
-            target_player = self.player_bgm_b
-            target_prop = b"fade_b"
-            fade_out_prop = b"fade_a"
-            self.bgm_active = "B"
-        else:
-            # Switch to A
-            target_player = self.player_bgm_a
-            target_prop = b"fade_a"
-            fade_out_prop = b"fade_b"
-            self.bgm_active = "A"
-            
-        target_player.stop() # Ensure stopped before changing source
-        target_player.setSource(url)
-        target_player.setLoops(QMediaPlayer.Loops.Infinite) # BGM always loops
-        
-        # Start silent (relative to master)
-        if self.bgm_active == "A": self.set_fade_vol_a(0)
-        else: self.set_fade_vol_b(0)
-        target_player.play()
-        
-        # Animate
-        self.anim_in = QPropertyAnimation(self, target_prop)
-        self.anim_in.setDuration(fade_duration)
-        self.anim_in.setStartValue(0.0)
-        self.anim_in.setEndValue(1.0) # This 1.0 is multiplier for master volume
-        
-        self.anim_out = QPropertyAnimation(self, fade_out_prop)
-        self.anim_out.setDuration(fade_duration)
-        self.anim_out.setStartValue(1.0)
-        self.anim_out.setEndValue(0.0)
-        
-        self.anim_in.start()
-        self.anim_out.start()
-
-    def play_sfx(self, file_path: str, loop: bool = False):
-        abs_path = os.path.abspath(file_path)
-        url = QUrl.fromLocalFile(abs_path)
         
         # Check existence explicitly for debug
-        if not os.path.exists(abs_path):
+        if not self.streamer.exists(abs_path):
             print(f"[Audio] Error: SFX file not found at {abs_path}")
             return
 
         if loop:
             self.player_sfx_loop.stop() # Stop before reloading
-            self.player_sfx_loop.setSource(url)
-            self.output_sfx_loop.setVolume(self._sfx_volume)
+            self.streamer.attach(self.player_sfx_loop, abs_path)
+            self._loop_gain = self.db_to_gain(gain_db)
+            self.output_sfx_loop.setVolume(min(1.0, self._sfx_volume * self._loop_gain))
             self.player_sfx_loop.setLoops(QMediaPlayer.Loops.Infinite)
             self.player_sfx_loop.play()
         else:
-            self.player_sfx.stop() # Stop before reloading
-            self.player_sfx.setSource(url)
-            self.output_sfx.setVolume(self._sfx_volume)
-            self.player_sfx.setLoops(1)
-            self.player_sfx.play()
+            self.sfx_pool.play(abs_path, self.db_to_gain(gain_db))
+
+    def preload_sfx(self, file_path: str):
+        """Hint that a one-shot effect is about to play (opens / decodes it ahead of time)."""
+        self.sfx_pool.preload(file_path)
 
     def stop_looping_sfx(self):
         self.player_sfx_loop.stop()
         
     def stop_sfx(self):
         """Stops all SFX playback (one-shot and loop)."""
-        self.player_sfx.stop()
+        self.sfx_pool.stop_all()
         self.player_sfx_loop.stop()
 
     def play_voice(self, file_path: str):
-        abs_path = os.path.abspath(file_path)
         self.player_voice.stop() # Stop before reloading
-        self.player_voice.setSource(QUrl.fromLocalFile(abs_path))
+        if not self.streamer.attach(self.player_voice, file_path):
+            print(f"[Audio] Error: voice file not found at {os.path.abspath(file_path)}")
+            return
         self.output_voice.setVolume(self._voice_volume)
         self.player_voice.play()
 
     def stop_bgm(self):
         """Stops all BGM playback immediately."""
-        self.player_bgm_a.stop()
-        self.player_bgm_b.stop()
+        self.bgm.stop()
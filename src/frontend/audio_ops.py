@@ -0,0 +1,142 @@
+"""
+Audio helpers for the offline sound tools (build_sound_cache.py,
+analyze_loudness.py).
+Decoding uses the `soundfile` package (requirements.txt; libsndfile reads
+OGG Vorbis, FLAC and WAV); without it only container-level facts (length,
+rate, channels) are available, and the tools refuse to run unless asked for
+headers only. The runtime does not import this module.
+"""
+import struct
+import wave
+import numpy as np
+
+try:
+    import soundfile
+except ImportError: # Checked by the tools: full analysis and WAV copies need it
+    soundfile = None
+
+
+def ogg_info(path: str):
+    """
+    (duration_s, sample_rate, channels) of an Ogg Vorbis/Opus file read from
+    its headers and the granule position of the last page, without decoding.
+    Returns None if the file is not a recognised Ogg stream.
+    """
+    with open(path, "rb") as f:
+        head = f.read(4096)
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+    if not head.startswith(b"OggS"):
+        return None
+    packet = head[27 + head[26]:] # Skip the page header and its segment table
+    if packet.startswith(b"\x01vorbis"):
+        channels = packet[11]
+        rate = struct.unpack_from("<I", packet, 12)[0]
+        pre_skip = 0
+    elif packet.startswith(b"OpusHead"):
+        channels = packet[9]
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+        rate = 48000 # Opus granule positions always count 48 kHz samples
+    else:
+        return None
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail) or rate == 0:
+        return None
+    granule = struct.unpack_from("<q", tail, last + 6)[0]
+    return max(0, granule - pre_skip) / rate, rate, channels
+
+
+def decode(path: str):
+    """(samples float32 frames x channels, sample_rate). Requires soundfile."""
+    if soundfile is None:
+        raise RuntimeError("soundfile is not installed")
+    samples, rate = soundfile.read(path, dtype="float32", always_2d=True)
+    return samples, rate
+
+
+def to_db(value: float) -> float:
+    return float(20 * np.log10(value)) if value > 0 else -120.0
+
+
+def peak_rms_db(samples: np.ndarray):
+    """Sample peak and RMS (all channels) in dBFS."""
+    if samples.size == 0:
+        return -120.0, -120.0
+    peak = float(np.max(np.abs(samples)))
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    return to_db(peak), to_db(rms)
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int):
+    """16-bit PCM WAV (what QSoundEffect loads fastest)."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def _biquad_response(b, a, w: np.ndarray) -> np.ndarray:
+    z = np.exp(-1j * w)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+def k_weighting(rate: int, n: int) -> np.ndarray:
+    """
+    Magnitude of the ITU-R BS.1770 K-weighting filter (high shelf + RLB high
+    pass, coefficients derived for `rate` as in libebur128) at the bins of an
+    n-point rfft.
+    """
+    w = np.linspace(0, np.pi, n // 2 + 1)
+    # Stage 1: +4 dB high shelf around 1.7 kHz (head diffraction)
+    k = np.tan(np.pi * 1681.974450955533 / rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = _biquad_response(((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0),
+                             (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0), w)
+    # Stage 2: high pass at 38 Hz
+    k = np.tan(np.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    high_pass = _biquad_response((1.0, -2.0, 1.0), (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0), w)
+    return np.abs(shelf * high_pass)
+
+
+def integrated_loudness(samples: np.ndarray, rate: int):
+    """
+    Gated integrated loudness in LUFS (BS.1770-4: 400 ms blocks, 75 %
+    overlap, -70 LUFS absolute and -10 LU relative gates), or None for
+    silence. The K-weighting is applied to the spectrum in one FFT per
+    channel instead of sample by sample; block energies match the IIR
+    filter's to well under 0.1 dB. Sounds shorter than a block count as one block.
+    """
+    frames = len(samples)
+    if frames == 0:
+        return None
+    spectrum = np.fft.rfft(samples.astype(np.float64), axis=0)
+    spectrum *= k_weighting(rate, frames)[:, None]
+    filtered = np.fft.irfft(spectrum, n=frames, axis=0)
+    # Cumulative energy summed over channels (all weights 1.0 for mono/stereo)
+    energy = np.concatenate(([0.0], np.cumsum(np.sum(np.square(filtered), axis=1))))
+
+    block = int(round(0.4 * rate))
+    step = int(round(0.1 * rate))
+    if frames <= block:
+        z = np.array([energy[-1] / frames])
+    else:
+        starts = np.arange(0, frames - block + 1, step)
+        z = (energy[starts + block] - energy[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(z)
+    gated = z[levels > -70.0]
+    if gated.size == 0:
+        return None
+    relative = -0.691 + 10 * np.log10(np.mean(gated)) - 10.0
+    gated = z[(levels > -70.0) & (levels > relative)]
+    return float(-0.691 + 10 * np.log10(np.mean(gated)))
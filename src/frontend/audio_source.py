@@ -0,0 +1,136 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QUrl
+
+from .asset_archive import archive_key
+
+
+class FileByteSource:
+    """
+    Reads assets from the file system. Only files up to `max_bytes` are read
+    into memory; larger ones (BGM) are left to the player to stream from disk.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024 * 1024):
+        self.max_bytes = max_bytes
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(key)
+
+    def read(self, key: str):
+        try:
+            if os.path.getsize(key) > self.max_bytes:
+                return None
+            with open(key, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+class AudioStreamer:
+    """
+    Hands audio to QMediaPlayers from memory instead of file URLs.
+
+    Byte sources are tried in order; each has `contains(key)` and
+    `read(key) -> bytes-like or None` (None: not served from memory, play the
+    file on disk). The default is a FileByteSource; AudioManager puts the
+    mounted asset archives (AssetArchives) in front of it. Bytes read are kept in an LRU of
+    QByteArrays bounded by `budget_bytes`, so hot sounds stay resident and
+    replaying one costs no I/O. Each player gets its own QBuffer over the
+    shared (implicitly shared, not copied) QByteArray.
+
+    GUI thread only, like the players it feeds.
+    """
+
+    def __init__(self, budget_bytes: int = 32 * 1024 * 1024, sources=None):
+        self.budget_bytes = budget_bytes
+        self.sources = list(sources) if sources is not None else [FileByteSource()]
+        self._entries = OrderedDict() # key -> QByteArray (LRU)
+        self._devices = {} # id(player) -> QBuffer currently feeding it
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add_source(self, source, first: bool = True):
+        if first:
+            self.sources.insert(0, source)
+        else:
+            self.sources.append(source)
+        self.clear()
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def exists(self, path: str) -> bool:
+        key = archive_key(path)
+        return key in self._entries or any(source.contains(key) for source in self.sources)
+
+    def data(self, path: str) -> Optional[QByteArray]:
+        """The asset's bytes from the cache or the first source serving it from memory, else None."""
+        key = archive_key(path)
+        data = self._entries.get(key)
+        if data is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return data
+        self.misses += 1
+        for source in self.sources:
+            if not source.contains(key):
+                continue
+            raw = source.read(key)
+            if raw is None:
+                return None
+            data = QByteArray(bytes(raw))
+            if data.size() <= self.budget_bytes:
+                self._entries[key] = data
+                self.bytes += data.size()
+                self._evict()
+            return data
+        return None
+
+    def attach(self, player, path: str) -> bool:
+        """
+        Sets `path` as the source of `player`: from memory through a QBuffer
+        when a source serves it, else as a local file URL. False if no source
+        has the asset.
+        """
+        data = self.data(path)
+        if data is not None:
+            device = QBuffer()
+            device.setData(data)
+            device.open(QIODevice.OpenModeFlag.ReadOnly)
+            # The URL only tells the backend the format (from its extension)
+            player.setSourceDevice(device, QUrl(archive_key(path)))
+            # Replaced after the player switched over, so the old buffer outlives its use
+            self._devices[id(player)] = device
+            return True
+        abs_path = os.path.abspath(path)
+        if not os.path.isfile(abs_path):
+            return False
+        player.setSource(QUrl.fromLocalFile(abs_path))
+        self._devices.pop(id(player), None)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _evict(self):
+        while self.bytes > self.budget_bytes and self._entries:
+            _, data = self._entries.popitem(last=False)
+            self.bytes -= data.size()
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "mb": round(self.bytes / (1024 * 1024), 2),
+            "budget_mb": round(self.budget_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "devices": len(self._devices),
+        }
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect
+from PySide6.QtGui import QColor, QFont, QFontMetrics
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+
+# Custom item roles
+SpeakerRole = Qt.ItemDataRole.UserRole + 1
+LineRoleRole = Qt.ItemDataRole.UserRole + 2  # "story" or "user"
+
+
+class BacklogModel(QAbstractListModel):
+    """
+    List model over a TurnArchive.
+
+    Rows are fetched page-by-page on demand and only the most recently used
+    pages stay resident, so memory does not grow with session length.
+    """
+
+    def __init__(self, archive=None, max_cached_pages: int = 8, parent=None):
+        super().__init__(parent)
+        self.archive = archive
+        self.max_cached_pages = max_cached_pages
+        self._pages = OrderedDict()  # page index -> list of records (LRU)
+        self._row_count = len(archive) if archive is not None else 0
+
+    def set_archive(self, archive):
+        self.beginResetModel()
+        self.archive = archive
+        self._pages.clear()
+        self._row_count = len(archive) if archive is not None else 0
+        self.endResetModel()
+
+    def sync(self, *args):
+        """Picks up lines appended to the archive since the last call (slot-friendly)."""
+        if self.archive is None:
+            return
+        new_count = len(self.archive)
+        if new_count < self._row_count:
+            # Archive was cleared (new game)
+            self.set_archive(self.archive)
+            return
+        if new_count == self._row_count:
+            return
+        # The last page may have been cached while partially filled
+        self._pages.pop((self._row_count - 1) // self.archive.PAGE_SIZE, None)
+        self.beginInsertRows(QModelIndex(), self._row_count, new_count - 1)
+        self._row_count = new_count
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def _record(self, row: int):
+        page, offset = divmod(row, self.archive.PAGE_SIZE)
+        records = self._pages.get(page)
+        if records is None or offset >= len(records):
+            records = self.archive.read_page(page)
+            self._pages[page] = records
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return records[offset] if offset < len(records) else None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.archive is None:
+            return None
+        record = self._record(index.row())
+        if record is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return record.get("text", "")
+        if role == SpeakerRole:
+            return record.get("speaker", "")
+        if role == LineRoleRole:
+            return record.get("role", "story")
+        return None
+
+
+class BacklogDelegate(QStyledItemDelegate):
+    """
+    Paints speaker + text in a fixed-height row.
+
+    A fixed row height lets the view run with uniformItemSizes, so Qt never
+    asks for the size of rows that are off screen.
+    """
+
+    TEXT_LINES = 3
+    PADDING = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_color = QColor("#FFD700")
+        self.user_color = QColor("#7FC8FF")
+        self.text_color = QColor("white")
+
+    def _fonts(self, option):
+        name_font = QFont(option.font)
+        name_font.setBold(True)
+        return name_font, QFont(option.font)
+
+    def sizeHint(self, option, index):
+        name_font, text_font = self._fonts(option)
+        height = (QFontMetrics(name_font).height()
+                  + QFontMetrics(text_font).lineSpacing() * self.TEXT_LINES
+                  + self.PADDING * 2)
+        return QSize(option.rect.width(), height)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, QColor(255, 255, 255, 30))
+
+        name_font, text_font = self._fonts(option)
+        rect = option.rect.adjusted(self.PADDING * 3, self.PADDING, -self.PADDING * 3, -self.PADDING)
+        is_user = index.data(LineRoleRole) == "user"
+
+        name_height = QFontMetrics(name_font).height()
+        painter.setFont(name_font)
+        painter.setPen(self.user_color if is_user else self.name_color)
+        painter.drawText(QRect(rect.left(), rect.top(), rect.width(), name_height),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         index.data(SpeakerRole) or "")
+
+        text_rect = QRect(rect.left(), rect.top() + name_height, rect.width(), rect.height() - name_height)
+        painter.setFont(text_font)
+        painter.setPen(self.user_color if is_user else self.text_color)
+        painter.setClipRect(text_rect)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                         index.data(Qt.ItemDataRole.DisplayRole) or "")
+        painter.restore()
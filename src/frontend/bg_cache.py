@@ -0,0 +1,211 @@
+import os
+import json
+import struct
+import hashlib
+import threading
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+from .asset_archive import AssetArchives
+from .image_loader import load_image
+
+DEFAULT_CACHE_DIR = "assets/.cache/bg"
+INDEX_VERSION = 1
+
+# Standard heights the display size is snapped to, so resizing the window
+# does not create a cache entry per pixel
+DISPLAY_HEIGHTS = (720, 900, 1080, 1440, 2160)
+
+_RAW_MAGIC = b"BGC1"
+_RAW_HEADER = struct.Struct("<4sIII") # magic, width, height, bytes per line
+
+
+def snap_display_size(width: float, height: float, aspect=(16, 9)):
+    """Smallest standard 16:9 size that covers a device-pixel area of width x height."""
+    needed = max(height, width * aspect[1] / aspect[0])
+    for h in DISPLAY_HEIGHTS:
+        if h >= needed:
+            break
+    return (h * aspect[0] // aspect[1], h)
+
+
+def scale_background(image: QImage, size) -> QImage:
+    # Backgrounds always fill the scene (IgnoreAspectRatio, user requirement)
+    return image.scaled(size[0], size[1], Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+def write_raw(path: str, image: QImage):
+    image = image.convertToFormat(QImage.Format.Format_RGB888)
+    tmp = f"{path}.{threading.get_ident()}.tmp" # Workers may race on the same entry
+    with open(tmp, "wb") as f:
+        f.write(_RAW_HEADER.pack(_RAW_MAGIC, image.width(), image.height(), image.bytesPerLine()))
+        f.write(bytes(image.constBits()))
+    os.replace(tmp, path)
+
+
+def read_raw(path: str) -> QImage:
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, width, height, bpl = _RAW_HEADER.unpack_from(data)
+    if magic != _RAW_MAGIC or len(data) < _RAW_HEADER.size + bpl * height:
+        return QImage()
+    pixels = data[_RAW_HEADER.size:]
+    # copy() detaches the image from the Python buffer
+    return QImage(pixels, width, height, bpl, QImage.Format.Format_RGB888).copy()
+
+
+class BackgroundDiskCache:
+    """
+    On-disk cache of backgrounds pre-scaled to display sizes.
+
+    Entries are named <source sha1>_<w>x<h>.<ext>, so edited sources get new
+    entries and renamed ones keep theirs. index.json remembers each source's
+    size/mtime/hash so lookups do not re-hash unchanged files.
+
+    Formats: "raw" (uncompressed RGB888, fastest to load, ~6 MB at 1080p),
+    "png" or "jpg". load() runs in decode workers and fills missing entries;
+    build_bg_cache.py fills them ahead of time. Sources packed in `archives`
+    are decoded from the archive and keyed by the hash in its index.
+    """
+
+    EXTENSIONS = {"raw": ".rgb", "png": ".png", "jpg": ".jpg"}
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, fmt: str = "raw", jpeg_quality: int = 95,
+                 archives: AssetArchives = None):
+        if fmt not in self.EXTENSIONS:
+            raise ValueError(f"Unknown background cache format: {fmt}")
+        self.cache_dir = cache_dir
+        self.fmt = fmt
+        self.jpeg_quality = jpeg_quality
+        self.archives = archives
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._sources = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._sources = data.get("sources", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[BackgroundDiskCache] Failed to load index: {e}")
+
+    def save_index(self):
+        with self._lock:
+            data = {"version": INDEX_VERSION, "format": self.fmt, "sources": dict(self._sources)}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self.index_path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+        except Exception as e:
+            print(f"[BackgroundDiskCache] Failed to save index: {e}")
+
+    def _known_hash(self, path: str):
+        """Hash from the index if the source is unchanged (size + mtime), else None. Cheap."""
+        packed = self.archives.sha1(path) if self.archives else None
+        if packed:
+            return packed
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._sources.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            return entry["hash"]
+        return None
+
+    def source_hash(self, path: str) -> str:
+        """SHA-1 of the source file, cached in the index."""
+        known = self._known_hash(path)
+        if known:
+            return known
+        st = os.stat(path)
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._sources[path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "hash": value}
+        return value
+
+    def entry_path(self, source_hash: str, size) -> str:
+        return os.path.join(self.cache_dir, f"{source_hash}_{size[0]}x{size[1]}{self.EXTENSIONS[self.fmt]}")
+
+    def lookup(self, path: str, size):
+        """Cached entry for an unchanged source, or None. Safe to call on the GUI thread."""
+        known = self._known_hash(path)
+        if known is None:
+            return None
+        entry = self.entry_path(known, size)
+        return entry if os.path.exists(entry) else None
+
+    def _read(self, entry: str) -> QImage:
+        return read_raw(entry) if self.fmt == "raw" else QImage(entry)
+
+    def store(self, source_hash: str, size, image: QImage) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self.entry_path(source_hash, size)
+        if self.fmt == "raw":
+            write_raw(entry, image)
+        else:
+            tmp = f"{entry}.{threading.get_ident()}.tmp{self.EXTENSIONS[self.fmt]}"
+            quality = self.jpeg_quality if self.fmt == "jpg" else -1
+            if not image.save(tmp, None, quality):
+                raise IOError(f"Cannot write {entry}")
+            os.replace(tmp, entry)
+        return entry
+
+    def load(self, path: str, size) -> QImage:
+        """
+        Background `path` scaled to `size`: from the cache if present, else
+        decoded, scaled and written to the cache. Thread-safe (QImage only).
+        """
+        try:
+            source_hash = self.source_hash(path)
+        except OSError:
+            return QImage()
+        entry = self.entry_path(source_hash, size)
+        if os.path.exists(entry):
+            image = self._read(entry)
+            if not image.isNull():
+                self.hits += 1
+                return image
+
+        self.misses += 1
+        image = load_image(path, self.archives)
+        if image.isNull():
+            return image
+        image = scale_background(image, size)
+        try:
+            self.store(source_hash, size, image)
+            self.save_index()
+        except Exception as e:
+            print(f"[BackgroundDiskCache] Failed to cache {path}: {e}")
+        return image
+
+    def prune(self, keep_hashes):
+        """Deletes entries whose source hash is not in keep_hashes. Returns bytes freed."""
+        freed = 0
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        for name in os.listdir(self.cache_dir):
+            if name == "index.json":
+                continue
+            if name.split("_")[0] not in keep_hashes:
+                full = os.path.join(self.cache_dir, name)
+                freed += os.path.getsize(full)
+                os.remove(full)
+        with self._lock:
+            self._sources = {p: e for p, e in self._sources.items() if e["hash"] in keep_hashes}
+        self.save_index()
+        return freed
@@ -0,0 +1,297 @@
+import os
+from collections import deque
+from typing import NamedTuple, Optional
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+from PySide6.QtCore import QObject, QTimer, Qt
+
+from .animation_scheduler import AnimationScheduler
+from .audio_source import AudioStreamer
+
+
+class BgmTransition(NamedTuple):
+    path: str # Absolute file path
+    fade_ms: int
+    gain: float # Linear loudness gain
+    loop_start_ms: Optional[int]
+    loop_end_ms: Optional[int]
+
+
+class _Deck:
+    """One music player. `level` is its crossfade position (0-1), applied on top of gain and master volume."""
+
+    def __init__(self, name: str, streamer: AudioStreamer):
+        self.name = name
+        self.streamer = streamer
+        self.player = QMediaPlayer()
+        self.output = QAudioOutput()
+        self.player.setAudioOutput(self.output)
+        self.path = None
+        self.level = 0.0
+        self.gain = 1.0
+        self.loop_start_ms = None
+        self.loop_end_ms = None
+        # Fires at loop_end_ms, armed from the last position report before it
+        self.loop_timer = QTimer()
+        self.loop_timer.setSingleShot(True)
+        self.loop_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.looped = False # Seeked back; position reports past loop_end are stale until one is before it
+
+    def is_loaded(self) -> bool:
+        return self.player.mediaStatus() in (QMediaPlayer.MediaStatus.LoadedMedia,
+                                             QMediaPlayer.MediaStatus.BufferingMedia,
+                                             QMediaPlayer.MediaStatus.BufferedMedia,
+                                             QMediaPlayer.MediaStatus.EndOfMedia)
+
+    def load(self, path: str) -> bool:
+        if self.path != path:
+            self.player.stop()
+            self.path = path if self.streamer.attach(self.player, path) else None
+        return self.path is not None
+
+
+class BgmEngine(QObject):
+    """
+    Background music on two decks (A/B) crossfaded by the shared AnimationScheduler.
+
+    - Transitions go through a queue. The next track is pre-rolled (opened and
+      buffered) on the idle deck; the fade starts only once it can play, so the
+      crossfade never starts into silence. Requests arriving during a pre-roll
+      wait, and only the newest one is played when it completes; the ones in
+      between are dropped (the Director's last word wins). An idle deck still
+      audible from the previous crossfade is ducked out over DUCK_MS first.
+    - Starting a fade replaces the fades still running on both decks, which
+      continue from their current levels. Asking for the track that is fading
+      out brings that deck back without reloading it; asking for the playing
+      track does nothing.
+    - Optional loop points (ms): at `loop_end_ms` (or the end of the file) the
+      track seeks to `loop_start_ms` instead of restarting from 0, so intros
+      are played once. This is approximate, not sample-accurate: QMediaPlayer
+      only reports positions every so often and cannot schedule a seek, so
+      the seek is timed with a precise timer armed from the last report
+      within LOOP_LOOKAHEAD_MS (typically a few ms late), and the backend's
+      seek itself may leave a short audible gap. Tracks without loop points
+      are looped by the backend.
+    """
+
+    PREROLL_TIMEOUT_MS = 3000 # Give up on a track that never loads
+    DUCK_MS = 150 # Fade-out of a still audible idle deck before it is reloaded
+    LOOP_LOOKAHEAD_MS = 1000 # Arm the loop timer once loop_end_ms is this close
+
+    def __init__(self, animator: AnimationScheduler = None, streamer: AudioStreamer = None):
+        super().__init__()
+        self.animator = animator or AnimationScheduler()
+        self.streamer = streamer or AudioStreamer()
+        self.master_volume = 1.0
+        self.decks = {"A": _Deck("A", self.streamer), "B": _Deck("B", self.streamer)}
+        self.active = self.decks["A"]
+        for deck in self.decks.values():
+            deck.player.errorOccurred.connect(lambda e, s, d=deck: self._on_error(d, e, s))
+            deck.player.mediaStatusChanged.connect(lambda status, d=deck: self._on_status(d, status))
+            deck.player.positionChanged.connect(lambda pos, d=deck: self._on_position(d, pos))
+            deck.loop_timer.timeout.connect(lambda d=deck: self._loop_back(d))
+
+        self._queue = deque()
+        self._preroll = None # (deck, BgmTransition) while the next track is loading
+        self._preroll_timer = QTimer(self)
+        self._preroll_timer.setSingleShot(True)
+        self._preroll_timer.timeout.connect(self._on_preroll_timeout)
+
+        self.transitions = 0
+        self.dropped = 0
+        self.preroll_hits = 0 # Transitions that reused a deck already holding the track
+
+    def _idle_deck(self) -> _Deck:
+        return self.decks["B"] if self.active is self.decks["A"] else self.decks["A"]
+
+    # --- Volume ---
+    def _apply_volume(self, deck: _Deck):
+        # QAudioOutput volume tops out at 1.0, so boosts only take effect below full master volume
+        deck.output.setVolume(min(1.0, deck.level * deck.gain * self.master_volume))
+
+    def _set_level(self, deck: _Deck, level: float):
+        deck.level = level
+        self._apply_volume(deck)
+
+    def set_volume(self, val: float):
+        self.master_volume = val
+        for deck in self.decks.values():
+            self._apply_volume(deck)
+
+    # --- Transitions ---
+    def play(self, file_path: str, fade_duration: int = 2000, gain: float = 1.0,
+             loop_start_ms: int = None, loop_end_ms: int = None):
+        self._queue.append(BgmTransition(os.path.abspath(file_path), fade_duration, gain, loop_start_ms, loop_end_ms))
+        if self._preroll is None:
+            self._next()
+
+    def _next(self):
+        if not self._queue:
+            return
+        self.dropped += len(self._queue) - 1
+        transition = self._queue.pop()
+        self._queue.clear()
+
+        if transition.path == self.active.path and self.active.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            # Already playing: refresh its settings and finish any fade towards it
+            self._configure(self.active, transition)
+            self._crossfade(self.active, transition.fade_ms)
+            return
+
+        for deck in (self._idle_deck(), self.active):
+            # Fading out, or stopped with the file still open: no reload needed
+            if deck.path == transition.path and (deck.is_loaded() or deck.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState):
+                self.preroll_hits += 1
+                self._configure(deck, transition)
+                self._start(deck, transition)
+                return
+        deck = self._idle_deck()
+        self._preroll = (deck, transition)
+        if deck.level > 0.0:
+            # Still audible from the previous crossfade: duck it quickly instead of cutting it off
+            self.animator.animate(deck, "level", 0.0, self.DUCK_MS, lambda v: self._set_level(deck, v),
+                                  getter=lambda: deck.level, group="bgm", on_finished=self._load_preroll)
+        else:
+            self.animator.cancel(deck, "level")
+            self._load_preroll()
+
+    def _load_preroll(self):
+        if self._preroll is None: # Stopped while ducking
+            return
+        deck, transition = self._preroll
+        self._configure(deck, transition)
+        if not deck.load(transition.path):
+            self._abort_preroll(f"{transition.path} not found")
+            return
+        if deck.is_loaded(): # Already open, or a backend that loads synchronously
+            self._preroll_done()
+        else:
+            self._preroll_timer.start(self.PREROLL_TIMEOUT_MS)
+
+    def _is_prerolling(self, deck: _Deck) -> bool:
+        return self._preroll is not None and self._preroll[0] is deck and deck.path == self._preroll[1].path
+
+    def _configure(self, deck: _Deck, transition: BgmTransition):
+        deck.gain = transition.gain
+        deck.loop_start_ms = transition.loop_start_ms
+        deck.loop_end_ms = transition.loop_end_ms
+        deck.loop_timer.stop()
+        deck.looped = False
+        # Without loop points the backend loops the whole file itself
+        has_loop_points = transition.loop_start_ms is not None or transition.loop_end_ms is not None
+        deck.player.setLoops(1 if has_loop_points else QMediaPlayer.Loops.Infinite)
+        self._apply_volume(deck)
+
+    def _preroll_done(self):
+        deck, transition = self._preroll
+        self._preroll = None
+        self._preroll_timer.stop()
+        if self._queue:
+            # Superseded while loading: go straight to the newest request
+            self.dropped += 1
+            self._next()
+            return
+        self._start(deck, transition)
+
+    def _start(self, deck: _Deck, transition: BgmTransition):
+        if deck.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+            if deck.level == 0.0:
+                deck.player.setPosition(0)
+            deck.player.play()
+        self.transitions += 1
+        self._crossfade(deck, transition.fade_ms)
+
+    def _crossfade(self, incoming: _Deck, fade_ms: int):
+        outgoing = self.decks["B"] if incoming is self.decks["A"] else self.decks["A"]
+        self.active = incoming
+
+        def stop_outgoing():
+            # Still the inactive deck once faded out: stop decoding it
+            if self.active is not outgoing:
+                outgoing.player.stop()
+                outgoing.loop_timer.stop()
+
+        # Replaces fades still running from a previous track, so rapid changes
+        # continue from the current levels instead of jumping
+        self.animator.animate(incoming, "level", 1.0, fade_ms, lambda v: self._set_level(incoming, v),
+                              getter=lambda: incoming.level, group="bgm")
+        if outgoing.level > 0.0 or self.animator.is_animating(outgoing, "level"):
+            self.animator.animate(outgoing, "level", 0.0, fade_ms, lambda v: self._set_level(outgoing, v),
+                                  getter=lambda: outgoing.level, group="bgm", on_finished=stop_outgoing)
+        else:
+            outgoing.player.stop()
+
+    def stop(self):
+        """Stops both decks immediately and forgets queued transitions."""
+        self._queue.clear()
+        self._preroll = None
+        self._preroll_timer.stop()
+        self.animator.cancel_group("bgm")
+        for deck in self.decks.values():
+            deck.player.stop()
+            deck.loop_timer.stop()
+            self._set_level(deck, 0.0)
+
+    # --- Player callbacks ---
+    def _on_status(self, deck: _Deck, status):
+        if self._is_prerolling(deck) and status in (QMediaPlayer.MediaStatus.LoadedMedia,
+                                                                     QMediaPlayer.MediaStatus.BufferedMedia):
+            self._preroll_done()
+        elif status == QMediaPlayer.MediaStatus.EndOfMedia and deck is self.active \
+                and (deck.loop_start_ms is not None or deck.loop_end_ms is not None):
+            deck.player.setPosition(deck.loop_start_ms or 0)
+            deck.player.play()
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia and self._is_prerolling(deck):
+            self._abort_preroll(f"cannot play {deck.path}")
+
+    def _on_position(self, deck: _Deck, position: int):
+        if deck.loop_end_ms is None:
+            return
+        remaining = deck.loop_end_ms - position
+        if deck.looped:
+            if remaining > 0:
+                deck.looped = False # The seek back has landed
+            return
+        if remaining <= 0:
+            # The timer was not armed in time (late report): carry the overshoot over, keeping the beat
+            self._loop_back(deck, -remaining)
+        elif remaining <= self.LOOP_LOOKAHEAD_MS:
+            # Re-armed on every report, from the freshest position
+            deck.loop_timer.start(remaining)
+
+    def _loop_back(self, deck: _Deck, overshoot_ms: int = 0):
+        deck.loop_timer.stop()
+        if deck.loop_end_ms is None or deck.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+            return
+        deck.looped = True
+        deck.player.setPosition((deck.loop_start_ms or 0) + overshoot_ms)
+
+    def _on_error(self, deck: _Deck, error, message: str):
+        print(f"[Audio BGM {deck.name} Error] {error}: {message}")
+        if self._is_prerolling(deck):
+            self._abort_preroll(message)
+
+    def _on_preroll_timeout(self):
+        if self._preroll:
+            self._abort_preroll(f"{self._preroll[0].path} did not load in {self.PREROLL_TIMEOUT_MS} ms")
+
+    def _abort_preroll(self, reason: str):
+        # The current track keeps playing; a queued request still gets its turn
+        deck, _ = self._preroll
+        print(f"[BgmEngine] Skipping transition: {reason}")
+        self._preroll = None
+        self._preroll_timer.stop()
+        deck.player.stop()
+        deck.path = None
+        self._next()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active.name,
+            "track": os.path.basename(self.active.path) if self.active.path else None,
+            "levels": {name: round(deck.level, 3) for name, deck in self.decks.items()},
+            "queued": len(self._queue),
+            "prerolling": self._preroll is not None,
+            "transitions": self.transitions,
+            "dropped": self.dropped,
+            "preroll_hits": self.preroll_hits,
+        }
@@ -0,0 +1,190 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class CommandSpec:
+    """
+    Declared schema for one stage-direction command.
+
+    A tag like [fg-chiguo-010102] is split on "-"; the first part selects the
+    command and the rest are bound, in order, to `args` then `optional`.
+    Infix commands ([Name-好感-+10]) are selected by the SECOND part instead,
+    and the first part is bound as the first argument.
+    """
+    category: str
+    handler: Callable
+    args: Tuple[str, ...] = ()        # Required argument names
+    optional: Tuple[str, ...] = ()    # Optional argument names (missing -> default)
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    types: Dict[str, Callable] = field(default_factory=dict)  # name -> converter (e.g. int)
+    greedy: bool = False              # Last argument swallows remaining "-" (dates, etc.)
+    infix: bool = False
+    description: str = ""
+
+    def bind(self, values) -> Dict[str, Any]:
+        """Maps positional tag values onto argument names. Raises ValueError on mismatch."""
+        names = self.args + self.optional
+        values = list(values)
+        if len(values) < len(self.args):
+            raise ValueError(f"expects at least {len(self.args)} argument(s), got {len(values)}")
+
+        if self.greedy and names and len(values) > len(names):
+            values = values[:len(names) - 1] + ["-".join(values[len(names) - 1:])]
+
+        kwargs = dict(self.defaults)
+        for name, value in zip(names, values):
+            converter = self.types.get(name)
+            kwargs[name] = converter(value) if converter else value
+        for name in self.optional:
+            kwargs.setdefault(name, None)
+        return kwargs
+
+
+@dataclass
+class CommandStats:
+    calls: int = 0
+    errors: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total_ns / 1e6,
+            "avg_ms": (self.total_ns / self.calls / 1e6) if self.calls else 0.0,
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+class CommandRegistry:
+    """
+    Maps a tag category to a handler with O(1) lookup.
+
+    Handlers are called as handler(context, **kwargs), where context is the
+    object passed to execute() (the GameEngine in practice).
+    """
+
+    def __init__(self):
+        self._commands: Dict[str, CommandSpec] = {}
+        self._infix: Dict[str, CommandSpec] = {}
+        self._stats: Dict[str, CommandStats] = {}
+        self.unknown_count = 0
+
+    # --- Registration ---
+
+    def register(self, category: str, handler: Callable, args=(), optional=(), defaults=None,
+                 types=None, greedy: bool = False, infix: bool = False, aliases=(), description: str = "") -> CommandSpec:
+        """Registers (or replaces) a command. Aliases share the same spec and counters."""
+        spec = CommandSpec(
+            category=category,
+            handler=handler,
+            args=tuple(args),
+            optional=tuple(optional),
+            defaults=dict(defaults or {}),
+            types=dict(types or {}),
+            greedy=greedy,
+            infix=infix,
+            description=description,
+        )
+        table = self._infix if infix else self._commands
+        for key in (category, *aliases):
+            table[key] = spec
+        return spec
+
+    def command(self, category: str, **kwargs):
+        """Decorator form of register()."""
+        def decorator(func):
+            self.register(category, func, **kwargs)
+            return func
+        return decorator
+
+    def unregister(self, category: str):
+        self._commands.pop(category, None)
+        self._infix.pop(category, None)
+
+    def update(self, other: "CommandRegistry"):
+        """Copies all commands from another registry (later registrations win)."""
+        self._commands.update(other._commands)
+        self._infix.update(other._infix)
+
+    def copy(self) -> "CommandRegistry":
+        """Returns a registry with the same commands and fresh counters."""
+        clone = CommandRegistry()
+        clone.update(self)
+        return clone
+
+    def __contains__(self, category: str) -> bool:
+        return category in self._commands or category in self._infix
+
+    @property
+    def categories(self):
+        return sorted(set(self._commands) | set(self._infix))
+
+    # --- Dispatch ---
+
+    def resolve(self, tag: str) -> Tuple[Optional[CommandSpec], list]:
+        """Returns (spec, positional values) for a raw tag, or (None, []) if unknown."""
+        parts = tag.split("-")
+        spec = self._commands.get(parts[0])
+        if spec is not None:
+            return spec, parts[1:]
+        if len(parts) > 1:
+            spec = self._infix.get(parts[1])
+            if spec is not None:
+                return spec, [parts[0]] + parts[2:]
+        return None, []
+
+    def execute(self, tag: str, context) -> bool:
+        """Runs the command for `tag`. Returns True if a handler ran without error."""
+        spec, values = self.resolve(tag)
+        if spec is None:
+            self.unknown_count += 1
+            return False
+
+        stats = self._stats.setdefault(spec.category, CommandStats())
+        try:
+            kwargs = spec.bind(values)
+        except ValueError as e:
+            stats.errors += 1
+            print(f"[CommandRegistry] Rejected [{tag}]: {spec.category} {e}")
+            return False
+
+        start = time.perf_counter_ns()
+        try:
+            spec.handler(context, **kwargs)
+            ok = True
+        except Exception as e:
+            stats.errors += 1
+            print(f"[CommandRegistry] Handler for [{tag}] failed: {e}")
+            ok = False
+        elapsed = time.perf_counter_ns() - start
+
+        stats.calls += 1
+        stats.total_ns += elapsed
+        if elapsed > stats.max_ns:
+            stats.max_ns = elapsed
+        return ok
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-command timing counters, keyed by category."""
+        return {name: s.to_dict() for name, s in self._stats.items()}
+
+    def reset_stats(self):
+        self._stats.clear()
+        self.unknown_count = 0
+
+
+# Project / third-party commands. Every GameEngine created after registration picks these up
+# (and they override built-ins of the same name), so new stage directions need no engine edits:
+#
+#     from src.frontend.command_registry import extensions
+#
+#     @extensions.command("Shake", args=("name",))
+#     def shake(engine, name):
+#         engine.visual.animate_sprite(name, "shake")
+extensions = CommandRegistry()
@@ -0,0 +1,610 @@
+import asyncio
+import contextlib
+import heapq
+import json
+import os
+import re
+import time
+from enum import Enum
+from .command_registry import CommandRegistry, extensions
+from .sound_meta import SoundMetadata
+from .asset_archive import default_archives
+
+# Pure-Python engine core: no Qt imports allowed in this module.
+# GameEngine (game_engine.py) is the thin Qt adapter; headless tools, servers and
+# load tests can drive EngineCore directly with an AsyncioClock or VirtualClock.
+
+class GameState(Enum):
+    IDLE = 0
+    GENERATING = 1
+    PLAYING = 2
+    TYPING = 3
+    WAITING_INPUT = 4 # Waiting for user to advance (e.g. after [r] or text finished)
+    PAUSED = 5 # General pause
+    WAITING_CLEAR = 6 # Waiting for user to confirm clear
+
+
+# --- Clocks ---
+# A clock schedules one-shot callbacks: call_later(delay_ms, callback) -> handle with cancel().
+
+class AsyncioClock:
+    """Real time, driven by an asyncio event loop (headless servers, load tests)."""
+
+    def __init__(self, loop=None):
+        self._loop = loop
+
+    def now_ms(self) -> float:
+        return time.monotonic() * 1000.0
+
+    def call_later(self, delay_ms: float, callback):
+        loop = self._loop or asyncio.get_event_loop()
+        return loop.call_later(delay_ms / 1000.0, callback)
+
+
+class _VirtualTimer:
+    __slots__ = ("due", "seq", "callback", "cancelled")
+
+    def __init__(self, due, seq, callback):
+        self.due = due
+        self.seq = seq
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.due, self.seq) < (other.due, other.seq)
+
+
+class VirtualClock:
+    """
+    Simulated time for tests and benchmarks. Nothing happens until advance() or
+    run_until_idle() is called; timers then fire in order without real waiting.
+    """
+
+    def __init__(self):
+        self._now = 0.0
+        self._seq = 0
+        self._timers = []
+
+    def now_ms(self) -> float:
+        return self._now
+
+    def call_later(self, delay_ms: float, callback):
+        self._seq += 1
+        timer = _VirtualTimer(self._now + max(0.0, delay_ms), self._seq, callback)
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for t in self._timers if not t.cancelled)
+
+    def advance(self, ms: float):
+        """Moves time forward by `ms`, firing every timer that becomes due."""
+        target = self._now + ms
+        while self._timers and self._timers[0].due <= target:
+            timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            self._now = timer.due
+            timer.callback()
+        self._now = target
+
+    def run_until_idle(self, limit_ms: float = None) -> float:
+        """Fires timers until none are left (or `limit_ms` of virtual time passed). Returns elapsed ms."""
+        start = self._now
+        while self._timers:
+            timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            if limit_ms is not None and timer.due - start > limit_ms:
+                heapq.heappush(self._timers, timer)
+                break
+            self._now = timer.due
+            timer.callback()
+        return self._now - start
+
+
+class EngineCore:
+    """
+    Parses Director output into a command stream and plays it back through a
+    state machine (typewriter, [r]/[C] flow control, auto mode).
+
+    Timing goes through `clock`; text output goes to the callables in
+    text_listeners (name, content) and line_listeners (name, full segment).
+    """
+
+    def __init__(self, visual_manager, audio_manager, llm_chain, clock=None):
+        self.visual = visual_manager
+        self.audio = audio_manager
+        self.backend = llm_chain
+        self.clock = clock or AsyncioClock()
+        self.recorder = None # Optional EngineRecorder
+        
+        self.text_listeners = []
+        self.line_listeners = []
+        
+        self._state = GameState.IDLE
+        self.is_auto_mode = False
+        self.text_speed = 50 # ms per char
+        self._current_speaker_name = "系统" # Default speaker
+
+        self._execution_queue = []
+        self._current_text_segment = ""
+        self._current_full_text = ""
+        self._typewriter_index = 0
+        
+        self._typing_handle = None
+        self._sound_handle = None
+        self._scheduled = set() # Auto-mode delays
+
+        # Stage-direction commands: built-ins first, project extensions may override
+        self.commands = builtin_commands.copy()
+        self.commands.update(extensions)
+        
+        # Load Registry
+        self.registry = {"music": [], "backgrounds": []}
+        try:
+            with open("assets/registry.json", "r", encoding="utf-8") as f:
+                self.registry = json.load(f)
+        except Exception as e:
+            print(f"Failed to load registry: {e}")
+
+        # Load Sound Map
+        self.sound_map = {}
+        try:
+            with open("assets/sound_map.json", "r", encoding="utf-8") as f:
+                self.sound_map = json.load(f)
+        except Exception as e:
+            print(f"Failed to load sound map: {e}")
+        # Lengths and PCM copies from build_sound_cache.py (empty if not built)
+        self.sound_meta = SoundMetadata()
+        # Packed assets count as present (pack_assets.py)
+        self.archives = default_archives()
+
+    @property
+    def state(self) -> GameState:
+        return self._state
+
+    @state.setter
+    def state(self, value: GameState):
+        if value != self._state:
+            self._state = value
+            if self.recorder:
+                self.recorder.record("state", s=value.name)
+
+    # --- Output & Timers ---
+
+    def _emit_text(self, name: str, content: str):
+        for listener in self.text_listeners:
+            listener(name, content)
+
+    def _emit_line(self, name: str, text: str):
+        for listener in self.line_listeners:
+            listener(name, text)
+
+    def _schedule(self, delay_ms: float, callback):
+        """One-shot delay that stop() can cancel."""
+        handle = None
+        def fire():
+            self._scheduled.discard(handle)
+            callback()
+        handle = self.clock.call_later(delay_ms, fire)
+        self._scheduled.add(handle)
+        return handle
+
+    @staticmethod
+    def _cancel(handle):
+        if handle is not None:
+            handle.cancel()
+
+    def stop(self):
+        """Cancels every pending timer (typewriter, sound stop, auto-mode delays)."""
+        self._cancel(self._typing_handle)
+        self._cancel(self._sound_handle)
+        for handle in list(self._scheduled):
+            handle.cancel()
+        self._typing_handle = None
+        self._sound_handle = None
+        self._scheduled.clear()
+
+    def _on_sound_timeout(self):
+        self._sound_handle = None
+        print("[GameEngine] Sound timer expired. Stopping loop.")
+        self.audio.stop_looping_sfx()
+
+    # --- Input ---
+
+    def set_text_speed(self, speed_ms: int):
+        self.text_speed = max(10, speed_ms)
+
+    def set_auto_mode(self, is_auto: bool):
+        self.is_auto_mode = is_auto
+        if self.recorder:
+            self.recorder.record("auto", on=is_auto)
+        print(f"Auto mode set to: {is_auto}")
+        # If we were waiting for input, and auto mode is turned on, advance
+        if is_auto and self.state in [GameState.WAITING_INPUT, GameState.WAITING_CLEAR]:
+            self._advance()
+
+    def user_advance(self):
+        """Called when user clicks or presses space."""
+        if self.recorder:
+            self.recorder.record("advance")
+        self._advance()
+
+    def _advance(self):
+        """Advances playback (user input or auto-mode timer)."""
+        if self.state == GameState.TYPING:
+            # Finish typing instantly
+            self._typewriter_index = len(self._current_text_segment)
+            self._type_step()
+        elif self.state == GameState.WAITING_INPUT:
+            # Continue execution queue
+            self.state = GameState.PLAYING
+            self._process_queue()
+        elif self.state == GameState.WAITING_CLEAR:
+            self._perform_clear()
+            self.state = GameState.PLAYING
+            self._process_queue()
+
+    async def handle_turn(self, user_input: str):
+        if self.state not in [GameState.IDLE, GameState.WAITING_INPUT]:
+            return
+            
+        if self.recorder:
+            self.recorder.record("turn", text=user_input)
+        self.state = GameState.GENERATING
+        self._archive_line("你", user_input, role="user")
+        self._emit_text("思考中...", "")
+        
+        try:
+            # Execute backend turn (handles blocking check internally)
+            raw_response = await self._record_reply(self.backend.execute_turn(user_input))
+            
+            # Check for blocking or error message
+            if raw_response.startswith("[System"):
+                 self._emit_text("系统", raw_response)
+                 self.state = GameState.IDLE
+                 return
+
+            self._start_sequence(raw_response)
+            
+        except Exception as e:
+            print(f"Error: {e}")
+            self.state = GameState.IDLE
+
+    async def start_new_game_flow(self):
+        """Kicks off the special opening sequence."""
+        if self.recorder:
+            self.recorder.record("opening")
+        self.state = GameState.GENERATING
+        self._emit_text("系统", "正在生成开场剧情... (规划 -> 撰写 -> 导演)")
+        
+        # Clear Memory for new game
+        if self.backend and hasattr(self.backend, "memory"):
+             self.backend.memory.clear_memory() # Ensure we start fresh
+        
+        try:
+            response = await self._record_reply(self.backend.run_opening_sequence())
+            
+            # Check for error
+            if response.startswith("[Error") or response.startswith("[System Error"):
+                 self._emit_text("系统", response)
+                 self.state = GameState.IDLE
+                 return
+
+            self._start_sequence(response)
+        except Exception as e:
+            self._emit_text("Error", f"Opening failed: {e}")
+            self.state = GameState.IDLE
+
+    async def _record_reply(self, awaitable):
+        """Awaits a backend call and records its result (or error) for replays."""
+        try:
+            reply = await awaitable
+        except Exception as e:
+            if self.recorder:
+                self.recorder.record("reply", error=str(e))
+            raise
+        if self.recorder:
+            self.recorder.record("reply", text=reply)
+        return reply
+
+    def _start_sequence(self, response_text: str):
+        if self.recorder:
+            self.recorder.record("sequence", text=response_text)
+        self.state = GameState.PLAYING
+        self._current_speaker_name = "系统" # Reset speaker at start of sequence
+
+        # 0. Pre-process Speaker format
+        # Replace 【Name】『Content』 with [Speaker-Name]Content
+        # Using non-greedy match for content
+        processed_text = re.sub(r"【(.*?)】『(.*?)』", r"[Speaker-\1]\2", response_text)
+        
+        # 1. Execute instant commands (backgrounds, music, etc.)
+        tag_pattern = re.compile(r"\[(.*?)\]")
+        tags = tag_pattern.findall(processed_text)
+        self._prefetch_assets(tags)
+        
+        # One scene update for the whole burst when the visual manager supports it
+        transaction = getattr(self.visual, "transaction", None)
+        with transaction() if transaction else contextlib.nullcontext():
+            for tag in tags:
+                # Skip Speaker tags during asset execution
+                if tag.startswith("Speaker-"):
+                    continue
+                self._execute_asset_command(tag)
+            
+        # 2. Prepare text sequence for playback
+        # Remove asset tags, but keep flow-control tags [r] and [C] AND [Speaker-...]
+        text_with_flow_tags = processed_text
+        for tag in tags:
+            if tag.upper() in ["R", "C"]:
+                 continue
+            if tag.startswith("Speaker-"):
+                 continue
+            text_with_flow_tags = text_with_flow_tags.replace(f"[{tag}]", "")
+        
+        # Tokenize by flow-control tags and Speaker tags
+        # Includes [Speaker-Name] in tokens
+        tokens = re.split(r'(\[r\]|\[C\]|\[Speaker-.*?\])', text_with_flow_tags, flags=re.IGNORECASE)
+        
+        self._execution_queue = [token.strip() for token in tokens if token.strip()]
+        self._current_full_text = ""
+        self._process_queue()
+
+    def _process_queue(self):
+        if not self._execution_queue:
+            # End of sequence, wait for user to start next turn
+            self.state = GameState.WAITING_INPUT 
+            return
+
+        segment = self._execution_queue.pop(0)
+        
+        if segment.upper() == "[R]":
+            self.state = GameState.WAITING_INPUT
+            if self.is_auto_mode:
+                self._schedule(1000, self._advance)
+        
+        elif segment.upper() == "[C]":
+            if self.is_auto_mode:
+                self._perform_clear()
+                # Continue processing after a delay in auto mode
+                self._schedule(5000, self._process_queue)
+            else:
+                # Manual mode: Wait for user input to clear
+                self.state = GameState.WAITING_CLEAR
+
+        elif segment.startswith("[Speaker-"):
+            # Extract speaker name
+            # Format: [Speaker-Name]
+            try:
+                # remove brackets
+                inner = segment[1:-1]
+                parts = inner.split("-", 1)
+                if len(parts) > 1:
+                    self._current_speaker_name = parts[1]
+                else:
+                    self._current_speaker_name = "系统"
+            except:
+                self._current_speaker_name = "系统"
+            
+            # Proceed to next token immediately
+            self._process_queue()
+
+        else: # It's a text segment
+            self.state = GameState.TYPING
+            self._current_text_segment = segment
+            self._typewriter_index = 0
+            self._typing_handle = self.clock.call_later(self.text_speed, self._type_step)
+
+    def _perform_clear(self):
+        self._current_full_text = "" # Clear visual text
+        self._current_speaker_name = "系统" # Reset speaker on clear
+        self._cancel(self._sound_handle) # Cancel any pending sound stop
+        self._sound_handle = None
+        self.audio.stop_looping_sfx() # Stop any looping sounds
+        self._emit_text(self._current_speaker_name, self._current_full_text)
+
+    def _type_step(self):
+        if self._typewriter_index < len(self._current_text_segment):
+            self._typewriter_index += 1
+            new_char = self._current_text_segment[self._typewriter_index-1]
+            self._current_full_text += new_char
+            self._emit_text(self._current_speaker_name, self._current_full_text)
+            self._typing_handle = self.clock.call_later(self.text_speed, self._type_step)
+        else:
+            self._cancel(self._typing_handle)
+            self._typing_handle = None
+            self._archive_line(self._current_speaker_name, self._current_text_segment)
+            # Finished typing this segment, move to the next
+            self._process_queue()
+
+    def _archive_line(self, speaker: str, text: str, role: str = "story"):
+        """Records a displayed line in the turn archive (backlog) and notifies listeners."""
+        memory = self.memory
+        if memory and hasattr(memory, "turn_archive"):
+            memory.turn_archive.append(speaker, text, role=role, layer=memory.global_layer_count)
+        self._emit_line(speaker, text)
+
+    @property
+    def memory(self):
+        """MemoryManager of the backend, or None (e.g. Debug console engine)."""
+        return self.backend.memory if self.backend and hasattr(self.backend, "memory") else None
+
+    def _prefetch_assets(self, tags):
+        """Hands upcoming stage directions to the visual prefetcher and sound preloader, where present."""
+        prefetch = getattr(self.visual, "prefetch", None)
+        preload_sfx = getattr(self.audio, "preload_sfx", None)
+        if prefetch is None and preload_sfx is None:
+            return
+        commands = []
+        for tag in tags:
+            spec, values = self.commands.resolve(tag)
+            if spec is None:
+                continue
+            try:
+                commands.append((spec.category, spec.bind(values)))
+            except ValueError:
+                continue
+        if preload_sfx:
+            for category, args in commands:
+                if category == "sound" and not args.get("duration"): # Timed sounds use the loop player
+                    file_path = self._resolve_sound(args["name"])
+                    if file_path:
+                        preload_sfx(self.sound_meta.playable_path(file_path))
+        if prefetch:
+            visible = list(self.memory.state.visible_characters) if self.memory else []
+            prefetch(commands, visible)
+
+    def _execute_asset_command(self, tag: str):
+        if not self.recorder:
+            self.commands.execute(tag, self)
+            return
+        start = time.perf_counter_ns()
+        ok = self.commands.execute(tag, self)
+        self.recorder.record("cmd", tag=tag, ok=ok, ms=round((time.perf_counter_ns() - start) / 1e6, 3))
+
+    def _play_music(self, music_name: str):
+        found_entry = next((item for item in self.registry.get("music", []) if item["name"] == music_name), None)
+        if found_entry:
+            file_path = os.path.join("assets/bgm", found_entry["file"])
+            if self.archives.exists(file_path):
+                # Loudness correction written by analyze_loudness.py; optional loop points in ms
+                self.audio.play_bgm(file_path, gain_db=found_entry.get("gain_db", 0.0),
+                                    loop_start_ms=found_entry.get("loop_start_ms"),
+                                    loop_end_ms=found_entry.get("loop_end_ms"))
+            else:
+                print(f"Music file missing: {file_path}")
+        else:
+            # Fallback search (not recommended)
+            print(f"Music not found in registry: {music_name}")
+
+    def _resolve_sound(self, sound_name: str):
+        """File of a sound_map entry, else assets/sound/<name>.ogg if it exists."""
+        if sound_name in self.sound_map:
+            return self.sound_map[sound_name]["file"]
+        file_path = os.path.join("assets/sound", f"{sound_name}.ogg")
+        return file_path if self.archives.exists(file_path) else None
+
+    def sound_duration_ms(self, sound_name: str):
+        """Real length of a sound in ms from the sound cache, or None if unknown."""
+        file_path = self._resolve_sound(sound_name)
+        return self.sound_meta.duration_ms(file_path) if file_path else None
+
+    def _play_sound(self, sound_name: str, duration: str = None):
+        # [sound-name-duration]
+        duration_ms = 0
+        if duration:
+            try:
+                duration_ms = int(duration)
+            except:
+                pass
+        
+        file_path = self._resolve_sound(sound_name)
+        if not file_path:
+            print(f"Sound not found: {sound_name}")
+            return
+
+        # Stop previous timer if any
+        self._cancel(self._sound_handle)
+        self._sound_handle = None
+        
+        print(f"[GameEngine] Playing Sound: {sound_name}, Path: {file_path}, Duration: {duration_ms}ms")
+        gain_db = self.sound_map.get(sound_name, {}).get("gain_db", 0.0)
+
+        if duration_ms > 0:
+            # Loop with timeout (plays once and is cut if the sound is longer than the duration)
+            length_ms = self.sound_meta.duration_ms(file_path)
+            if length_ms is not None and duration_ms > length_ms:
+                print(f"[GameEngine] {sound_name} is {length_ms}ms, looping it to fill {duration_ms}ms")
+            self.audio.play_sfx(file_path, loop=True, gain_db=gain_db)
+            self._sound_handle = self.clock.call_later(duration_ms, self._on_sound_timeout)
+        else:
+            # One-shot, from the decoded PCM copy when there is one
+            self.audio.play_sfx(self.sound_meta.playable_path(file_path), loop=False, gain_db=gain_db)
+
+
+# --- Built-in Commands ---
+# Handlers receive the engine followed by the tag arguments declared in their schema.
+builtin_commands = CommandRegistry()
+
+@builtin_commands.command("Background", args=("name",))
+def _cmd_background(engine, name):
+    engine.visual.set_background(name)
+    if engine.memory:
+        engine.memory.state.current_bg = name
+
+@builtin_commands.command("Music", args=("name",))
+def _cmd_music(engine, name):
+    engine._play_music(name)
+    if engine.memory:
+        engine.memory.state.current_bgm = name
+
+@builtin_commands.command("StopBGM")
+def _cmd_stop_bgm(engine):
+    engine.audio.stop_bgm()
+    if engine.memory:
+        engine.memory.state.current_bgm = "None"
+
+@builtin_commands.command("sound", args=("name",), optional=("duration",))
+def _cmd_sound(engine, name, duration):
+    # [sound-name-duration]
+    engine._play_sound(name, duration)
+
+@builtin_commands.command("StopSound")
+def _cmd_stop_sound(engine):
+    engine.audio.stop_sfx()
+
+@builtin_commands.command("立绘", args=("name", "action"))
+def _cmd_sprite_action(engine, name, action):
+    if hasattr(engine.visual, "presets") and action in engine.visual.presets:
+        engine.visual.apply_preset(name, action)
+    else:
+        engine.visual.animate_sprite(name, action.lower())
+
+@builtin_commands.command("Sprite", args=("name", "preset"))
+def _cmd_sprite(engine, name, preset):
+    engine.visual.apply_preset(name, preset)
+
+@builtin_commands.command("fg", args=("name", "expression"))
+def _cmd_fg(engine, name, expression):
+    engine.visual.set_expression(name, expression)
+    if engine.memory:
+        engine.memory.state.visible_characters[name] = expression
+
+@builtin_commands.command("Join", args=("name",), optional=("preset",), defaults={"preset": "pos_center"}, aliases=("Enter",))
+def _cmd_join(engine, name, preset):
+    engine.visual.join_character(name, preset)
+    if engine.memory:
+        # VisualManager picks the default face; only track presence unless an expression is known
+        current_expr = engine.memory.state.visible_characters.get(name, "default")
+        engine.memory.state.visible_characters[name] = current_expr
+
+@builtin_commands.command("Leave", args=("name",), aliases=("Exit",))
+def _cmd_leave(engine, name):
+    engine.visual.remove_sprite(name)
+    if engine.memory and name in engine.memory.state.visible_characters:
+        del engine.memory.state.visible_characters[name]
+
+# Date Change [日期-2026-01-07] (greedy: the date itself contains "-")
+@builtin_commands.command("日期", args=("date",), greedy=True)
+def _cmd_date(engine, date):
+    if engine.memory:
+        engine.memory.state.date = date
+        engine.memory.save_gamestate()
+        print(f"[GameEngine] Date changed to: {date}")
+
+# Affection Change [Name-好感-+10] (infix: selected by the second part)
+@builtin_commands.command("好感", args=("name", "delta"), types={"delta": int}, infix=True)
+def _cmd_affection(engine, name, delta):
+    # int() handles "+10", "-5", "5"
+    if engine.memory:
+        current = engine.memory.state.favorability.get(name, 0)
+        new_val = current + delta
+        engine.memory.state.favorability[name] = new_val
+        engine.memory.save_gamestate()
+        print(f"[GameEngine] {name} favorability updated: {current} -> {new_val} (Delta: {delta})")
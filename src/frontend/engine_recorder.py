@@ -0,0 +1,173 @@
+import json
+import os
+import time
+from typing import Dict, List
+
+RECORDING_VERSION = 1
+
+
+class EngineRecorder:
+    """
+    Records a GameEngine session as JSONL, one event per line.
+
+    Every event carries "t": nanoseconds since recording start (monotonic clock)
+    and "ev": the event kind.
+
+    Inputs (replayed by EngineReplayer):
+        turn      {"text"}            Player input handed to handle_turn
+        opening   {}                  start_new_game_flow
+        sequence  {"text"}            Director output handed to the engine (an input
+                                      only when no turn/opening reply precedes it)
+        advance   {}                  User click / space / auto-advance
+        auto      {"on"}              Auto mode toggled
+    Backend results (fed back by the replayer's stub backend):
+        reply     {"text"|"error"}    What execute_turn / run_opening_sequence returned or raised
+    Outputs (compared when diffing):
+        text      {"n", "d"|"c"}      text_updated; "d" = appended suffix, "c" = full content
+        cmd       {"tag", "ok", "ms"} Executed asset command and its cost
+        state     {"s"}               GameState transition
+    """
+
+    INPUT_EVENTS = ("turn", "opening", "sequence", "advance", "auto")
+    OUTPUT_EVENTS = ("text", "cmd", "state")
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8", buffering=1) # Line-buffered: survives crashes
+        self._t0 = time.monotonic_ns()
+        self._last_name = None
+        self._last_content = ""
+        self.engine = None
+        self.event_count = 0
+        self.listeners = [] # Callables (ev, data), e.g. the replayer's input scheduler
+
+    def attach(self, engine):
+        """Starts recording `engine` (GameEngine or bare EngineCore) and writes a header with its settings."""
+        self.engine = engine
+        engine.recorder = self
+        engine.text_listeners.append(self._on_text_updated)
+        self.record("meta", version=RECORDING_VERSION, text_speed=engine.text_speed,
+                    auto=engine.is_auto_mode, state=engine.state.name)
+
+    def detach(self):
+        if self.engine is not None:
+            if self._on_text_updated in self.engine.text_listeners:
+                self.engine.text_listeners.remove(self._on_text_updated)
+            if getattr(self.engine, "recorder", None) is self:
+                self.engine.recorder = None
+            self.engine = None
+
+    def record(self, ev: str, **data):
+        if self._file is None:
+            return
+        data["t"] = time.monotonic_ns() - self._t0
+        data["ev"] = ev
+        self._file.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.event_count += 1
+        for listener in self.listeners:
+            listener(ev, data)
+
+    def _on_text_updated(self, name: str, content: str):
+        # The typewriter re-emits the whole text per character; store only what was appended
+        if name == self._last_name and content.startswith(self._last_content) and self._last_content:
+            self.record("text", n=name, d=content[len(self._last_content):])
+        else:
+            self.record("text", n=name, c=content)
+        self._last_name = name
+        self._last_content = content
+
+    def close(self):
+        self.detach()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_recording(path: str) -> List[Dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+
+def expand_text_events(events: List[Dict]) -> List[Dict]:
+    """Returns a copy of events with text deltas resolved to full content ("c")."""
+    result = []
+    last = ""
+    for event in events:
+        if event["ev"] == "text":
+            content = last + event["d"] if "d" in event else event.get("c", "")
+            last = content
+            event = dict(event, c=content)
+            event.pop("d", None)
+        result.append(event)
+    return result
+
+
+def output_signature(events: List[Dict]) -> List[tuple]:
+    """Timing-free view of the engine outputs, used to diff two recordings."""
+    signature = []
+    for event in expand_text_events(events):
+        ev = event["ev"]
+        if ev == "text":
+            signature.append(("text", event.get("n"), event.get("c")))
+        elif ev == "cmd":
+            signature.append(("cmd", event.get("tag"), event.get("ok")))
+        elif ev == "state":
+            signature.append(("state", event.get("s")))
+    return signature
+
+
+def diff_recordings(expected: List[Dict], actual: List[Dict], limit: int = 20) -> List[str]:
+    """Returns human-readable differences between the outputs of two recordings."""
+    a = output_signature(expected)
+    b = output_signature(actual)
+    diffs = []
+    for i in range(max(len(a), len(b))):
+        left = a[i] if i < len(a) else None
+        right = b[i] if i < len(b) else None
+        if left != right:
+            diffs.append(f"#{i}: expected {left} | got {right}")
+            if len(diffs) >= limit:
+                diffs.append("... (truncated)")
+                break
+    return diffs
+
+
+def summarize_commands(events: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Per-category command cost (category = tag up to the first '-')."""
+    summary = {}
+    for event in events:
+        if event["ev"] != "cmd":
+            continue
+        category = event["tag"].split("-")[0]
+        entry = summary.setdefault(category, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["calls"] += 1
+        entry["total_ms"] += event.get("ms", 0.0)
+        entry["max_ms"] = max(entry["max_ms"], event.get("ms", 0.0))
+    for entry in summary.values():
+        entry["avg_ms"] = entry["total_ms"] / entry["calls"]
+    return summary
+
+
+def find_stalls(events: List[Dict], threshold_ms: float = 100.0) -> List[Dict]:
+    """
+    Finds gaps between consecutive typewriter updates longer than threshold_ms
+    (player-visible stutters). Gaps that span a state change are not stalls.
+    """
+    stalls = []
+    last_text_t = None
+    for event in events:
+        if event["ev"] == "state":
+            last_text_t = None
+        elif event["ev"] == "text":
+            if last_text_t is not None:
+                gap_ms = (event["t"] - last_text_t) / 1e6
+                if gap_ms > threshold_ms:
+                    stalls.append({"t_ms": event["t"] / 1e6, "gap_ms": round(gap_ms, 1)})
+            last_text_t = event["t"]
+    return stalls
@@ -0,0 +1,147 @@
+import time
+import asyncio
+from typing import Dict, List
+from PySide6.QtCore import QObject, QTimer, QEventLoop
+
+from .engine_recorder import EngineRecorder
+from .engine_core import EngineCore
+from .game_engine import GameEngine, GameState
+from .stubs import StubVisualManager, StubAudioManager, StubBackend
+
+
+class EngineReplayer(QObject):
+    """
+    Drives a fresh GameEngine with the inputs of a recording. Player turns go
+    through handle_turn (and openings through start_new_game_flow) with a
+    stub backend that returns the recorded reply, so the GENERATING state and
+    "思考中..." output happen as they did in the original.
+
+    Each input is injected once the replay has produced as many output events as
+    the original had at that point, so replays are deterministic regardless of
+    machine speed. If the replay diverges and the engine goes quiet for
+    `idle_grace_s`, the next input is injected anyway once its recorded time
+    (divided by `speed`) has passed.
+
+    Recordings made before turns were recorded only have the Director output
+    ("sequence"); the outputs of the turn that produced it cannot be replayed
+    and are left out of `expected` (what the replay should be diffed against).
+    """
+
+    idle_grace_s = 1.0
+
+    def __init__(self, events: List[Dict], visual=None, audio=None, out_path: str = "replay.jsonl", speed: float = 1.0):
+        super().__init__()
+        self.events = events
+        self.speed = max(speed, 0.01)
+        self.visual = visual or StubVisualManager()
+        self.audio = audio or StubAudioManager()
+        self.backend = StubBackend()
+        self.engine = GameEngine(self.visual, self.audio, self.backend)
+        self._aio = asyncio.new_event_loop() # Runs the engine's turn coroutines (the stub backend never waits)
+
+        meta = next((e for e in events if e["ev"] == "meta"), {})
+        self.engine.set_text_speed(int(meta.get("text_speed", self.engine.text_speed) / self.speed))
+        self.engine.is_auto_mode = meta.get("auto", False)
+
+        # Inputs with the number of outputs that preceded them in the original run.
+        # Turns carry the reply recorded after them; a sequence right after a reply
+        # is that reply being played, not an input.
+        self._inputs = []
+        skipped = set() # ids of outputs the replay cannot reproduce
+        since_input = []
+        outputs_seen = 0
+        replied = False
+        for event in events:
+            ev = event["ev"]
+            if ev == "reply":
+                if self._inputs and self._inputs[-1][1]["ev"] in ("turn", "opening"):
+                    self._inputs[-1][1]["reply"] = event
+                replied = True
+            elif ev == "sequence" and replied:
+                replied = False
+            elif ev in EngineRecorder.INPUT_EVENTS:
+                if ev == "sequence":
+                    # Legacy recording: drop what the unrecorded turn emitted (GENERATING onwards)
+                    starts = [i for i, e in enumerate(since_input) if e["ev"] == "state" and e.get("s") == "GENERATING"]
+                    turn_outputs = since_input[starts[-1]:] if starts else []
+                    skipped.update(id(e) for e in turn_outputs)
+                    outputs_seen -= len(turn_outputs)
+                self._inputs.append((outputs_seen, dict(event)))
+                since_input = []
+                replied = False
+            elif ev in EngineRecorder.OUTPUT_EVENTS:
+                since_input.append(event)
+                outputs_seen += 1
+        self.expected = [e for e in events if id(e) not in skipped]
+        self._expected_outputs = outputs_seen
+        self._next_input = 0
+        self._outputs = 0
+
+        self.recorder = EngineRecorder(out_path)
+        self.recorder.attach(self.engine)
+        self.recorder.listeners.append(self._on_event)
+
+        self._loop = None
+        self._t0 = 0.0
+        self._last_output = 0.0
+
+    def _on_event(self, ev, data):
+        if ev in EngineRecorder.OUTPUT_EVENTS:
+            self._outputs += 1
+            self._last_output = time.monotonic()
+            QTimer.singleShot(0, self._pump)
+
+    def _pump(self):
+        """Injects every input whose preconditions (output count, or idle + deadline) are met."""
+        while self._next_input < len(self._inputs):
+            outputs_before, event = self._inputs[self._next_input]
+            # Re-read after every dispatch: an input counts as activity, so the engine must go quiet again
+            now = time.monotonic()
+            idle = now - self._last_output > self.idle_grace_s
+            if self._outputs < outputs_before and not (idle and (now - self._t0) * 1e9 >= event["t"] / self.speed):
+                break
+            self._next_input += 1
+            self._last_output = now
+            self._dispatch(event)
+
+    def _dispatch(self, event):
+        ev = event["ev"]
+        if ev in ("turn", "opening"):
+            reply = event.get("reply")
+            if reply is not None:
+                self.backend.replies.append(RuntimeError(reply["error"]) if "error" in reply else reply.get("text", ""))
+            if ev == "turn":
+                self._aio.run_until_complete(EngineCore.handle_turn(self.engine, event["text"]))
+            else:
+                self._aio.run_until_complete(EngineCore.start_new_game_flow(self.engine))
+        elif ev == "sequence":
+            self.engine._start_sequence(event["text"])
+        elif ev == "advance":
+            self.engine.user_advance_slot()
+        elif ev == "auto":
+            self.engine.set_auto_mode_slot(event["on"])
+
+    def _check_done(self):
+        self._pump()
+        finished_inputs = self._next_input >= len(self._inputs)
+        settled = self.engine.state in (GameState.IDLE, GameState.WAITING_INPUT, GameState.WAITING_CLEAR)
+        if finished_inputs and (settled or self._outputs >= self._expected_outputs):
+            self._loop.quit()
+
+    def run(self, timeout_s: float = 600.0):
+        """Runs the replay to completion (or timeout) and returns the replay recording path."""
+        self._loop = QEventLoop()
+        self._t0 = self._last_output = time.monotonic()
+
+        poll = QTimer()
+        poll.timeout.connect(self._check_done)
+        poll.start(50)
+        QTimer.singleShot(int(timeout_s * 1000), self._loop.quit)
+        QTimer.singleShot(0, self._pump)
+
+        self._loop.exec()
+        poll.stop()
+        self.engine.stop()
+        self.recorder.close()
+        self._aio.close()
+        return self.recorder.path
@@ -0,0 +1,229 @@
+import os
+import re
+import json
+from typing import NamedTuple, Optional, Tuple
+
+DEFAULT_LABELS_PATH = "assets/expression_labels.json"
+FACES_FILE = "faces.tjs"
+
+# "040102h1t5": brow 04, eyes 01, mouth 02, overlay marks h1 and t5
+_CODE = re.compile(r"^(\d{2})(\d{2})(\d{2})((?:[a-zA-Z]+\d*)*)$")
+_MARK = re.compile(r"[a-zA-Z]+\d*")
+# One entry of a TJS dictionary literal: "key" => "value" (either quote style)
+_TJS_PAIR = re.compile(r"""(["'])(.*?)\1\s*=>\s*(["'])(.*?)\3""", re.S)
+
+
+class FaceCode(NamedTuple):
+    brow: str
+    eyes: str
+    mouth: str
+    marks: Tuple[str, ...] # Overlays after the six digits (h1, t5, a, ...), in file order
+
+    @property
+    def code(self) -> str:
+        return self.brow + self.eyes + self.mouth + "".join(self.marks)
+
+
+def decompose(code: str) -> Optional[FaceCode]:
+    """Splits a six-digit face code (plus overlay marks) into its components; None for other names."""
+    match = _CODE.match(code)
+    if not match:
+        return None
+    return FaceCode(match.group(1), match.group(2), match.group(3), tuple(_MARK.findall(match.group(4).lower())))
+
+
+def parse_faces_tjs(text: str) -> dict:
+    """
+    Aliases from a KiriKiri faces.tjs dictionary (`%["f412" => "040102", ...]`).
+    Repeated keys keep the last value, as TJS does.
+    """
+    return {key: value for _, key, _, value in _TJS_PAIR.findall(text)}
+
+
+def _read_text(path: str, archives=None) -> Optional[str]:
+    data = archives.data(path) if archives else None
+    try:
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+    except OSError:
+        return None
+    raw = bytes(data)
+    for encoding in ("utf-8-sig", "utf-16", "gbk"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _ranges(values) -> str:
+    """"01,02,03,05" -> "01-03,05" (two-digit components, sorted)."""
+    numbers = sorted(int(v) for v in values)
+    parts = []
+    start = prev = numbers[0]
+    for n in numbers[1:] + [None]:
+        if n is not None and n == prev + 1:
+            prev = n
+            continue
+        parts.append(f"{start:02d}" if start == prev else f"{start:02d}-{prev:02d}")
+        if n is not None:
+            start = prev = n
+    return ",".join(parts)
+
+
+class _CharacterFaces:
+    def __init__(self):
+        self.names = {} # any accepted name (code, alias, label; labels also lower-cased) -> face path
+        self.codes = [] # (FaceCode, path) of every coded face, for nearest matches
+        self.labels = {} # label -> face path, as written
+        self.aliases = 0
+
+
+class ExpressionIndex:
+    """
+    Every name a character's face can be asked for, resolved to a face path
+    with one dict lookup:
+
+    - the keys of character_map.json "expressions" (six-digit codes such as
+      "010208h1t5", or friendly names added by hand);
+    - the aliases of each fg folder's faces.tjs ("f412" -> "040102");
+    - labels from assets/expression_labels.json (`{"chiguo": {"smile":
+      "010102"}, "*": {...}}`, "*" applying to every character that has the
+      face), matched case-insensitively.
+
+    A well-formed code the character does not have resolves to the nearest
+    face that exists (same eyes and mouth first, then brow, then marks), and
+    the answer is remembered, so a plausible pick from the Director never
+    fails. Pure Python (also used by PromptAssembler).
+    """
+
+    def __init__(self, char_map: dict = None, labels_path: str = DEFAULT_LABELS_PATH, archives=None):
+        self.labels_path = labels_path
+        self.archives = archives
+        self._chars = {}
+        self.nearest_matches = 0
+        if char_map is not None:
+            self.build(char_map)
+
+    @classmethod
+    def from_files(cls, map_path: str = "assets/character_map.json", labels_path: str = DEFAULT_LABELS_PATH) -> "ExpressionIndex":
+        index = cls(labels_path=labels_path)
+        try:
+            with open(map_path, "r", encoding="utf-8") as f:
+                index.build(json.load(f))
+        except Exception as e:
+            print(f"[ExpressionIndex] Failed to load {map_path}: {e}")
+        return index
+
+    def _load_labels(self) -> dict:
+        try:
+            with open(self.labels_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[ExpressionIndex] Failed to load {self.labels_path}: {e}")
+            return {}
+
+    def build(self, char_map: dict):
+        labels = self._load_labels()
+        self._chars.clear()
+        for name, data in char_map.items():
+            faces = _CharacterFaces()
+            expressions = data.get("expressions", {})
+            for key, path in expressions.items():
+                faces.names[key] = path
+                parsed = decompose(key)
+                if parsed:
+                    faces.codes.append((parsed, path))
+                elif not any(ch.isdigit() for ch in key):
+                    faces.labels[key] = path # Friendly names written into the map by hand
+            self._chars[name] = faces
+
+            folders = sorted({os.path.dirname(p) for p in expressions.values()} | {os.path.dirname(data.get("body") or "")} - {""})
+            for folder in folders:
+                text = _read_text(f"{folder}/{FACES_FILE}", self.archives)
+                for alias, code in (parse_faces_tjs(text) if text else {}).items():
+                    path = self.resolve(name, code)
+                    if path and alias not in faces.names:
+                        faces.names[alias] = path
+                        faces.aliases += 1
+
+            for label, target in {**labels.get("*", {}), **labels.get(name, {})}.items():
+                path = expressions.get(target) or faces.names.get(target)
+                if path:
+                    faces.labels[label] = path
+            for label, path in faces.labels.items():
+                faces.names.setdefault(label, path)
+                faces.names.setdefault(label.lower(), path)
+
+    def characters(self):
+        return list(self._chars)
+
+    def resolve(self, char_name: str, expression: str) -> Optional[str]:
+        """Face path for any accepted name of the expression, or None."""
+        faces = self._chars.get(char_name)
+        if faces is None or not expression:
+            return None
+        path = faces.names.get(expression)
+        if path is None:
+            path = faces.names.get(expression.lower())
+        if path is None:
+            path = self._nearest(faces, expression)
+        return path
+
+    def _nearest(self, faces: _CharacterFaces, expression: str) -> Optional[str]:
+        wanted = decompose(expression)
+        if wanted is None or not faces.codes:
+            return None
+
+        def score(entry):
+            code = entry[0]
+            return ((code.eyes == wanted.eyes) + (code.mouth == wanted.mouth), code.brow == wanted.brow,
+                    len(set(code.marks) & set(wanted.marks)) - len(set(code.marks) ^ set(wanted.marks)))
+
+        path = max(faces.codes, key=score)[1]
+        faces.names[expression] = path # Remembered: the next request is a plain lookup
+        self.nearest_matches += 1
+        return path
+
+    def components(self, char_name: str) -> dict:
+        """Component values the character's coded faces use: {"brow": {...}, "eyes": {...}, "mouth": {...}, "marks": {...}}."""
+        faces = self._chars.get(char_name)
+        result = {"brow": set(), "eyes": set(), "mouth": set(), "marks": set()}
+        for code, _ in faces.codes if faces else ():
+            result["brow"].add(code.brow)
+            result["eyes"].add(code.eyes)
+            result["mouth"].add(code.mouth)
+            result["marks"].update(code.marks)
+        return result
+
+    def vocabulary(self, char_name: str) -> str:
+        """
+        One compact line for prompts: the labels, then the code grammar
+        (BBEEMM + marks) with the component values in use, instead of every
+        code the character has.
+        """
+        faces = self._chars.get(char_name)
+        if faces is None:
+            return ""
+        parts = []
+        if faces.labels:
+            parts.append("labels " + ", ".join(faces.labels))
+        if faces.codes:
+            comp = self.components(char_name)
+            codes = f"codes BBEEMM: brow {_ranges(comp['brow'])}; eyes {_ranges(comp['eyes'])}; mouth {_ranges(comp['mouth'])}"
+            if comp["marks"]:
+                codes += "; optional marks " + ",".join(sorted(comp["marks"]))
+            parts.append(codes)
+        return f"{char_name}: " + " | ".join(parts) if parts else ""
+
+    def stats(self) -> dict:
+        return {
+            "characters": len(self._chars),
+            "names": sum(len(f.names) for f in self._chars.values()),
+            "aliases": sum(f.aliases for f in self._chars.values()),
+            "labels": sum(len(f.labels) for f in self._chars.values()),
+            "nearest_matches": self.nearest_matches,
+        }
@@ -0,0 +1,78 @@
+import os
+import json
+from typing import NamedTuple, Optional, Tuple
+
+DEFAULT_ATLAS_DIR = "assets/.cache/atlas"
+ATLAS_VERSION = 1
+
+
+class AtlasEntry(NamedTuple):
+    page: str # Atlas page image path
+    rect: Tuple[int, int, int, int] # x, y, w, h on the page
+    offset: Tuple[int, int] # Where the trimmed face sits on the original face canvas
+
+
+class FaceAtlas:
+    """
+    Index of expression faces packed into per-character atlas pages
+    (built by pack_face_atlas.py). Lookups are by original face path, so the
+    character map stays the source of truth; unpacked faces return None and
+    are loaded from their own files.
+    """
+
+    def __init__(self, atlas_dir: str = DEFAULT_ATLAS_DIR):
+        self.atlas_dir = atlas_dir
+        self._entries = {} # face path -> AtlasEntry
+        self._pages = {} # character -> list of page paths
+        self.load()
+
+    def load(self):
+        self._entries.clear()
+        self._pages.clear()
+        if not os.path.isdir(self.atlas_dir):
+            return
+        for name in os.listdir(self.atlas_dir):
+            if name.endswith(".json"):
+                self._load_index(os.path.join(self.atlas_dir, name))
+
+    def _load_index(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[FaceAtlas] Failed to load {path}: {e}")
+            return
+        if data.get("version") != ATLAS_VERSION:
+            return
+        pages = [os.path.join(self.atlas_dir, p).replace("\\", "/") for p in data.get("pages", [])]
+        if not all(os.path.exists(p) for p in pages):
+            print(f"[FaceAtlas] Missing pages for {data.get('character')}, ignoring {path}")
+            return
+        self._pages[data.get("character")] = pages
+        sources = data.get("sources", {})
+        stale = 0
+        for face_path, face in data.get("faces", {}).items():
+            if self._is_stale(face_path, sources.get(face_path)):
+                stale += 1 # Edited since packing: the loose file is loaded instead
+                continue
+            self._entries[face_path] = AtlasEntry(pages[face["page"]], tuple(face["rect"]), tuple(face["offset"]))
+        if stale:
+            print(f"[FaceAtlas] {stale} faces of {data.get('character')} changed since packing; re-run pack_face_atlas.py")
+
+    @staticmethod
+    def _is_stale(face_path: str, stamp) -> bool:
+        """Size + mtime differ from the stamp pack_face_atlas.py wrote (faces only in archives are trusted)."""
+        try:
+            st = os.stat(face_path)
+        except OSError:
+            return False
+        return stamp is None or [st.st_size, st.st_mtime_ns] != list(stamp)
+
+    def lookup(self, face_path: str) -> Optional[AtlasEntry]:
+        return self._entries.get(face_path)
+
+    def pages(self, character: str):
+        return self._pages.get(character, [])
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,374 +1,94 @@
-import asyncio
-import re
-from enum import Enum
+import time
 from PySide6.QtCore import QObject, Signal, QTimer, Slot
 import qasync
 
-# Mock Backend Import
-# In real usage: from src.llm_chain import LLMChain
-# We will assume LLMChain interface exists
+from .engine_core import EngineCore, GameState, builtin_commands
 
-class GameState(Enum):
-    IDLE = 0
-    GENERATING = 1
-    PLAYING = 2
-    TYPING = 3
-    WAITING_INPUT = 4 # Waiting for user to advance (e.g. after [r] or text finished)
-    PAUSED = 5 # General pause
-    WAITING_CLEAR = 6 # Waiting for user to confirm clear
+# GameState and builtin_commands are re-exported for existing imports.
 
-import json
-import os
 
-class GameEngine(QObject):
-    text_updated = Signal(str, str) # name, content
-    
-    def __init__(self, visual_manager, audio_manager, llm_chain):
-        super().__init__()
-        self.visual = visual_manager
-        self.audio = audio_manager
-        self.backend = llm_chain
-        
-        self.state = GameState.IDLE
-        self.is_auto_mode = False
-        self.text_speed = 50 # ms per char
-        self._current_speaker_name = "系统" # Default speaker
-
-        self._execution_queue = []
-        self._current_text_segment = ""
-        self._current_full_text = ""
-        self._typewriter_index = 0
-        
-        self.typing_timer = QTimer()
-        self.typing_timer.timeout.connect(self._type_step)
-        
-        # Load Registry
-        self.registry = {"music": [], "backgrounds": []}
-        try:
-            with open("assets/registry.json", "r", encoding="utf-8") as f:
-                self.registry = json.load(f)
-        except Exception as e:
-            print(f"Failed to load registry: {e}")
-
-        # Load Sound Map
-        self.sound_map = {}
-        try:
-            with open("assets/sound_map.json", "r", encoding="utf-8") as f:
-                self.sound_map = json.load(f)
-        except Exception as e:
-            print(f"Failed to load sound map: {e}")
-
-        # Sound Timer
-        self._sound_timer = QTimer()
-        self._sound_timer.setSingleShot(True)
-        self._sound_timer.timeout.connect(self._on_sound_timeout)
-
-    def _on_sound_timeout(self):
-        print("[GameEngine] Sound timer expired. Stopping loop.")
-        self.audio.stop_looping_sfx()
-
-    def set_text_speed(self, speed_ms: int):
-        self.text_speed = max(10, speed_ms)
-
-    @Slot(bool)
-    def set_auto_mode_slot(self, is_auto: bool):
-        self.is_auto_mode = is_auto
-        print(f"Auto mode set to: {is_auto}")
-        # If we were waiting for input, and auto mode is turned on, advance
-        if is_auto and self.state in [GameState.WAITING_INPUT, GameState.WAITING_CLEAR]:
-            self.user_advance_slot()
+class _PooledTimer:
+    """A single-shot QTimer that is reused for many call_later calls (one timeout connection for its lifetime)."""
 
-    @Slot()
-    def user_advance_slot(self):
-        """Called when user clicks, presses space, or auto-mode timer fires."""
-        if self.state == GameState.TYPING:
-            # Finish typing instantly
-            self._typewriter_index = len(self._current_text_segment)
-            self._type_step()
-        elif self.state == GameState.WAITING_INPUT:
-            # Continue execution queue
-            self.state = GameState.PLAYING
-            self._process_queue()
-        elif self.state == GameState.WAITING_CLEAR:
-            self._perform_clear()
-            self.state = GameState.PLAYING
-            self._process_queue()
+    def __init__(self, clock):
+        self._clock = clock
+        self.callback = None
+        self.generation = 0 # Bumped on every reuse, so stale handles cannot cancel the next callback
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._fire)
 
-    @qasync.asyncSlot(str)
-    async def handle_turn(self, user_input: str):
-        if self.state not in [GameState.IDLE, GameState.WAITING_INPUT]:
-            return
-            
-        self.state = GameState.GENERATING
-        self.text_updated.emit("思考中...", "")
-        
-        try:
-            # Execute backend turn (handles blocking check internally)
-            raw_response = await self.backend.execute_turn(user_input)
-            
-            # Check for blocking or error message
-            if raw_response.startswith("[System"):
-                 self.text_updated.emit("系统", raw_response)
-                 self.state = GameState.IDLE
-                 return
-
-            self._start_sequence(raw_response)
-            
-        except Exception as e:
-            print(f"Error: {e}")
-            self.state = GameState.IDLE
+    def _fire(self):
+        callback = self.callback
+        self._clock._release(self)
+        callback()
 
-    @qasync.asyncSlot()
-    async def start_new_game_flow(self):
-        """Kicks off the special opening sequence."""
-        self.state = GameState.GENERATING
-        self.text_updated.emit("系统", "正在生成开场剧情... (规划 -> 撰写 -> 导演)")
-        
-        # Clear Memory for new game
-        if self.backend and hasattr(self.backend, "memory"):
-             self.backend.memory.clear_memory() # Ensure we start fresh
-        
-        try:
-            response = await self.backend.run_opening_sequence()
-            
-            # Check for error
-            if response.startswith("[Error") or response.startswith("[System Error"):
-                 self.text_updated.emit("系统", response)
-                 self.state = GameState.IDLE
-                 return
 
-            self._start_sequence(response)
-        except Exception as e:
-            self.text_updated.emit("Error", f"Opening failed: {e}")
-            self.state = GameState.IDLE
+class _QtTimerHandle:
+    __slots__ = ("_pooled", "_generation")
 
-    def _start_sequence(self, response_text: str):
-        self.state = GameState.PLAYING
-        self._current_speaker_name = "系统" # Reset speaker at start of sequence
+    def __init__(self, pooled, generation):
+        self._pooled = pooled
+        self._generation = generation
 
-        # 0. Pre-process Speaker format
-        # Replace 【Name】『Content』 with [Speaker-Name]Content
-        # Using non-greedy match for content
-        processed_text = re.sub(r"【(.*?)】『(.*?)』", r"[Speaker-\1]\2", response_text)
-        
-        # 1. Execute instant commands (backgrounds, music, etc.)
-        tag_pattern = re.compile(r"\[(.*?)\]")
-        tags = tag_pattern.findall(processed_text)
-        
-        for tag in tags:
-            # Skip Speaker tags during asset execution
-            if tag.startswith("Speaker-"):
-                continue
-            self._execute_asset_command(tag)
-            
-        # 2. Prepare text sequence for playback
-        # Remove asset tags, but keep flow-control tags [r] and [C] AND [Speaker-...]
-        text_with_flow_tags = processed_text
-        for tag in tags:
-            if tag.upper() in ["R", "C"]:
-                 continue
-            if tag.startswith("Speaker-"):
-                 continue
-            text_with_flow_tags = text_with_flow_tags.replace(f"[{tag}]", "")
-        
-        # Tokenize by flow-control tags and Speaker tags
-        # Includes [Speaker-Name] in tokens
-        tokens = re.split(r'(\[r\]|\[C\]|\[Speaker-.*?\])', text_with_flow_tags, flags=re.IGNORECASE)
-        
-        self._execution_queue = [token.strip() for token in tokens if token.strip()]
-        self._current_full_text = ""
-        self._process_queue()
+    def cancel(self):
+        pooled = self._pooled
+        if pooled.generation == self._generation and pooled.callback is not None:
+            pooled.timer.stop()
+            pooled._clock._release(pooled)
 
-    def _process_queue(self):
-        if not self._execution_queue:
-            # End of sequence, wait for user to start next turn
-            self.state = GameState.WAITING_INPUT 
-            return
 
-        segment = self._execution_queue.pop(0)
-        
-        if segment.upper() == "[R]":
-            self.state = GameState.WAITING_INPUT
-            if self.is_auto_mode:
-                QTimer.singleShot(1000, self.user_advance_slot)
-        
-        elif segment.upper() == "[C]":
-            if self.is_auto_mode:
-                self._perform_clear()
-                # Continue processing after a delay in auto mode
-                QTimer.singleShot(5000, self._process_queue)
-            else:
-                # Manual mode: Wait for user input to clear
-                self.state = GameState.WAITING_CLEAR
+class QtClock:
+    """
+    EngineCore clock backed by single-shot QTimers (runs on the Qt event loop).
+    Timers are pooled: the typewriter schedules one callback per character, and
+    reuses the same QTimer instead of allocating one each time.
+    """
 
-        elif segment.startswith("[Speaker-"):
-            # Extract speaker name
-            # Format: [Speaker-Name]
-            try:
-                # remove brackets
-                inner = segment[1:-1]
-                parts = inner.split("-", 1)
-                if len(parts) > 1:
-                    self._current_speaker_name = parts[1]
-                else:
-                    self._current_speaker_name = "系统"
-            except:
-                self._current_speaker_name = "系统"
-            
-            # Proceed to next token immediately
-            self._process_queue()
+    def __init__(self):
+        self._idle = [] # Stopped timers ready for reuse
 
-        else: # It's a text segment
-            self.state = GameState.TYPING
-            self._current_text_segment = segment
-            self._typewriter_index = 0
-            self.typing_timer.start(self.text_speed)
+    def now_ms(self) -> float:
+        return time.monotonic() * 1000.0
 
-    def _perform_clear(self):
-        self._current_full_text = "" # Clear visual text
-        self._current_speaker_name = "系统" # Reset speaker on clear
-        self._sound_timer.stop() # Cancel any pending sound stop
-        self.audio.stop_looping_sfx() # Stop any looping sounds
-        self.text_updated.emit(self._current_speaker_name, self._current_full_text)
+    def call_later(self, delay_ms: float, callback):
+        pooled = self._idle.pop() if self._idle else _PooledTimer(self)
+        pooled.generation += 1
+        pooled.callback = callback
+        pooled.timer.start(int(delay_ms))
+        return _QtTimerHandle(pooled, pooled.generation)
 
-    def _type_step(self):
-        if self._typewriter_index < len(self._current_text_segment):
-            self._typewriter_index += 1
-            new_char = self._current_text_segment[self._typewriter_index-1]
-            self._current_full_text += new_char
-            self.text_updated.emit(self._current_speaker_name, self._current_full_text)
-        else:
-            self.typing_timer.stop()
-            # Finished typing this segment, move to the next
-            self._process_queue()
+    def _release(self, pooled):
+        pooled.callback = None
+        pooled.generation += 1
+        self._idle.append(pooled)
 
-    def _execute_asset_command(self, tag: str):
-        parts = tag.split("-")
-        category = parts[0]
-        
-        # Memory Reference
-        memory = self.backend.memory if self.backend and hasattr(self.backend, "memory") else None
 
-        if category == "Background" and len(parts) > 1:
-            bg_name = parts[1]
-            self.visual.set_background(bg_name)
-            if memory:
-                memory.state.current_bg = bg_name
-                # memory.save_gamestate() # Optional: save on every change?
-
-        elif category == "Music" and len(parts) > 1:
-            music_name = parts[1]
-            self._play_music(music_name)
-            if memory:
-                memory.state.current_bgm = music_name
-
-        elif category == "StopBGM":
-            self.audio.stop_bgm()
-            if memory:
-                memory.state.current_bgm = "None"
-
-        elif category == "sound" and len(parts) > 1:
-            self._play_sound(parts)
-        elif category == "StopSound":
-            self.audio.stop_sfx()
-        
-        elif category == "立绘" and len(parts) > 2:
-            name, action = parts[1], parts[2]
-            if hasattr(self.visual, "presets") and action in self.visual.presets:
-                self.visual.apply_preset(name, action)
-            else:
-                self.visual.animate_sprite(name, action.lower())
-
-        elif category == "Sprite" and len(parts) > 2:
-            self.visual.apply_preset(parts[1], parts[2])
-        
-        elif category == "fg" and len(parts) > 2:
-            name, expr = parts[1], parts[2]
-            self.visual.set_expression(name, expr)
-            if memory:
-                memory.state.visible_characters[name] = expr
-
-        elif category in ["Join", "Enter"] and len(parts) > 1:
-            name = parts[1]
-            preset = parts[2] if len(parts) > 2 else "pos_center"
-            self.visual.join_character(name, preset)
-            if memory:
-                 # Default expr? VisualManager handles it, maybe we should ask VM or just assume default
-                 # Or just track presence. We can assume 'default' if unknown.
-                 current_expr = memory.state.visible_characters.get(name, "default")
-                 memory.state.visible_characters[name] = current_expr
-
-        elif category in ["Leave", "Exit"] and len(parts) > 1:
-            name = parts[1]
-            self.visual.remove_sprite(name)
-            if memory and name in memory.state.visible_characters:
-                del memory.state.visible_characters[name]
-        
-        # New: Date Change [日期-2026-01-07]
-        elif category == "日期" and len(parts) > 1:
-            new_date = parts[1]
-            if memory:
-                memory.state.date = new_date
-                memory.save_gamestate()
-                print(f"[GameEngine] Date changed to: {new_date}")
+class GameEngine(QObject, EngineCore):
+    """Qt adapter around EngineCore: QTimer clock, signals and slots."""
+    text_updated = Signal(str, str) # name, content
+    line_finished = Signal(str, str) # name, full segment (emitted once a segment is fully shown)
+    
+    def __init__(self, visual_manager, audio_manager, llm_chain):
+        # PySide6 forwards keyword arguments to the next base (cooperative init)
+        super().__init__(visual_manager=visual_manager, audio_manager=audio_manager,
+                         llm_chain=llm_chain, clock=QtClock())
+        self.text_listeners.append(self.text_updated.emit)
+        self.line_listeners.append(self.line_finished.emit)
 
-        # New: Affection Change [Name-好感-+10]
-        elif len(parts) > 2 and parts[1] == "好感":
-            name = parts[0]
-            try:
-                # Handle "+10", "-5", "5"
-                delta = int(parts[2])
-                if memory:
-                    current = memory.state.favorability.get(name, 0)
-                    new_val = current + delta
-                    memory.state.favorability[name] = new_val
-                    memory.save_gamestate()
-                    print(f"[GameEngine] {name} favorability updated: {current} -> {new_val} (Delta: {delta})")
-            except ValueError:
-                print(f"[GameEngine] Invalid affection value: {parts[2]}")
-            
-    def _play_music(self, music_name: str):
-        found_entry = next((item for item in self.registry.get("music", []) if item["name"] == music_name), None)
-        if found_entry:
-            file_path = os.path.join("assets/bgm", found_entry["file"])
-            if os.path.exists(file_path):
-                self.audio.play_bgm(file_path)
-            else:
-                print(f"Music file missing: {file_path}")
-        else:
-            # Fallback search (not recommended)
-            print(f"Music not found in registry: {music_name}")
+    @Slot(bool)
+    def set_auto_mode_slot(self, is_auto: bool):
+        self.set_auto_mode(is_auto)
 
-    def _play_sound(self, parts):
-        # [sound-name-duration]
-        sound_name = parts[1]
-        duration_ms = 0
-        if len(parts) > 2:
-            try:
-                duration_ms = int(parts[2])
-            except:
-                pass
-        
-        # Look up in sound_map
-        if sound_name in self.sound_map:
-            file_path = self.sound_map[sound_name]["file"]
-        else:
-            # Fallback: Check if file exists in assets/sound/sound_name.ogg
-            file_path = os.path.join("assets/sound", f"{sound_name}.ogg")
-            if not os.path.exists(file_path):
-                print(f"Sound not found: {sound_name}")
-                return
+    @Slot()
+    def user_advance_slot(self):
+        """Called when user clicks or presses space."""
+        self.user_advance()
 
-        # Stop previous timer if any
-        self._sound_timer.stop()
-        
-        print(f"[GameEngine] Playing Sound: {sound_name}, Path: {file_path}, Duration: {duration_ms}ms")
+    @qasync.asyncSlot(str)
+    async def handle_turn(self, user_input: str):
+        await EngineCore.handle_turn(self, user_input)
 
-        if duration_ms > 0:
-            # Loop with timeout
-            self.audio.play_sfx(file_path, loop=True)
-            self._sound_timer.setInterval(duration_ms)
-            self._sound_timer.start()
-        else:
-            # One-shot
-            self.audio.play_sfx(file_path, loop=False)
\ No newline at end of file
+    @qasync.asyncSlot()
+    async def start_new_game_flow(self):
+        await EngineCore.start_new_game_flow(self)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from PySide6.QtGui import QPixmap
+
+
+class PixmapCache:
+    """
+    LRU cache of decoded QPixmaps bounded by a byte budget.
+
+    Keys are (path, variant) tuples; variant is None for the file as-is or
+    e.g. a target size for pre-scaled backgrounds. Entries pinned by an owner
+    (a character on stage, the current background) are never evicted, even if
+    that pushes the cache over budget; they become evictable again on unpin.
+
+    QPixmap is GUI-thread only, so the cache must only be used from there.
+    """
+
+    def __init__(self, budget_bytes: int = 256 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict() # key -> (pixmap, cost)
+        self._pins = {} # owner -> set of keys
+        self._pin_counts = {} # key -> number of owners pinning it
+        self._eviction_observers = [] # callback(key) for entries dropped by the budget or clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str, variant=None, loader=None) -> QPixmap:
+        """
+        Returns the cached pixmap for (path, variant), decoding it on a miss.
+        `loader(path)` builds the pixmap for non-trivial variants; the default
+        loads the file as-is. Returns a null QPixmap if decoding fails.
+        """
+        key = (path, variant)
+        pixmap = self.lookup(key)
+        if pixmap is not None:
+            return pixmap
+
+        pixmap = loader(path) if loader else QPixmap(path)
+        if not pixmap.isNull():
+            self.put(key, pixmap)
+        return pixmap
+
+    def lookup(self, key):
+        """Returns the cached pixmap (counted as hit, moved to most recent) or None (counted as miss)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, pixmap: QPixmap):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        cost = self.cost(pixmap)
+        self._entries[key] = (pixmap, cost)
+        self.bytes += cost
+        self._evict()
+
+    def peek(self, key):
+        """Returns the cached pixmap without touching LRU order or counters (None if absent)."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def pin(self, owner, keys):
+        """Replaces the set of keys pinned by `owner`."""
+        new_keys = {k for k in keys if k is not None}
+        old_keys = self._pins.get(owner, set())
+        for key in new_keys - old_keys:
+            self._pin_counts[key] = self._pin_counts.get(key, 0) + 1
+        for key in old_keys - new_keys:
+            self._release(key)
+        if new_keys:
+            self._pins[owner] = new_keys
+        else:
+            self._pins.pop(owner, None)
+        self._evict()
+
+    def unpin(self, owner):
+        for key in self._pins.pop(owner, set()):
+            self._release(key)
+        self._evict()
+
+    def _release(self, key):
+        count = self._pin_counts.get(key, 0) - 1
+        if count > 0:
+            self._pin_counts[key] = count
+        else:
+            self._pin_counts.pop(key, None)
+
+    def add_eviction_observer(self, callback):
+        """Register `callback(key)`, called whenever an entry leaves the cache (not when it is replaced)."""
+        self._eviction_observers.append(callback)
+
+    def _dropped(self, key):
+        for callback in self._eviction_observers:
+            callback(key)
+
+    def is_pinned(self, key) -> bool:
+        return key in self._pin_counts
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = max(0, int(budget_bytes))
+        self._evict()
+
+    def _evict(self):
+        if self.bytes <= self.budget_bytes:
+            return
+        for key in list(self._entries.keys()): # Oldest first
+            if self.bytes <= self.budget_bytes:
+                break
+            if key in self._pin_counts:
+                continue
+            _, cost = self._entries.pop(key)
+            self.bytes -= cost
+            self.evictions += 1
+            self._dropped(key)
+
+    def clear(self):
+        """Drops every unpinned entry."""
+        for key in list(self._entries.keys()):
+            if key not in self._pin_counts:
+                self.bytes -= self._entries.pop(key)[1]
+                self._dropped(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "pinned": len(self._pin_counts),
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,163 @@
+import os
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+from .image_cache import PixmapCache
+from .asset_archive import AssetArchives
+
+PRIORITY_REQUEST = 10 # Needed for the frame being shown
+PRIORITY_PREFETCH = 0 # Hinted, may never be used
+
+
+class _DecodeSignals(QObject):
+    # key, QImage (null on failure); emitted from worker threads, delivered queued on the GUI thread
+    decoded = Signal(object, object)
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, key, transform, decoder, signals: _DecodeSignals):
+        super().__init__()
+        self.key = key
+        self.transform = transform
+        self.decoder = decoder
+        self.signals = signals
+
+    def run(self):
+        self.signals.decoded.emit(self.key, _decode(self.key[0], self.transform, self.decoder))
+
+
+def load_image(path: str, archives: AssetArchives = None) -> QImage:
+    """Decodes `path` from a mounted archive (no file open) or from disk. Thread-safe."""
+    data = archives.data(path) if archives else None
+    if data is None:
+        return QImage(path)
+    image = QImage()
+    # This binding only takes bytes here: one copy of the compressed slice, in the worker.
+    # The format comes from the extension, as with files, instead of probing every decoder.
+    image.loadFromData(bytes(data), os.path.splitext(path)[1][1:].upper() or None)
+    return image
+
+
+def _decode(path, transform, decoder) -> QImage:
+    try:
+        image = decoder(path)
+    except Exception as e:
+        print(f"[ImageLoader] Decoder failed for {path}: {e}")
+        return QImage()
+    if not image.isNull() and transform:
+        image = transform(image)
+    return image
+
+
+class ImageLoader(QObject):
+    """
+    Decodes images on a QThreadPool and delivers them to the GUI thread.
+
+    Only QImage is touched off the GUI thread; the QPixmap conversion and the
+    PixmapCache insert happen when the result arrives. Requests for a key that
+    is already decoding join the pending task instead of decoding again.
+
+    With max_threads=0 every request decodes synchronously (headless tools,
+    deterministic measurements).
+    """
+
+    def __init__(self, cache: PixmapCache, max_threads: int = 2, archives: AssetArchives = None):
+        super().__init__()
+        self.cache = cache
+        self.archives = archives
+        self.synchronous = max_threads <= 0
+        self.pool = QThreadPool()
+        if not self.synchronous:
+            self.pool.setMaxThreadCount(max_threads)
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._pending = {} # key -> list of callbacks
+        self._prefetched = set() # keys decoded by prefetch and not requested yet
+        # A prefetch evicted before it was used is simply wasted: forget it so the set stays bounded
+        cache.add_eviction_observer(self._prefetched.discard)
+
+        self.decoded = 0
+        self.failed = 0
+        self.prefetch_requests = 0
+        self.prefetch_hits = 0
+
+    def request(self, path: str, callback, variant=None, transform=None, priority: int = PRIORITY_REQUEST, decoder=None):
+        """
+        Calls `callback(pixmap)` with the image for (path, variant): immediately
+        on a cache hit, otherwise once decoded. `decoder(path) -> QImage`
+        replaces the plain decode (read_image) and `transform(QImage) -> QImage` runs
+        after it; both run in the worker. Failed decodes are reported and the
+        callback is not called.
+        """
+        key = (path, variant)
+        pixmap = self.cache.lookup(key)
+        if pixmap is not None:
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.prefetch_hits += 1
+            callback(pixmap)
+            return
+
+        if self.synchronous:
+            pixmap = self._store(key, _decode(path, transform, decoder or self.read_image))
+            if pixmap is not None:
+                callback(pixmap)
+            return
+
+        if key in self._pending:
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.prefetch_hits += 1
+            self._pending[key].append(callback)
+            return
+        self._pending[key] = [callback]
+        self.pool.start(_DecodeTask(key, transform, decoder or self.read_image, self._signals), priority)
+
+    def prefetch(self, path: str, variant=None, transform=None, decoder=None):
+        """Starts a low-priority decode unless the image is cached or already pending."""
+        key = (path, variant)
+        if key in self.cache or key in self._pending or self.synchronous:
+            return
+        self.prefetch_requests += 1
+        self._prefetched.add(key)
+        self._pending[key] = []
+        self.pool.start(_DecodeTask(key, transform, decoder or self.read_image, self._signals), PRIORITY_PREFETCH)
+
+    def read_image(self, path: str) -> QImage:
+        """The plain decode: packed asset or file."""
+        return load_image(path, self.archives)
+
+    def _store(self, key, image: QImage):
+        if image.isNull():
+            self.failed += 1
+            print(f"[ImageLoader] Failed to decode: {key[0]}")
+            return None
+        self.decoded += 1
+        pixmap = QPixmap.fromImage(image)
+        self.cache.put(key, pixmap)
+        return pixmap
+
+    def _on_decoded(self, key, image):
+        callbacks = self._pending.pop(key, [])
+        pixmap = self._store(key, image)
+        if pixmap is None:
+            self._prefetched.discard(key)
+            return
+        for callback in callbacks:
+            callback(pixmap)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def wait(self, timeout_ms: int = -1) -> bool:
+        """Blocks until workers are idle (results still arrive via the event loop)."""
+        return self.pool.waitForDone(timeout_ms)
+
+    def stats(self) -> dict:
+        return {
+            "decoded": self.decoded,
+            "failed": self.failed,
+            "pending": len(self._pending),
+            "prefetch_requests": self.prefetch_requests,
+            "prefetch_hits": self.prefetch_hits,
+        }
@@ -0,0 +1,196 @@
+"""
+NumPy helpers for the offline asset tools (pack_face_atlas.py, build_sprite_mips.py, dedupe_images.py,
+optimize_assets.py).
+The runtime does not import this module, so NumPy stays a build-time dependency.
+"""
+import numpy as np
+from PySide6.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QImageWriter, qRgba
+
+
+def image_to_array(image: QImage, premultiplied: bool = False) -> np.ndarray:
+    """
+    H x W x 4 uint8 view (B, G, R, A on little endian) of an ARGB32 copy of
+    `image`. Premultiplied, fully transparent pixels are all zero whatever
+    colour the file stores under them.
+    """
+    image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied if premultiplied else QImage.Format.Format_ARGB32)
+    array = np.frombuffer(image.constBits(), np.uint8).reshape(image.height(), image.bytesPerLine() // 4, 4)
+    # Copy so the array does not outlive the QImage buffer
+    return array[:, :image.width()].copy()
+
+
+def alpha_bbox(image: QImage, threshold: int = 0):
+    """(x, y, w, h) of the pixels with alpha > threshold, or None if fully transparent."""
+    alpha = image_to_array(image)[..., 3] > threshold
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(alpha.any(axis=0))
+    return (int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+
+def shelf_pack(sizes, page_size: int, padding: int = 1):
+    """
+    Packs (w, h) rectangles onto pages of page_size x page_size, tallest first.
+    Returns [(page, x, y)] in input order.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements = [None] * len(sizes)
+    page, x, y, shelf_h = 0, 0, 0, 0
+    for i in order:
+        w, h = sizes[i]
+        if w > page_size or h > page_size:
+            raise ValueError(f"{w}x{h} does not fit a {page_size}px page")
+        if x + w > page_size: # Next shelf
+            x, y, shelf_h = 0, y + shelf_h + padding, 0
+        if y + h > page_size: # Next page
+            page, x, y, shelf_h = page + 1, 0, 0, 0
+        placements[i] = (page, x, y)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+    return placements
+
+
+# --- Perceptual hashes (64-bit ints; similar images differ in few bits) ---
+
+def luminance(image: QImage, width: int, height: int) -> np.ndarray:
+    """
+    Float32 height x width luma of `image` scaled down smoothly. Transparent
+    pixels count as mid grey, so faces with different outlines hash apart.
+    """
+    small = image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    pixels = image_to_array(small).astype(np.float32)
+    luma = pixels[..., 2] * 0.299 + pixels[..., 1] * 0.587 + pixels[..., 0] * 0.114
+    alpha = pixels[..., 3] / 255.0
+    return luma * alpha + 128.0 * (1.0 - alpha)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel().astype(np.uint8)).tobytes(), "big")
+
+
+def dhash(image: QImage) -> int:
+    """Difference hash: is each of 8x8 pixels brighter than its right neighbour."""
+    luma = luminance(image, 9, 8)
+    return _bits_to_int(luma[:, 1:] > luma[:, :-1])
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash(image: QImage) -> int:
+    """DCT hash: the 8x8 lowest frequencies of a 32x32 luma, each above or below their median (DC excluded)."""
+    coefficients = (_DCT32 @ luminance(image, 32, 32) @ _DCT32.T)[:8, :8]
+    return _bits_to_int(coefficients > np.median(coefficients.ravel()[1:]))
+
+
+def max_difference(a: QImage, b: QImage) -> int:
+    """Largest per-channel difference between two images of the same size (premultiplied: hidden colour is ignored)."""
+    diff = np.abs(image_to_array(a, True).astype(np.int16) - image_to_array(b, True).astype(np.int16))
+    return int(diff.max()) if diff.size else 0
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], np.uint8)
+
+
+def hamming_pairs(hashes, max_distance: int, chunk: int = 1024):
+    """
+    (i, j, distance) for every pair i < j of 64-bit hashes at most
+    `max_distance` bits apart. Vectorised in row chunks: all pairs of a few
+    thousand images take well under a second.
+    """
+    values = np.array([h & 0xFFFFFFFFFFFFFFFF for h in hashes], np.uint64)
+    pairs = []
+    for start in range(0, len(values), chunk):
+        rows = values[start:start + chunk]
+        distances = _POPCOUNT[(rows[:, None] ^ values[None, :]).view(np.uint8)].reshape(len(rows), len(values), 8).sum(axis=2)
+        for i, j in zip(*np.nonzero(distances <= max_distance)):
+            i += start
+            if i < j:
+                pairs.append((int(i), int(j), int(distances[i - start, j])))
+    return pairs
+
+
+# --- Encoding ---
+
+def encode_image(image: QImage, fmt: str, quality: int = -1) -> bytes:
+    """
+    `image` encoded in memory. Qt's quality: JPEG/WebP 0-100 (WebP 100 is
+    lossless), PNG 0 is the strongest zlib level.
+    """
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    writer = QImageWriter(buffer, fmt.encode())
+    writer.setQuality(quality)
+    if not writer.write(image):
+        raise ValueError(f"cannot encode {fmt}: {writer.errorString()}")
+    return bytes(data)
+
+
+def distinct_colours(image: QImage) -> int:
+    """Number of distinct RGBA values, fully transparent pixels counting as one."""
+    pixels = image_to_array(image).reshape(-1, 4)
+    pixels[pixels[:, 3] == 0] = 0
+    return len(np.unique(pixels.view(np.uint32).ravel()))
+
+
+def quantize(image: QImage, colors: int = 256) -> QImage:
+    """
+    Indexed8 copy of `image` with an RGBA palette of at most `colors`
+    entries, by median cut over the distinct colours (weighted by pixel
+    count). Exact, i.e. lossless, when the image has no more colours than
+    that. Colour under fully transparent pixels is dropped.
+    """
+    pixels = image_to_array(image).reshape(-1, 4)
+    pixels[pixels[:, 3] == 0] = 0
+    unique, inverse, counts = np.unique(pixels.view(np.uint32).ravel(), return_inverse=True, return_counts=True)
+    values = unique.view(np.uint8).reshape(-1, 4).astype(np.int64)
+
+    if len(unique) <= colors:
+        box_of = np.arange(len(unique))
+        palette = values
+    else:
+        def stats(members):
+            spread = values[members].max(axis=0) - values[members].min(axis=0)
+            return int(spread.max()) * int(counts[members].sum()), int(spread.argmax())
+
+        boxes = [np.arange(len(unique))]
+        priorities = [stats(boxes[0])]
+        while len(boxes) < colors:
+            i = max(range(len(boxes)), key=lambda k: priorities[k][0])
+            if priorities[i][0] == 0:
+                break # Every box holds a single colour
+            members = boxes[i]
+            order = members[np.argsort(values[members, priorities[i][1]], kind="stable")]
+            weights = np.cumsum(counts[order])
+            cut = int(np.clip(np.searchsorted(weights, weights[-1] / 2) + 1, 1, len(order) - 1))
+            boxes[i:i + 1] = [order[:cut], order[cut:]]
+            priorities[i:i + 1] = [stats(order[:cut]), stats(order[cut:])]
+        box_of = np.empty(len(unique), np.int64)
+        palette = np.empty((len(boxes), 4), np.int64)
+        for n, members in enumerate(boxes):
+            box_of[members] = n
+            weights = counts[members][:, None]
+            palette[n] = (values[members] * weights).sum(axis=0) // weights.sum()
+
+    height, width = image.height(), image.width()
+    indices = np.ascontiguousarray(box_of[inverse].reshape(height, width).astype(np.uint8))
+    out = QImage(indices.data, width, height, width, QImage.Format.Format_Indexed8).copy()
+    out.setColorTable([qRgba(int(r), int(g), int(b), int(a)) for b, g, r, a in palette])
+    return out
+
+
+def psnr(a: QImage, b: QImage) -> float:
+    """Peak signal-to-noise ratio in dB of `b` against `a` (premultiplied RGBA); inf when identical."""
+    diff = image_to_array(a, True).astype(np.float64) - image_to_array(b, True).astype(np.float64)
+    mse = float(np.mean(diff * diff))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 * 255.0 / mse)
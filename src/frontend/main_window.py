@@ -8,13 +8,17 @@ import re
 
 from .visual_manager import VisualManager
 from .audio_manager import AudioManager
+from .animation_scheduler import AnimationScheduler
+from .thumbnail import ThumbnailWriter, render_scene_thumbnail
 from .game_engine import GameEngine
-from .pages import MainMenuPage, ConfigPage, SaveLoadPage, GamePage, MemoryPage, EditorPage, DebugPage, NewGamePage, CustomPersonaPage
+from .engine_recorder import EngineRecorder
+from .pages import MainMenuPage, ConfigPage, SaveLoadPage, GamePage, MemoryPage, EditorPage, DebugPage, NewGamePage, CustomPersonaPage, BacklogPage
 from ..llm_chain import LLMChain
 from .styles import MAIN_STYLESHEET
 
 import json
 import os
+import time
 
 class MainWindow(QMainWindow):
     memory_updated_signal = Signal()
@@ -27,8 +31,9 @@ class MainWindow(QMainWindow):
         
         # 1. Managers
         self.scene = QGraphicsScene(0, 0, 1920, 1080)
-        self.visual = VisualManager(self.scene)
-        self.audio = AudioManager()
+        self.animator = AnimationScheduler() # One frame loop for every fade and motion
+        self.visual = VisualManager(self.scene, animator=self.animator)
+        self.audio = AudioManager(animator=self.animator)
         
         self.config = {}
         if os.path.exists("config.json"):
@@ -41,6 +46,14 @@ class MainWindow(QMainWindow):
         self.backend = LLMChain(config=self.config)
         self.engine = GameEngine(self.visual, self.audio, self.backend)
         
+        # Optional session recording (replay headlessly with replay_engine.py)
+        self.recorder = None
+        if self.config.get("record_engine", False):
+            rec_path = os.path.join("recordings", f"session_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+            self.recorder = EngineRecorder(rec_path)
+            self.recorder.attach(self.engine)
+            print(f"Recording engine events to {rec_path}")
+        
         # 2. Pages Stack
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
@@ -48,17 +61,21 @@ class MainWindow(QMainWindow):
         # 3. Create Pages
         self.page_main = MainMenuPage()
         self.page_config = ConfigPage()
-        self.page_save = SaveLoadPage(parent_widget_to_grab=self, memory_manager=self.backend.memory) # Pass self for screenshot
+        self.thumbnails = ThumbnailWriter() # Save screenshots are encoded off the GUI thread
+        self.page_save = SaveLoadPage(parent_widget_to_grab=self, memory_manager=self.backend.memory,
+                                      scene=self.scene, thumbnails=self.thumbnails)
         self.page_game = GamePage(self.visual)
         self.page_memory = MemoryPage()
         self.page_editor = EditorPage()
         self.page_debug = DebugPage(self.visual, self.audio) # Index 8
         self.page_new_game = NewGamePage() # Index 9
         self.page_custom = CustomPersonaPage() # Index 10
+        self.page_backlog = BacklogPage(self.backend.memory.turn_archive) # Index 11
         
         # In-Game Sub-pages
         self.page_game_config = ConfigPage()
-        self.page_game_save = SaveLoadPage(parent_widget_to_grab=self.page_game, memory_manager=self.backend.memory)
+        self.page_game_save = SaveLoadPage(parent_widget_to_grab=self.page_game, memory_manager=self.backend.memory,
+                                           scene=self.scene, thumbnails=self.thumbnails)
         
         self.stack.addWidget(self.page_main) # Index 0
         self.stack.addWidget(self.page_config) # Index 1
@@ -71,6 +88,7 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.page_debug) # Index 8
         self.stack.addWidget(self.page_new_game) # Index 9
         self.stack.addWidget(self.page_custom) # Index 10
+        self.stack.addWidget(self.page_backlog) # Index 11
         
         # 4. Connect Signals
         # Main Menu
@@ -101,6 +119,7 @@ class MainWindow(QMainWindow):
         self.page_game.save_load_signal.connect(self.on_game_menu)
         self.page_game.save_exit_signal.connect(self.on_save_exit)
         self.page_game.memory_signal.connect(lambda: self.switch_to(6))
+        self.page_game.backlog_signal.connect(lambda: self.switch_to(11))
         self.page_game.input_signal.connect(self.engine.handle_turn)
         self.page_game.input_advance_signal.connect(self.engine.user_advance_slot)
         self.page_game.auto_mode_signal.connect(self.engine.set_auto_mode_slot)
@@ -116,6 +135,9 @@ class MainWindow(QMainWindow):
         # Memory Page
         self.page_memory.back_signal.connect(lambda: self.switch_to(3))
         
+        # Backlog Page
+        self.page_backlog.back_signal.connect(lambda: self.switch_to(3))
+        
         # Editor Page
         self.page_editor.back_signal.connect(lambda: self.switch_to(0))
         
@@ -133,6 +155,12 @@ class MainWindow(QMainWindow):
         self.switch_to(3) # Game Page
         await self.engine.start_new_game_flow()
 
+    def closeEvent(self, event):
+        if self.recorder:
+            self.recorder.close()
+        self.thumbnails.wait() # Finish writing save thumbnails
+        super().closeEvent(event)
+
     def on_memory_updated(self):
         big = self.backend.memory.big_summary
         small = self.backend.memory.small_summaries
@@ -158,6 +186,8 @@ class MainWindow(QMainWindow):
         self.audio.set_bgm_volume(self.config.get("vol_bgm", 50) / 100.0)
         self.audio.set_sfx_volume(self.config.get("vol_sfx", 50) / 100.0)
         self.audio.set_voice_volume(self.config.get("vol_voice", 50) / 100.0)
+        self.audio.sfx_pool.set_polyphony(self.config.get("sfx_polyphony", 4))
+        self.audio.streamer.set_budget(self.config.get("audio_cache_mb", 32) * 1024 * 1024)
         
         # Apply Global Font Settings
         font_family = self.config.get("font_family", "Default")
@@ -181,6 +211,17 @@ class MainWindow(QMainWindow):
         # Apply text speed
         self.engine.set_text_speed(self.config.get("text_speed", 50))
 
+        # Decoded image budget (bodies, faces, backgrounds)
+        self.visual.cache.set_budget(self.config.get("image_cache_mb", 256) * 1024 * 1024)
+        self.visual.set_composite_sprites(self.config.get("composite_sprites", False))
+
+        # Tweens jump to their end values when motion is reduced
+        self.animator.set_reduce_motion(self.config.get("reduce_motion", False))
+        self.animator.budget_ms = self.config.get("animation_budget_ms", 4.0)
+
+        # Viewport backend, update mode, item caching and FPS overlay of the game view
+        self.page_game.apply_render_config(self.config)
+
     def on_config_back(self):
         self.reload_config()
         self.switch_to(0)
@@ -203,15 +244,18 @@ class MainWindow(QMainWindow):
             self.on_memory_updated() # Force refresh when opening
         elif index == 7: # Editor Page
             self.page_editor.refresh_data()
+        elif index == 11: # Backlog Page
+            self.page_backlog.refresh()
             
         self.stack.setCurrentIndex(index)
 
     def on_game_menu(self):
-        self.page_game_save.set_temp_screenshot(self.page_game.grab())
+        # Thumbnail-sized render of the scene, taken before the game page hides its UI
+        self.page_game_save.set_temp_screenshot(render_scene_thumbnail(self.scene))
         self.switch_to(5) # Switch to In-Game Save Page
         
     def on_save_exit(self):
-        self.page_game_save.set_temp_screenshot(self.page_game.grab())
+        self.page_game_save.set_temp_screenshot(render_scene_thumbnail(self.scene))
         
         # Determine next slot ID
         max_id = 0
@@ -251,6 +295,13 @@ class MainWindow(QMainWindow):
 
             if state_data:
                 self.backend.memory.load_from_dict(state_data)
+                # The save's own backlog (a new timeline file, same archive object)
+                self.page_backlog.set_archive(self.backend.memory.turn_archive)
+                # Warm the image cache for whoever is on stage in the save
+                state = self.backend.memory.state
+                self.visual.prefetch(characters=state.visible_characters)
+                if state.current_bg and state.current_bg != "None":
+                    self.visual.prefetch_background(state.current_bg)
                 # Refresh UI
                 self.page_game.set_text("系统", "游戏已读取。")
                 self.on_memory_updated()
@@ -4,7 +4,8 @@ from PySide6.QtWidgets import (
     QTabWidget, QGroupBox, QFormLayout, QComboBox, QFileDialog, QSpinBox, 
     QCheckBox, QTextEdit, QInputDialog, QDoubleSpinBox, QGraphicsProxyWidget,
     QMessageBox, QHeaderView, QListWidget, QListWidgetItem, QAbstractItemView, 
-    QTableWidget, QTableWidgetItem, QSplitter, QTreeWidget, QTreeWidgetItem
+    QTableWidget, QTableWidgetItem, QSplitter, QTreeWidget, QTreeWidgetItem,
+    QListView
 )
 from PySide6.QtCore import Qt, Signal, QDateTime
 from PySide6.QtGui import QPixmap, QFontDatabase, QFont, QPainter, QColor
@@ -15,9 +16,26 @@ import re
 import qasync
 from ..infrastructure import APIClient
 from .game_engine import GameEngine
+from .backlog import BacklogModel, BacklogDelegate
+from .render_backend import GameView
+from .thumbnail import ThumbnailWriter, render_scene_thumbnail
 from .styles import MENU_BUTTON_STYLE, GAME_TEXT_FRAME_STYLE, GAME_INPUT_STYLE, SAVE_SLOT_STYLE
 
 # --- Main Menu ---
+MENU_BACKGROUND = "天空_上午_晴天" # background_map.json key shown behind the menu pages
+
+
+def load_menu_background() -> QPixmap:
+    """Looked up in background_map.json, so re-encoded or renamed files (optimize_assets.py) are followed."""
+    bg_path = None
+    try:
+        with open("assets/background_map.json", "r", encoding="utf-8") as f:
+            bg_path = json.load(f).get(MENU_BACKGROUND, {}).get("file")
+    except Exception as e:
+        print(f"[Pages] Failed to load background map: {e}")
+    return QPixmap(bg_path) if bg_path and os.path.exists(bg_path) else QPixmap()
+
+
 class MainMenuPage(QWidget):
     start_signal = Signal()
     load_signal = Signal()
@@ -29,11 +47,7 @@ class MainMenuPage(QWidget):
     def __init__(self):
         super().__init__()
         # Try to load a nice background
-        bg_path = "assets/bg/bg01_am.jpg"
-        if os.path.exists(bg_path):
-            self.bg_pixmap = QPixmap(bg_path)
-        else:
-            self.bg_pixmap = QPixmap()
+        self.bg_pixmap = load_menu_background()
 
         # Main Layout
         layout = QVBoxLayout()
@@ -91,11 +105,7 @@ class NewGamePage(QWidget):
     def __init__(self):
         super().__init__()
         # Load background
-        bg_path = "assets/bg/bg01_am.jpg"
-        if os.path.exists(bg_path):
-            self.bg_pixmap = QPixmap(bg_path)
-        else:
-            self.bg_pixmap = QPixmap()
+        self.bg_pixmap = load_menu_background()
 
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -156,11 +166,7 @@ class CustomPersonaPage(QWidget):
     def __init__(self):
         super().__init__()
         # Load background
-        bg_path = "assets/bg/bg01_am.jpg"
-        if os.path.exists(bg_path):
-            self.bg_pixmap = QPixmap(bg_path)
-        else:
-            self.bg_pixmap = QPixmap()
+        self.bg_pixmap = load_menu_background()
 
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -674,6 +680,13 @@ class ConfigPage(QWidget):
             "font_bold": self.chk_font_bold.isChecked(),
             "text_speed": self.spin_text_speed.value()
         }
+        # Keep settings that have no widget here (e.g. image_cache_mb, record_engine)
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r') as f:
+                    data = {**json.load(f), **data}
+            except Exception:
+                pass
         with open(self.config_file, 'w') as f:
             json.dump(data, f)
             
@@ -721,11 +734,15 @@ class SaveLoadPage(QWidget):
     back_signal = Signal()
     load_game_signal = Signal(str) # filename
 
-    def __init__(self, parent_widget_to_grab=None, memory_manager=None):
+    def __init__(self, parent_widget_to_grab=None, memory_manager=None, scene=None, thumbnails: ThumbnailWriter = None):
         super().__init__()
         self.parent_widget_to_grab = parent_widget_to_grab # Reference to GamePage or MainWindow
         self.memory_manager = memory_manager
-        self.temp_screenshot = None
+        self.scene = scene # Rendered directly at thumbnail size when there is no temp screenshot
+        self.temp_screenshot = None # QImage
+        # PNG encoding runs off the GUI thread; slots refresh once the file is written
+        self.thumbnails = thumbnails or ThumbnailWriter()
+        self.thumbnails.saved.connect(self._on_thumbnail_saved)
         self.current_page = 1
         self.slots_per_page = 16 # 4x4
         self.save_dir = "saves"
@@ -763,8 +780,14 @@ class SaveLoadPage(QWidget):
         
         self.refresh_slots()
 
-    def set_temp_screenshot(self, pixmap):
-        self.temp_screenshot = pixmap
+    def set_temp_screenshot(self, image):
+        if isinstance(image, QPixmap):
+            image = image.toImage()
+        self.temp_screenshot = image
+
+    def _on_thumbnail_saved(self, path: str, ok: bool):
+        if ok and self.isVisible() and os.path.dirname(path) == self.save_dir:
+            self.refresh_slots()
 
     def get_file_path(self, slot_id, ext="json"):
         return os.path.join(self.save_dir, f"save_{slot_id}.{ext}")
@@ -773,15 +796,13 @@ class SaveLoadPage(QWidget):
         json_path = self.get_file_path(slot_id, "json")
         img_path = self.get_file_path(slot_id, "png")
         
-        # 1. Grab Screenshot
+        # 1. Screenshot (encoded and written in the background)
         if self.temp_screenshot:
-            screenshot = self.temp_screenshot
-            screenshot = screenshot.scaled(320, 180, Qt.AspectRatioMode.KeepAspectRatio)
-            screenshot.save(img_path)
+            self.thumbnails.save(self.temp_screenshot, img_path)
+        elif self.scene:
+            self.thumbnails.save(render_scene_thumbnail(self.scene), img_path)
         elif self.parent_widget_to_grab:
-            screenshot = self.parent_widget_to_grab.grab()
-            screenshot = screenshot.scaled(320, 180, Qt.AspectRatioMode.KeepAspectRatio)
-            screenshot.save(img_path)
+            self.thumbnails.save(self.parent_widget_to_grab.grab().toImage(), img_path)
         
         # 2. Save Data (Real)
         if self.memory_manager:
@@ -798,6 +819,8 @@ class SaveLoadPage(QWidget):
                 with open(json_path, 'w', encoding='utf-8') as f:
                     json.dump(save_data, f, indent=4, ensure_ascii=False)
                 print(f"Game saved to {json_path}")
+                # The slot may have pointed at a timeline nothing else uses
+                self.memory_manager.prune_backlogs()
             except Exception as e:
                 print(f"Error saving game: {e}")
         else:
@@ -1743,12 +1766,65 @@ class MemoryPage(QWidget):
         self.txt_small.setText(formatted_small)
 
 
+# --- Backlog Page ---
+class BacklogPage(QWidget):
+    """Scrollable history of every displayed line (virtualized QListView over the turn archive)."""
+    back_signal = Signal()
+    
+    def __init__(self, archive=None):
+        super().__init__()
+        layout = QVBoxLayout()
+        
+        # Header
+        header = QHBoxLayout()
+        lbl_title = QLabel("回想 (对话记录)")
+        lbl_title.setStyleSheet("font-size: 24px; font-weight: bold; color: white;")
+        header.addWidget(lbl_title)
+        header.addStretch()
+        
+        btn_back = QPushButton("返回")
+        btn_back.clicked.connect(self.back_signal.emit)
+        btn_back.setFixedSize(100, 40)
+        header.addWidget(btn_back)
+        
+        layout.addLayout(header)
+        
+        # Only visible rows are laid out: fixed row height + uniform sizes
+        self.model = BacklogModel(archive)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setItemDelegate(BacklogDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.list_view.setStyleSheet("background-color: rgba(0, 0, 0, 0.5); color: white; font-size: 18px; border: none;")
+        layout.addWidget(self.list_view)
+        
+        self.setLayout(layout)
+
+    def set_archive(self, archive):
+        self.model.set_archive(archive)
+
+    def refresh(self):
+        """Syncs with the archive and jumps to the latest line."""
+        self.model.sync()
+        self.list_view.scrollToBottom()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.back_signal.emit()
+            event.accept()
+        else:
+            super().keyPressEvent(event)
+
+
 # --- Game Page ---
 class GamePage(QWidget):
     config_signal = Signal()
     save_load_signal = Signal()
     save_exit_signal = Signal()
     memory_signal = Signal()
+    backlog_signal = Signal()
     input_signal = Signal(str)
     input_advance_signal = Signal()
     auto_mode_signal = Signal(bool)
@@ -1763,13 +1839,12 @@ class GamePage(QWidget):
         self.layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         # Graphics View
-        self.view = QGraphicsView(visual_manager.scene)
+        self.visual = visual_manager
+        self.view = GameView(visual_manager.scene) # Backend/overlay set by apply_render_config
         self.view.setStyleSheet("border: none; background-color: black;")
         self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.view.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.view.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
         
         self.scene = visual_manager.scene
         self.scene.setSceneRect(0, 0, 1920, 1080)
@@ -1847,6 +1922,10 @@ class GamePage(QWidget):
         self.btn_memory.setStyleSheet(btn_style)
         self.btn_memory.clicked.connect(self.memory_signal.emit)
 
+        self.btn_backlog = QPushButton("回想")
+        self.btn_backlog.setStyleSheet(btn_style)
+        self.btn_backlog.clicked.connect(self.backlog_signal.emit)
+
         self.btn_sl = QPushButton("存档/读档")
         self.btn_sl.setStyleSheet(btn_style)
         self.btn_sl.clicked.connect(self.save_load_signal.emit)
@@ -1857,6 +1936,7 @@ class GamePage(QWidget):
         
         tm_layout.addWidget(self.btn_config)
         tm_layout.addWidget(self.btn_memory)
+        tm_layout.addWidget(self.btn_backlog)
         tm_layout.addWidget(self.btn_sl)
         tm_layout.addWidget(self.btn_exit)
         
@@ -1890,6 +1970,21 @@ class GamePage(QWidget):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.view.fitInView(0, 0, 1920, 1080, Qt.AspectRatioMode.KeepAspectRatio)
+        self._update_display_size()
+
+    def _update_display_size(self):
+        # Scene size in device pixels, so backgrounds can be loaded at display resolution
+        zoom = self.view.transform().m11() * self.view.devicePixelRatioF()
+        if zoom > 0:
+            self.visual.set_display_size(1920 * zoom, 1080 * zoom)
+
+    def apply_render_config(self, config: dict):
+        self.view.configure(config.get("render_backend", "raster"),
+                            config.get("render_update_mode", "auto"),
+                            config.get("render_antialiasing", True))
+        self.view.set_overlay_visible(config.get("show_fps", False))
+        self.visual.set_item_cache(config.get("render_item_cache", False))
+        self.view.fitInView(0, 0, 1920, 1080, Qt.AspectRatioMode.KeepAspectRatio)
 
     def showEvent(self, event):
         super().showEvent(event)
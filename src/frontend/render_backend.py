@@ -0,0 +1,132 @@
+import time
+from collections import deque
+from PySide6.QtWidgets import QGraphicsView, QLabel, QWidget
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QPainter, QSurfaceFormat
+
+BACKENDS = ("raster", "opengl")
+
+UPDATE_MODES = {
+    "minimal": QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate,
+    "smart": QGraphicsView.ViewportUpdateMode.SmartViewportUpdate,
+    "bounding": QGraphicsView.ViewportUpdateMode.BoundingRectViewportUpdate,
+    "full": QGraphicsView.ViewportUpdateMode.FullViewportUpdate,
+}
+
+# "auto": a GL viewport redraws the whole frame anyway, so skip the region bookkeeping
+AUTO_UPDATE_MODE = {"raster": "minimal", "opengl": "full"}
+
+
+def make_viewport(backend: str, antialiasing: bool = True):
+    """Returns (viewport widget, backend actually used). OpenGL falls back to raster if unavailable."""
+    if backend == "opengl":
+        try:
+            from PySide6.QtOpenGLWidgets import QOpenGLWidget
+        except ImportError as e:
+            print(f"[RenderBackend] OpenGL viewport unavailable ({e}), using raster")
+            return QWidget(), "raster"
+        viewport = QOpenGLWidget()
+        fmt = QSurfaceFormat()
+        fmt.setSamples(4 if antialiasing else 0)
+        fmt.setSwapInterval(1) # vsync
+        viewport.setFormat(fmt)
+        return viewport, "opengl"
+    if backend != "raster":
+        print(f"[RenderBackend] Unknown backend '{backend}', using raster")
+    return QWidget(), "raster"
+
+
+class GameView(QGraphicsView):
+    """
+    QGraphicsView for the game scene with a switchable viewport (raster or
+    OpenGL; on machines without a GPU, Mesa llvmpipe serves the GL context)
+    and per-frame timing. paint_ms is the CPU time of each paintEvent; the
+    optional overlay shows FPS and paint cost to compare settings.
+    """
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.backend = "raster"
+        self.update_mode = AUTO_UPDATE_MODE["raster"]
+        self.antialiasing = True
+        self.paint_ms = deque(maxlen=240)
+        self.frame_stamps = deque(maxlen=240)
+
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
+        self.set_render_hints(True)
+
+        self.overlay = QLabel(self)
+        self.overlay.setStyleSheet("background-color: rgba(0, 0, 0, 0.6); color: #0f0; font-family: monospace; padding: 4px;")
+        self.overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.overlay.move(8, 8)
+        self.overlay.hide()
+        self._overlay_timer = QTimer(self)
+        self._overlay_timer.setInterval(500)
+        self._overlay_timer.timeout.connect(self._update_overlay)
+
+    def set_render_hints(self, antialiasing: bool):
+        self.antialiasing = antialiasing
+        self.setRenderHint(QPainter.RenderHint.Antialiasing, antialiasing)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        # Pixmap items never draw outside their bounds; skip the antialiasing margin
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, not antialiasing)
+
+    def configure(self, backend: str = "raster", update_mode: str = "auto", antialiasing: bool = True):
+        if backend != self.backend or (backend == "opengl" and antialiasing != self.antialiasing):
+            viewport, self.backend = make_viewport(backend, antialiasing)
+            self.setViewport(viewport) # Deletes the previous viewport
+            self.paint_ms.clear()
+            self.frame_stamps.clear()
+        self.set_render_hints(antialiasing)
+
+        mode = AUTO_UPDATE_MODE[self.backend] if update_mode == "auto" else update_mode
+        if mode not in UPDATE_MODES:
+            print(f"[RenderBackend] Unknown viewport update mode '{mode}', using {AUTO_UPDATE_MODE[self.backend]}")
+            mode = AUTO_UPDATE_MODE[self.backend]
+        self.update_mode = mode
+        self.setViewportUpdateMode(UPDATE_MODES[mode])
+        self.viewport().update()
+        if self.overlay.isVisible():
+            self._update_overlay()
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super().paintEvent(event)
+        end = time.perf_counter()
+        self.paint_ms.append((end - start) * 1000)
+        self.frame_stamps.append(end)
+        if self.backend == "opengl" and not self.viewport().isValid():
+            # No usable GL context (no driver, or a platform without GL): the frame stayed black
+            print("[RenderBackend] OpenGL context could not be created, using raster")
+            QTimer.singleShot(0, lambda: self.configure("raster", self.update_mode if self.update_mode != "full" else "auto",
+                                                        self.antialiasing))
+
+    # --- Frame stats ---
+
+    def frame_stats(self, window_s: float = 1.0) -> dict:
+        """Frames painted in the last window_s seconds and their paint cost."""
+        now = time.perf_counter()
+        recent = [ms for ms, t in zip(self.paint_ms, self.frame_stamps) if now - t <= window_s]
+        return {
+            "backend": self.backend,
+            "update_mode": self.update_mode,
+            "fps": len(recent) / window_s,
+            "paint_ms_avg": sum(recent) / len(recent) if recent else 0.0,
+            "paint_ms_max": max(recent) if recent else 0.0,
+        }
+
+    def set_overlay_visible(self, visible: bool):
+        self.overlay.setVisible(visible)
+        if visible:
+            self._update_overlay()
+            self._overlay_timer.start()
+        else:
+            self._overlay_timer.stop()
+
+    def _update_overlay(self):
+        s = self.frame_stats()
+        size = self.viewport().size() * self.devicePixelRatioF()
+        self.overlay.setText(f"{s['backend']}/{s['update_mode']} {size.width()}x{size.height()}  "
+                             f"{s['fps']:.0f} FPS  paint {s['paint_ms_avg']:.1f} ms (max {s['paint_ms_max']:.1f})")
+        self.overlay.adjustSize()
+        self.overlay.raise_()
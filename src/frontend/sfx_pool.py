@@ -0,0 +1,158 @@
+import os
+import time
+from collections import OrderedDict
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput, QSoundEffect
+from PySide6.QtCore import QObject, QUrl
+
+from .audio_source import AudioStreamer
+
+
+class _Voice:
+    """One QMediaPlayer + output. Keeps its last source open, so replaying it skips re-opening the file."""
+
+    def __init__(self, index: int, streamer: AudioStreamer):
+        self.index = index
+        self.streamer = streamer
+        self.player = QMediaPlayer()
+        self.output = QAudioOutput()
+        self.player.setAudioOutput(self.output)
+        self.player.errorOccurred.connect(lambda e, s: print(f"[Audio SFX Voice {index} Error] {e}: {s}"))
+        self.path = None
+        self.started = 0.0 # perf_counter of the last play; 0 = never
+
+    def is_playing(self) -> bool:
+        return self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+
+    def load(self, path: str):
+        if self.path != path:
+            self.player.stop()
+            self.path = path if self.streamer.attach(self.player, path) else None
+
+    def play(self, path: str, volume: float):
+        self.load(path)
+        self.output.setVolume(volume)
+        self.player.setLoops(1)
+        self.player.setPosition(0)
+        self.player.play()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.player.stop()
+
+
+class SfxPool(QObject):
+    """
+    One-shot sound effects with polyphony.
+
+    - Compressed files (OGG etc.) play on a pool of `polyphony` media voices.
+      A free voice that already has the file open is preferred (no re-open or
+      re-decode setup); otherwise the least recently used free voice; if all
+      are busy, the voice playing longest is stolen.
+    - Sources come from the AudioStreamer: hot files are played from memory,
+      and assets packed in an archive need no file on disk.
+    - WAV files on disk are decoded once into a QSoundEffect (PCM in memory, lowest
+      start latency), kept in an LRU of `max_effects` entries.
+    - preload() opens files ahead of time on idle voices / decodes WAVs.
+    - `gain` (linear, from the loudness analysis) scales one play on top of
+      the pool volume; the result is capped at full scale.
+    """
+
+    EFFECT_EXTENSIONS = (".wav",)
+
+    def __init__(self, polyphony: int = 4, max_effects: int = 32, streamer: AudioStreamer = None):
+        super().__init__()
+        self.streamer = streamer or AudioStreamer()
+        self.volume = 1.0
+        self.max_effects = max_effects
+        self._voices = []
+        self._effects = OrderedDict() # path -> QSoundEffect (LRU)
+        self._effect_gain = {} # path -> gain of the effect's last play
+        self.set_polyphony(polyphony)
+
+        self.played = 0
+        self.stolen = 0
+        self.source_hits = 0 # Plays that reused a voice or effect with the file already loaded
+
+    def set_polyphony(self, polyphony: int):
+        polyphony = max(1, polyphony)
+        while len(self._voices) > polyphony:
+            voice = self._voices.pop()
+            voice.stop()
+        while len(self._voices) < polyphony:
+            self._voices.append(_Voice(len(self._voices), self.streamer))
+
+    def set_volume(self, volume: float):
+        self.volume = volume
+        for path, effect in self._effects.items():
+            effect.setVolume(min(1.0, volume * self._effect_gain.get(path, 1.0)))
+
+    def play(self, file_path: str, gain: float = 1.0):
+        abs_path = os.path.abspath(file_path)
+        self.played += 1
+        if abs_path.lower().endswith(self.EFFECT_EXTENSIONS) and os.path.isfile(abs_path):
+            effect = self._effect(abs_path)
+            if effect.status() == QSoundEffect.Status.Ready:
+                self.source_hits += 1
+                self._effect_gain[abs_path] = gain
+                effect.setVolume(min(1.0, self.volume * gain))
+                effect.play()
+                return
+            # Still decoding: play it through a media voice this time
+        voice = self._pick_voice(abs_path)
+        if voice.path == abs_path:
+            self.source_hits += 1
+        voice.play(abs_path, min(1.0, self.volume * gain))
+
+    def preload(self, file_path: str):
+        """Prepares a file for an upcoming play (hint; never interrupts a playing voice)."""
+        abs_path = os.path.abspath(file_path)
+        if abs_path.lower().endswith(self.EFFECT_EXTENSIONS) and os.path.isfile(abs_path):
+            self._effect(abs_path)
+            return
+        if not self.streamer.exists(abs_path) or any(v.path == abs_path for v in self._voices):
+            return
+        idle = [v for v in self._voices if not v.is_playing()]
+        if idle:
+            min(idle, key=lambda v: v.started).load(abs_path)
+
+    def stop_all(self):
+        for voice in self._voices:
+            voice.stop()
+        for effect in self._effects.values():
+            effect.stop()
+
+    def _pick_voice(self, path: str) -> _Voice:
+        idle = [v for v in self._voices if not v.is_playing()]
+        for voice in idle:
+            if voice.path == path:
+                return voice
+        if idle:
+            return min(idle, key=lambda v: v.started)
+        self.stolen += 1
+        return min(self._voices, key=lambda v: v.started)
+
+    def _effect(self, abs_path: str) -> QSoundEffect:
+        effect = self._effects.get(abs_path)
+        if effect is not None:
+            self._effects.move_to_end(abs_path)
+            return effect
+        effect = QSoundEffect(self)
+        effect.setSource(QUrl.fromLocalFile(abs_path)) # Decodes asynchronously
+        effect.setVolume(self.volume)
+        self._effects[abs_path] = effect
+        while len(self._effects) > self.max_effects:
+            old_path, old = self._effects.popitem(last=False)
+            self._effect_gain.pop(old_path, None)
+            old.stop()
+            old.deleteLater()
+        return effect
+
+    def stats(self) -> dict:
+        return {
+            "voices": len(self._voices),
+            "busy": sum(1 for v in self._voices if v.is_playing()),
+            "effects": len(self._effects),
+            "played": self.played,
+            "stolen": self.stolen,
+            "source_hits": self.source_hits,
+        }
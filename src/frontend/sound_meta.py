@@ -0,0 +1,58 @@
+import os
+import json
+from typing import NamedTuple, Optional
+
+DEFAULT_META_PATH = "assets/sound_meta.json"
+SOUND_META_VERSION = 1
+
+
+class SoundInfo(NamedTuple):
+    duration_ms: int
+    peak_db: Optional[float] # None when built without a decoder
+    rms_db: Optional[float]
+    wav: Optional[str] # Decoded PCM copy for instant start, if one was written
+
+
+class SoundMetadata:
+    """
+    Per-file sound facts built by build_sound_cache.py (assets/sound_meta.json,
+    next to sound_map.json), looked up by the file paths the sound map uses.
+    Files without an entry simply have no metadata. Pure Python (used by EngineCore).
+    """
+
+    def __init__(self, path: str = DEFAULT_META_PATH):
+        self.path = path
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        self._entries.clear()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[SoundMetadata] Failed to load {self.path}: {e}")
+            return
+        if data.get("version") != SOUND_META_VERSION:
+            return
+        for file_path, entry in data.get("sounds", {}).items():
+            wav = entry.get("wav")
+            self._entries[file_path] = SoundInfo(entry["duration_ms"], entry.get("peak_db"), entry.get("rms_db"),
+                                                 wav if wav and os.path.exists(wav) else None)
+
+    def lookup(self, file_path: str) -> Optional[SoundInfo]:
+        return self._entries.get(file_path)
+
+    def duration_ms(self, file_path: str) -> Optional[int]:
+        info = self._entries.get(file_path)
+        return info.duration_ms if info else None
+
+    def playable_path(self, file_path: str) -> str:
+        """The PCM WAV copy if one exists (starts without decoding), else the file itself."""
+        info = self._entries.get(file_path)
+        return info.wav if info and info.wav else file_path
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,77 @@
+import os
+import json
+from typing import List, NamedTuple, Optional, Tuple
+
+DEFAULT_MIPS_DIR = "assets/.cache/sprites"
+MIPS_VERSION = 1
+
+
+class MipLevel(NamedTuple):
+    path: str
+    scale: float # Level width / trimmed width (1, ~0.5, ~0.25)
+
+
+class MipEntry(NamedTuple):
+    offset: Tuple[int, int] # Top-left of the trimmed area on the original canvas
+    levels: List[MipLevel] # Largest first
+
+
+class SpriteMips:
+    """
+    Index of trimmed, mip-mapped sprite bodies (built by build_sprite_mips.py),
+    looked up by original body path. Bodies without an entry load as-is.
+    """
+
+    def __init__(self, mips_dir: str = DEFAULT_MIPS_DIR):
+        self.mips_dir = mips_dir
+        self.index_path = os.path.join(mips_dir, "index.json")
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        self._entries.clear()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[SpriteMips] Failed to load index: {e}")
+            return
+        if data.get("version") != MIPS_VERSION:
+            return
+        stale = 0
+        for body_path, body in data.get("bodies", {}).items():
+            if self._is_stale(body_path, body.get("stamp")):
+                stale += 1 # Edited since the mips were built: the original is loaded instead
+                continue
+            levels = [MipLevel(os.path.join(self.mips_dir, level["file"]).replace("\\", "/"), level["scale"])
+                      for level in body["levels"]]
+            if all(os.path.exists(level.path) for level in levels):
+                self._entries[body_path] = MipEntry(tuple(body["offset"]), levels)
+        if stale:
+            print(f"[SpriteMips] {stale} bodies changed since the mips were built; re-run build_sprite_mips.py")
+
+    @staticmethod
+    def _is_stale(body_path: str, stamp) -> bool:
+        """Size + mtime differ from the stamp build_sprite_mips.py wrote (bodies only in archives are trusted)."""
+        try:
+            st = os.stat(body_path)
+        except OSError:
+            return False
+        return stamp is None or [st.st_size, st.st_mtime_ns] != list(stamp)
+
+    def lookup(self, body_path: str) -> Optional[MipEntry]:
+        return self._entries.get(body_path)
+
+    @staticmethod
+    def choose_level(entry: MipEntry, effective_scale: float) -> MipLevel:
+        """Smallest level that is not magnified on screen (falls back to the largest)."""
+        best = entry.levels[0]
+        for level in entry.levels:
+            if level.scale >= effective_scale * 0.98: # Tolerate rounding of level sizes
+                best = level
+        return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,68 @@
+import json
+from collections import deque
+
+# Qt-free stand-ins for VisualManager / AudioManager / the LLM backend, used to drive EngineCore or
+# GameEngine headlessly (replays, load tests).
+
+
+class StubVisualManager:
+    """Stands in for VisualManager: records calls instead of touching a scene."""
+
+    def __init__(self, max_calls: int = 1000):
+        self.calls = deque(maxlen=max_calls) # Most recent calls only (bounded for load tests)
+        self.presets = {}
+        try:
+            with open("assets/presets.json", "r", encoding="utf-8") as f:
+                self.presets = json.load(f)
+        except Exception as e:
+            print(f"[StubVisualManager] Failed to load presets: {e}")
+
+    def _log(self, name, *args):
+        self.calls.append((name,) + args)
+
+    def set_background(self, image_path, fade_duration=1000): self._log("set_background", image_path)
+    def join_character(self, char_name, preset="pos_center"): self._log("join_character", char_name, preset)
+    def set_expression(self, char_name, expression): self._log("set_expression", char_name, expression)
+    def apply_preset(self, sprite_name, preset_name): self._log("apply_preset", sprite_name, preset_name)
+    def animate_sprite(self, name, animation_type): self._log("animate_sprite", name, animation_type)
+    def remove_sprite(self, name): self._log("remove_sprite", name)
+    def clear_all_sprites(self): self._log("clear_all_sprites")
+
+
+class StubAudioManager:
+    """Stands in for AudioManager: records calls, plays nothing."""
+
+    def __init__(self, max_calls: int = 1000):
+        self.calls = deque(maxlen=max_calls)
+
+    def _log(self, name, *args):
+        self.calls.append((name,) + args)
+
+    def play_bgm(self, file_path, fade_duration=2000, gain_db=0.0, loop_start_ms=None, loop_end_ms=None): self._log("play_bgm", file_path)
+    def stop_bgm(self): self._log("stop_bgm")
+    def play_sfx(self, file_path, loop=False, gain_db=0.0): self._log("play_sfx", file_path, loop)
+    def preload_sfx(self, file_path): self._log("preload_sfx", file_path)
+    def stop_sfx(self): self._log("stop_sfx")
+    def stop_looping_sfx(self): self._log("stop_looping_sfx")
+    def play_voice(self, file_path): self._log("play_voice", file_path)
+    def set_bgm_volume(self, val): pass
+    def set_sfx_volume(self, val): pass
+    def set_voice_volume(self, val): pass
+
+
+class StubBackend:
+    """Stands in for the LLM chain: hands back queued replies (str) or raises queued errors (Exception)."""
+
+    def __init__(self, replies=()):
+        self.replies = deque(replies)
+
+    async def _next(self):
+        if not self.replies:
+            raise RuntimeError("no reply recorded")
+        reply = self.replies.popleft()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    async def execute_turn(self, user_input): return await self._next()
+    async def run_opening_sequence(self): return await self._next()
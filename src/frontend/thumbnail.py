@@ -0,0 +1,82 @@
+import os
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QRectF, Qt, Signal
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QGraphicsScene
+
+THUMB_SIZE = (320, 180)
+
+
+def render_scene_thumbnail(scene: QGraphicsScene, size=THUMB_SIZE) -> QImage:
+    """
+    Paints the scene straight into a thumbnail-sized image. Only the
+    thumbnail's pixels are drawn, instead of grabbing the window at full
+    resolution and scaling it down. GUI thread (items may be widgets).
+    """
+    image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+    image.fill(Qt.GlobalColor.black)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    scene.render(painter, QRectF(0, 0, size[0], size[1]), scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+    painter.end()
+    return image
+
+
+class _SaveSignals(QObject):
+    # path, success; emitted from the worker, delivered queued on the GUI thread
+    saved = Signal(str, bool)
+
+
+class _SaveTask(QRunnable):
+    def __init__(self, image: QImage, path: str, size, signals: _SaveSignals):
+        super().__init__()
+        self.image = image
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        image = self.image
+        if image.width() > self.size[0] or image.height() > self.size[1]:
+            image = image.scaled(self.size[0], self.size[1], Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        # Written next to the target and renamed, so the slot list never reads a partial PNG
+        tmp_path = self.path + ".tmp"
+        ok = image.save(tmp_path, "PNG")
+        if ok:
+            try:
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[ThumbnailWriter] Failed to write {self.path}: {e}")
+                ok = False
+        else:
+            print(f"[ThumbnailWriter] Failed to encode {self.path}")
+        self.signals.saved.emit(self.path, ok)
+
+
+class ThumbnailWriter(QObject):
+    """
+    Encodes save thumbnails to PNG on a worker thread. One worker, so saves
+    to the same slot land in the order they were made. `saved(path, ok)`
+    fires on the GUI thread once a file is on disk.
+    """
+
+    saved = Signal(str, bool)
+
+    def __init__(self, size=THUMB_SIZE):
+        super().__init__()
+        self.size = size
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self._signals = _SaveSignals()
+        self._signals.saved.connect(self.saved.emit)
+
+    def save(self, image: QImage, path: str):
+        """Queues `image` (QImage; scaled down to the thumbnail size if larger) for writing to `path`."""
+        if image is None or image.isNull():
+            return
+        self.pool.start(_SaveTask(image, path, self.size, self._signals))
+
+    def wait(self):
+        """Blocks until queued thumbnails are written (e.g. before exit)."""
+        self.pool.waitForDone()
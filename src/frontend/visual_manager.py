@@ -1,30 +1,191 @@
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsItem
-from PySide6.QtCore import QObject, QPropertyAnimation, QPointF, QEasingCurve, Property, Qt
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QObject, QPointF, QEasingCurve, Property, Qt, QTimer, QEvent
+from PySide6.QtGui import QPixmap, QImage, QPainter
 import os
 import json
+import time
 
-# Helper Wrapper to make QGraphicsPixmapItem animatable via QPropertyAnimation
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from .image_cache import PixmapCache
+from .image_loader import ImageLoader
+from .bg_cache import BackgroundDiskCache, snap_display_size
+from .face_atlas import FaceAtlas
+from .sprite_mips import SpriteMips
+from .animation_scheduler import AnimationScheduler
+from .asset_archive import AssetArchives, default_archives
+from .expression_index import ExpressionIndex
+
+BG_SIZE = (1920, 1080)
+
+
+def bake_sprite(body: QImage, body_pos, body_scale: float, face: QImage, face_pos, scale: float) -> QImage:
+    """
+    Body with the face drawn on it, scaled once, from the layers as SpriteItem
+    already shows them: positions are in item units and `body_scale` is item
+    units per body pixel (1 / mip level scale). The result starts at the body's
+    position. QImage only: runs in decode workers.
+    """
+    if body.isNull() or face.isNull():
+        return QImage()
+    level = 1.0 / body_scale # Body pixels per item unit
+    canvas = body.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    if level != 1.0:
+        face = face.scaled(max(1, round(face.width() * level)), max(1, round(face.height() * level)),
+                           Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    painter = QPainter(canvas) # Detaches: the cached body is not touched
+    painter.drawImage(QPointF((face_pos[0] - body_pos[0]) * level, (face_pos[1] - body_pos[1]) * level), face)
+    painter.end()
+    width = max(1, round(canvas.width() * scale / level))
+    height = max(1, round(canvas.height() * scale / level))
+    return canvas.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+class SceneTransaction:
+    """
+    Scene changes of one command burst (see VisualManager.transaction).
+
+    Deferred actions and image callbacks are held until the burst is closed
+    and every image it requested has arrived, then applied in order in one
+    go. If images are still missing after `timeout_ms`, what is ready is
+    applied and late images apply as they arrive.
+    """
+
+    timeout_ms = 250
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.actions = []
+        self.outstanding = 0
+        self.closed = False
+        self.committed = False
+        self.images = 0
+        self.started = time.perf_counter()
+        self.paints_at_start = manager.paint_count
+        self.wait_ms = 0.0
+
+    def defer(self, action):
+        if self.committed:
+            action()
+        else:
+            self.actions.append(action)
+
+    def wrap(self, callback):
+        """Returns a callback that joins this transaction instead of applying immediately."""
+        if self.committed:
+            return callback
+        self.outstanding += 1
+        delivered = []
+
+        def deliver(*args):
+            if delivered: # Loader callbacks run once; guard anyway
+                return
+            delivered.append(True)
+            self.images += 1
+            if self.committed:
+                callback(*args)
+                return
+            self.actions.append(lambda: callback(*args))
+            self.outstanding -= 1
+            self._maybe_commit()
+        return deliver
+
+    def close(self):
+        self.closed = True
+        self._maybe_commit()
+        if not self.committed:
+            QTimer.singleShot(self.timeout_ms, self.commit)
+
+    def _maybe_commit(self):
+        if self.closed and self.outstanding <= 0:
+            self.commit()
+
+    def commit(self):
+        if self.committed:
+            return
+        self.committed = True
+        self.wait_ms = (time.perf_counter() - self.started) * 1000
+        actions, self.actions = self.actions, []
+        for action in actions:
+            action()
+        self.manager._on_transaction_committed(self)
+
+
+# Helper Wrapper giving QGraphicsPixmapItem a pos property and child layers
 class SpriteItem(QObject, QGraphicsPixmapItem):
     def __init__(self, pixmap):
         QObject.__init__(self)
-        QGraphicsPixmapItem.__init__(self, pixmap)
+        QGraphicsPixmapItem.__init__(self)
+        # The body is a child so trimmed mip levels can be offset and scaled back to canvas units
+        self.body_item = QGraphicsPixmapItem(self)
+        self.body_item.setZValue(-1)
+        self.body_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+        self.body_pixmap = pixmap
+        self.body_item.setPixmap(pixmap)
+        self.body_path = None # Original body file (mip levels are looked up from it)
         self.face_item = None
+        self.composite_item = None # Pre-scaled body+face, replaces the layers when current
+        self.cache_keys = {} # "body"/"face"/"composite" -> PixmapCache key, for pinning
+        self.shown_keys = {} # "body"/"face" -> key of the image the layer holds (cache_keys may be newer)
+        self.deferred_face = None # Face decoded before the body
+        self.bake_scheduled = False
+        self.cache_mode = QGraphicsItem.CacheMode.NoCache # Applied to every pixmap layer
     
-    def set_face(self, face_pixmap: QPixmap):
+    def set_body(self, body_pixmap: QPixmap, offset=(0, 0), level_scale: float = 1.0):
+        self.body_pixmap = body_pixmap
+        self.body_item.setPixmap(body_pixmap)
+        self.body_item.setPos(offset[0], offset[1])
+        self.body_item.setScale(1.0 / level_scale)
+
+    def set_face(self, face_pixmap: QPixmap, offset=(0, 0)):
         if not self.face_item:
             self.face_item = QGraphicsPixmapItem(self) # Parent is self
-            self.face_item.setPos(0, 0)
+            self.face_item.setCacheMode(self.cache_mode)
+            self.face_item.setVisible(not self.is_composited())
         
+        # Atlas faces are trimmed; offset restores their place on the face canvas
+        self.face_item.setPos(offset[0], offset[1])
         self.face_item.setPixmap(face_pixmap)
 
+    def set_cache_mode(self, mode):
+        self.cache_mode = mode
+        for layer in (self.body_item, self.face_item, self.composite_item):
+            if layer:
+                layer.setCacheMode(mode)
+
+    def is_composited(self) -> bool:
+        return self.composite_item is not None and self.composite_item.isVisible()
+
+    def show_composite(self, pixmap: QPixmap, scale: float, origin=(0, 0)):
+        """Draws one pre-scaled pixmap instead of body + face (net scale 1 on screen)."""
+        if not self.composite_item:
+            self.composite_item = QGraphicsPixmapItem(self)
+            self.composite_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+            self.composite_item.setCacheMode(self.cache_mode)
+        self.composite_item.setPixmap(pixmap)
+        self.composite_item.setPos(origin[0], origin[1])
+        self.composite_item.setScale(1.0 / scale)
+        self.composite_item.show()
+        self.body_item.hide()
+        if self.face_item:
+            self.face_item.hide()
+
+    def show_layered(self):
+        if not self.is_composited():
+            return
+        self.composite_item.hide()
+        self.body_item.show()
+        if self.face_item:
+            self.face_item.show()
+
     def get_pos(self):
         return QGraphicsPixmapItem.pos(self)
     
     def set_pos(self, pos):
         QGraphicsPixmapItem.setPos(self, pos)
         
-    # Property for QPropertyAnimation
+    # item.pos reads the position as a property
     pos = Property(QPointF, get_pos, set_pos)
 
 class BackgroundItem(QObject, QGraphicsPixmapItem):
@@ -44,9 +205,38 @@ class BackgroundItem(QObject, QGraphicsPixmapItem):
     opacity = Property(float, get_opacity, set_opacity)
 
 class VisualManager(QObject):
-    def __init__(self, scene: QGraphicsScene):
+    def __init__(self, scene: QGraphicsScene, cache: PixmapCache = None, decode_threads: int = 2,
+                 animator: AnimationScheduler = None, archives: AssetArchives = None):
         super().__init__()
         self.scene = scene
+        # Shared with AudioManager; owns crossfades and sprite motions
+        self.animator = animator or AnimationScheduler()
+        # Decoded images (bodies, faces, scaled backgrounds), shared across commands
+        self.cache = cache or PixmapCache()
+        # Packed assets (pack_assets.py), resolved before loose files under the same paths
+        self.archives = archives if archives is not None else default_archives()
+        # Decodes off the GUI thread; commands apply images once they arrive
+        self.loader = ImageLoader(self.cache, decode_threads, self.archives)
+        self.expression_usage = Counter() # (char, expression) -> times shown, drives prefetch
+        self.composite_sprites = False # See set_composite_sprites
+        self.item_cache_mode = QGraphicsItem.CacheMode.NoCache # See set_item_cache
+        self._bg_request = None
+        # Backgrounds pre-scaled on disk; bg_size follows the display (set_display_size)
+        self.bg_disk = BackgroundDiskCache(archives=self.archives)
+        self.bg_size = BG_SIZE
+        # Faces packed by pack_face_atlas.py; unpacked faces load from their own files
+        self.face_atlas = FaceAtlas()
+        # Trimmed body mip levels from build_sprite_mips.py, picked by on-screen scale
+        self.sprite_mips = SpriteMips()
+        self.view_scale = 1.0 # Device pixels per scene unit (set_display_size)
+
+        # Transactions: one scene update per command burst
+        self._transaction = None
+        self._transaction_depth = 0
+        self._watched_viewports = set()
+        self._awaiting_paint = []
+        self.paint_count = 0
+        self.burst_stats = deque(maxlen=200) # {"images", "wait_ms", "repaints"} per burst
         
         # Layers
         self.bg_layer_1 = BackgroundItem()
@@ -58,7 +248,7 @@ class VisualManager(QObject):
         self.scene.addItem(self.bg_layer_1)
         self.scene.addItem(self.bg_layer_2)
         self.bg_layer_1.setZValue(-100)
-        self.bg_layer_2.setZValue(-99) # Slightly above for crossfade
+        self.bg_layer_2.setZValue(-99) # The incoming layer is raised above for each crossfade
         
         self.active_bg = 1 # 1 or 2
         self.bg_layer_2.setOpacity(0) # Start invisible
@@ -69,6 +259,7 @@ class VisualManager(QObject):
         
         # Load Character Map
         self.char_map = {}
+        self.expressions = ExpressionIndex() # Codes, faces.tjs aliases and labels -> face path
         self.load_char_map()
         
         # Load Background Map
@@ -88,6 +279,7 @@ class VisualManager(QObject):
                 self.char_map = json.load(f)
         except Exception as e:
             print(f"[VisualManager] Failed to load character map: {e}")
+        self.expressions = ExpressionIndex(self.char_map, archives=self.archives)
 
     def load_bg_map(self):
         try:
@@ -95,6 +287,330 @@ class VisualManager(QObject):
                 self.bg_map = json.load(f)
         except Exception as e:
             print(f"[VisualManager] Failed to load background map: {e}")
+
+    def _bg_decoder(self, size):
+        # Runs in a decode worker: pre-scaled disk entry, or decode + scale + store
+        return lambda path: self.bg_disk.load(path, size)
+
+    def set_display_size(self, width: float, height: float):
+        """
+        Device-pixel size the scene is shown at. Backgrounds are then decoded
+        at that resolution (snapped to standard sizes) instead of 1920x1080
+        and scaled back up to scene units by the item, so the view paints them 1:1.
+        """
+        view_scale = width / BG_SIZE[0]
+        if abs(view_scale - self.view_scale) > 0.01:
+            self.view_scale = view_scale
+            for name, item in self.sprite_layer.items():
+                self._refresh_body_level(name, item)
+
+        size = snap_display_size(width, height)
+        if size == self.bg_size:
+            return
+        self.bg_size = size
+        if self._bg_request:
+            # Warm the current background at the new size for the next change
+            self.loader.prefetch(self._bg_request[0], size, decoder=self._bg_decoder(size))
+
+    # --- Transactions ---
+
+    @contextmanager
+    def transaction(self):
+        """
+        Batches the scene changes of a command burst: images requested,
+        sprites added or removed, moves, scales and animations started inside
+        the block are applied together once all of the burst's images are
+        decoded, so no intermediate state is painted.
+        Nested blocks join the outermost one.
+        """
+        self.begin_transaction()
+        try:
+            yield self._transaction
+        finally:
+            self.commit_transaction()
+
+    def begin_transaction(self):
+        self._transaction_depth += 1
+        if self._transaction_depth > 1:
+            return
+        for view in self.scene.views():
+            viewport = view.viewport()
+            if viewport not in self._watched_viewports:
+                viewport.installEventFilter(self)
+                self._watched_viewports.add(viewport)
+                # GameView.configure replaces the viewport when the render backend changes
+                viewport.destroyed.connect(lambda _=None, v=viewport: self._watched_viewports.discard(v))
+        self._transaction = SceneTransaction(self)
+
+    def commit_transaction(self):
+        if self._transaction_depth == 0:
+            return
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            transaction, self._transaction = self._transaction, None
+            transaction.close()
+
+    def _joined(self, callback):
+        return self._transaction.wrap(callback) if self._transaction else callback
+
+    def _defer(self, action):
+        if self._transaction:
+            self._transaction.defer(action)
+        else:
+            action()
+
+    def _on_transaction_committed(self, transaction):
+        self.scene.update()
+        if self._watched_viewports and any(v.isVisible() for v in self._watched_viewports):
+            self._awaiting_paint.append(transaction) # Counted at the first paint after commit
+        else:
+            self.burst_stats.append({"images": transaction.images, "wait_ms": transaction.wait_ms, "repaints": 0})
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.paint_count += 1
+            for transaction in self._awaiting_paint:
+                self.burst_stats.append({
+                    "images": transaction.images,
+                    "wait_ms": transaction.wait_ms,
+                    # Frames painted from the start of the burst up to and including its final state
+                    "repaints": self.paint_count - transaction.paints_at_start,
+                })
+            self._awaiting_paint.clear()
+        return False
+
+    def transaction_stats(self) -> dict:
+        bursts = list(self.burst_stats)
+        if not bursts:
+            return {"bursts": 0}
+        return {
+            "bursts": len(bursts),
+            "avg_repaints": sum(b["repaints"] for b in bursts) / len(bursts),
+            "max_repaints": max(b["repaints"] for b in bursts),
+            "avg_wait_ms": sum(b["wait_ms"] for b in bursts) / len(bursts),
+            "max_wait_ms": max(b["wait_ms"] for b in bursts),
+        }
+
+    def _pin_sprite(self, name: str, item):
+        # On-stage images must survive eviction: swapping back is the common case
+        self.cache.pin(name, item.cache_keys.values())
+
+    def _load_sprite_part(self, name: str, item, part: str, path: str, scale: float = None):
+        """
+        Sets the body or face of `item`, now if cached, else when decoded (unless
+        superseded). `scale` is the item scale the body level is picked for
+        (default: the current one; a transaction may not have applied it yet).
+        """
+        entry = self.face_atlas.lookup(path) if part == "face" else None
+        level = None
+        if part == "body":
+            item.body_path = path
+            mips = self.sprite_mips.lookup(path)
+            if mips:
+                level = self.sprite_mips.choose_level(mips, (item.scale() if scale is None else scale) * self.view_scale)
+        if level:
+            key = (level.path, None)
+        else:
+            key = (path, "atlas") if entry else (path, None)
+        item.cache_keys[part] = key
+        self._pin_sprite(name, item)
+
+        def apply(pixmap, offset=(0, 0)):
+            if self.sprite_layer.get(name) is not item or item.cache_keys.get(part) != key:
+                return # Sprite left or a newer image was requested meanwhile
+            item.shown_keys[part] = key
+            if part == "body":
+                if level:
+                    item.set_body(pixmap, mips.offset, level.scale)
+                else:
+                    item.set_body(pixmap)
+                if item.deferred_face is not None:
+                    item.set_face(*item.deferred_face)
+                    item.deferred_face = None
+            elif item.body_pixmap.isNull():
+                item.deferred_face = (pixmap, offset) # Never show a face without its body
+                return
+            else:
+                item.set_face(pixmap, offset)
+            # The composite shows the previous layers: draw the new ones until it is re-baked
+            item.show_layered()
+            self._schedule_bake(name, item)
+
+        if entry:
+            self._request_atlas_face(path, entry, apply)
+        else:
+            self.loader.request(key[0], self._joined(apply))
+
+    def _refresh_body_level(self, name: str, item, scale: float = None):
+        """Switches to another mip level if the on-screen scale changed enough."""
+        if not isinstance(item, SpriteItem) or not item.body_path:
+            return
+        mips = self.sprite_mips.lookup(item.body_path)
+        if mips is None:
+            return
+        if scale is None:
+            scale = item.scale()
+        level = self.sprite_mips.choose_level(mips, scale * self.view_scale)
+        if item.cache_keys.get("body") != (level.path, None):
+            # The current level keeps showing until the new one is decoded
+            self._load_sprite_part(name, item, "body", item.body_path, scale)
+
+    def _request_atlas_face(self, path: str, entry, callback):
+        """Crops a face from its (cached) atlas page and caches the crop."""
+        key = (path, "atlas")
+        face = self.cache.lookup(key)
+        if face is not None:
+            callback(face, entry.offset)
+            return
+
+        def crop(page):
+            face = self.cache.peek(key)
+            if face is None:
+                face = page.copy(*entry.rect)
+                self.cache.put(key, face)
+            callback(face, entry.offset)
+        self.loader.request(entry.page, self._joined(crop))
+
+    def _prefetch_face(self, face_path: str):
+        entry = self.face_atlas.lookup(face_path)
+        if entry is None:
+            self.loader.prefetch(face_path)
+        elif (face_path, "atlas") not in self.cache:
+            self.loader.prefetch(entry.page)
+
+    # --- Composited sprites ---
+
+    def _schedule_bake(self, name: str, item):
+        # Coalesce: a command burst (Join + fg + preset) ends in a single bake
+        if not self.composite_sprites or item.bake_scheduled:
+            return
+        item.bake_scheduled = True
+        QTimer.singleShot(0, lambda: self._bake(name, item))
+
+    def _bake(self, name: str, item):
+        item.bake_scheduled = False
+        if self.sprite_layer.get(name) is not item or not isinstance(item, SpriteItem):
+            return
+        body_key = item.cache_keys.get("body")
+        face_key = item.cache_keys.get("face")
+        if not body_key or not face_key or item.face_item is None or item.deferred_face is not None:
+            return
+        if item.shown_keys.get("body") != body_key or item.shown_keys.get("face") != face_key:
+            return # A newer image is still decoding; its arrival schedules the bake
+        scale = round(item.scale(), 3)
+        key = (body_key[0], ("composite", face_key, scale))
+        if item.cache_keys.get("composite") == key and item.is_composited():
+            return
+
+        # Layered drawing until the bake for the new state is ready
+        item.show_layered()
+        item.cache_keys["composite"] = key
+        self._pin_sprite(name, item)
+
+        # Bake from the decoded layers (shared QImages of the cached pixmaps), not from the files
+        body = item.body_pixmap.toImage()
+        face = item.face_item.pixmap().toImage()
+        body_pos = (item.body_item.pos().x(), item.body_item.pos().y())
+        face_pos = (item.face_item.pos().x(), item.face_item.pos().y())
+        body_scale = item.body_item.scale()
+
+        def apply(pixmap):
+            if self.sprite_layer.get(name) is item and item.cache_keys.get("composite") == key:
+                item.show_composite(pixmap, scale, body_pos)
+        self.loader.request(key[0], apply, key[1],
+                            decoder=lambda path: bake_sprite(body, body_pos, body_scale, face, face_pos, scale))
+
+    def set_composite_sprites(self, enabled: bool):
+        """Toggles baking body+face into one pre-scaled pixmap per (character, expression, scale)."""
+        self.composite_sprites = enabled
+        for name, item in self.sprite_layer.items():
+            if enabled:
+                self._schedule_bake(name, item)
+            elif isinstance(item, SpriteItem):
+                item.show_layered()
+                item.cache_keys.pop("composite", None)
+                self._pin_sprite(name, item)
+
+    def set_item_cache(self, enabled: bool):
+        """
+        Caches backgrounds and sprite layers as device-resolution pixmaps, so
+        fades and motions blit them instead of re-scaling every frame. Costs
+        one screen-sized pixmap per layer; the cache is redrawn when the view scale changes.
+        """
+        mode = QGraphicsItem.CacheMode.DeviceCoordinateCache if enabled else QGraphicsItem.CacheMode.NoCache
+        if mode == self.item_cache_mode:
+            return
+        self.item_cache_mode = mode
+        self.bg_layer_1.setCacheMode(mode)
+        self.bg_layer_2.setCacheMode(mode)
+        for item in self.sprite_layer.values():
+            if isinstance(item, SpriteItem):
+                item.set_cache_mode(mode)
+
+    # --- Prefetch ---
+
+    def _resolve_bg_path(self, image_path: str):
+        if image_path in self.bg_map:
+            real_path = self.bg_map[image_path]["file"]
+        else:
+            real_path = image_path
+        if self.archives.exists(real_path):
+            return real_path
+        # Try prepending assets/bg/ if simple filename provided
+        fallback_path = os.path.join("assets/bg", real_path)
+        if self.archives.exists(fallback_path):
+            return fallback_path
+        return None
+
+    def prefetch_background(self, image_path: str):
+        real_path = self._resolve_bg_path(image_path)
+        if real_path:
+            self.loader.prefetch(real_path, self.bg_size, decoder=self._bg_decoder(self.bg_size))
+
+    def prefetch_expression(self, char_name: str, expression: str):
+        face_path = self.expressions.resolve(char_name, expression)
+        if face_path:
+            self._prefetch_face(face_path)
+
+    def prefetch_character(self, char_name: str, top_expressions: int = 3):
+        """Body, default face and the character's most frequently shown expressions."""
+        char_data = self.char_map.get(char_name)
+        if not char_data:
+            return
+        body_path = char_data.get("body")
+        if body_path:
+            mips = self.sprite_mips.lookup(body_path)
+            if mips:
+                current = self.sprite_layer.get(char_name)
+                scale = current.scale() if current else 1.0
+                body_path = self.sprite_mips.choose_level(mips, scale * self.view_scale).path
+            self.loader.prefetch(body_path)
+        # With an atlas, a few page reads warm the whole expression set
+        for page in self.face_atlas.pages(char_name):
+            self.loader.prefetch(page)
+        expressions = char_data.get("expressions", {})
+        if expressions:
+            self._prefetch_face(self.expressions.resolve(char_name, "default") or next(iter(expressions.values())))
+        frequent = [expr for (name, expr), _ in self.expression_usage.most_common() if name == char_name]
+        for expr in frequent[:top_expressions]:
+            self.prefetch_expression(char_name, expr)
+
+    def prefetch(self, commands=(), characters=()):
+        """
+        Starts background decodes from hints: `commands` are (category, args)
+        pairs of upcoming stage directions (in order), `characters` are names
+        likely to appear (e.g. GameState.visible_characters).
+        """
+        for category, args in commands:
+            if category == "Background":
+                self.prefetch_background(args["name"])
+            elif category == "fg":
+                self.prefetch_character(args["name"], 0)
+                self.prefetch_expression(args["name"], args["expression"])
+            elif category in ("Join", "Sprite", "立绘"):
+                self.prefetch_character(args["name"])
+        for name in characters:
+            self.prefetch_character(name)
             
     # ... join_character ...
 
@@ -109,12 +625,11 @@ class VisualManager(QObject):
         char_data = self.char_map[char_name]
         body_path = char_data.get("body")
         
-        # Pick default face (first one or specific 'default' key)
+        # Pick default face (first one or a 'default' key / label)
         face_path = None
         if "expressions" in char_data and char_data["expressions"]:
-            if "default" in char_data["expressions"]:
-                face_path = char_data["expressions"]["default"]
-            else:
+            face_path = self.expressions.resolve(char_name, "default")
+            if face_path is None:
                 # Pick first available
                 face_path = list(char_data["expressions"].values())[0]
         
@@ -127,7 +642,8 @@ class VisualManager(QObject):
 
     def set_expression(self, char_name: str, expression: str):
         """
-        Changes the face of a character using the character map.
+        Changes the face of a character using the character map. `expression`
+        may be a face code, a faces.tjs alias or a label (see ExpressionIndex).
         """
         if char_name not in self.char_map:
             print(f"[VisualManager] Character not found in map: {char_name}")
@@ -135,23 +651,23 @@ class VisualManager(QObject):
             
         char_data = self.char_map[char_name]
         
-        if expression not in char_data["expressions"]:
+        face_path = self.expressions.resolve(char_name, expression)
+        if face_path is None:
             print(f"[VisualManager] Expression '{expression}' not found for {char_name}")
             return
-            
-        face_path = char_data["expressions"][expression]
         
         if char_name in self.sprite_layer:
             item = self.sprite_layer[char_name]
             if isinstance(item, SpriteItem):
-                if os.path.exists(face_path):
-                    item.set_face(QPixmap(face_path))
+                if self.archives.exists(face_path):
+                    self.expression_usage[(char_name, expression)] += 1
+                    self._load_sprite_part(char_name, item, "face", face_path)
                 else:
                     print(f"[VisualManager] Face file missing: {face_path}")
         else:
             # Auto-add character if not present
             body_path = char_data.get("body")
-            if body_path and os.path.exists(body_path):
+            if body_path and self.archives.exists(body_path):
                 self.add_character(char_name, body_path, face_path)
             else:
                 print(f"[VisualManager] Cannot spawn {char_name}, body missing.")
@@ -180,29 +696,23 @@ class VisualManager(QObject):
         Cross-fades to new background. 
         image_path can be a file path OR a key in background_map.json.
         """
-        # 1. Lookup in Map
-        if image_path in self.bg_map:
-            real_path = self.bg_map[image_path]["file"]
-        else:
-            real_path = image_path
+        real_path = self._resolve_bg_path(image_path)
+        if real_path is None:
+            print(f"[VisualManager] BG not found: {image_path}")
+            return
 
-        # 2. Check Existence
-        if not os.path.exists(real_path):
-            # Try prepending assets/bg/ if simple filename provided
-            fallback_path = os.path.join("assets/bg", real_path)
-            if os.path.exists(fallback_path):
-                real_path = fallback_path
-            else:
-                print(f"[VisualManager] BG not found: {real_path} (Key: {image_path})")
-                return
+        size = self.bg_size
+        key = (real_path, size)
+        self._bg_request = key
+        self.cache.pin("__background__", [key])
 
-        pixmap = QPixmap(real_path)
-        
-        # Scale to standard 1080p resolution to ensure it fills the screen
-        # Using IgnoreAspectRatio to force fill (user requirement)
-        if not pixmap.isNull():
-            pixmap = pixmap.scaled(1920, 1080, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        
+        def apply(pixmap):
+            # A later [Background] may have been issued while this one decoded
+            if self._bg_request == key:
+                self._crossfade_to(pixmap, fade_duration)
+        self.loader.request(real_path, self._joined(apply), size, decoder=self._bg_decoder(size))
+
+    def _crossfade_to(self, pixmap: QPixmap, fade_duration: int):
         if self.active_bg == 1:
             target_item = self.bg_layer_2
             current_item = self.bg_layer_1
@@ -213,69 +723,96 @@ class VisualManager(QObject):
             self.active_bg = 1
             
         target_item.setPixmap(pixmap)
-        target_item.setOpacity(0)
-        
-        self.anim_in = QPropertyAnimation(target_item, b"opacity")
-        self.anim_in.setDuration(fade_duration)
-        self.anim_in.setStartValue(0.0)
-        self.anim_in.setEndValue(1.0)
-        self.anim_in.setEasingCurve(QEasingCurve.Type.InOutQuad)
-        
-        self.anim_out = QPropertyAnimation(current_item, b"opacity")
-        self.anim_out.setDuration(fade_duration)
-        self.anim_out.setStartValue(1.0)
-        self.anim_out.setEndValue(0.0)
-        self.anim_out.setEasingCurve(QEasingCurve.Type.InOutQuad)
-        
-        self.anim_in.start()
-        self.anim_out.start()
+        # Display-resolution pixmaps still cover the 1920x1080 scene
+        target_item.setScale(BG_SIZE[0] / pixmap.width() if pixmap.width() else 1.0)
+
+        # The incoming layer fades in on top of the opaque outgoing one: a plain
+        # crossfade that blends one full-screen layer per frame instead of two
+        target_item.setZValue(-99)
+        current_item.setZValue(-100)
+
+        # Read before the incoming tween: with reduce_motion it finishes (and hides
+        # the outgoing layer) inside animate()
+        interrupted = current_item.get_opacity() < 1.0
+        finished = []
+
+        def hide_current():
+            # Fully covered now; an opacity-0 item is skipped when painting
+            finished.append(True)
+            if target_item is (self.bg_layer_2 if self.active_bg == 2 else self.bg_layer_1):
+                current_item.setOpacity(0.0)
+
+        self.animator.animate(target_item, "opacity", 1.0, fade_duration, target_item.setOpacity, start=0.0,
+                              easing=QEasingCurve.Type.InOutQuad, group="background", on_finished=hide_current)
+        if interrupted and not finished:
+            # Interrupted mid-fade: bring the previous background back up underneath
+            self.animator.animate(current_item, "opacity", 1.0, fade_duration, current_item.setOpacity,
+                                  getter=current_item.get_opacity, group="background")
 
     def add_sprite(self, name: str, image_path: str, x: int, y: int, z_value: float = 0.0, scale: float = 1.0):
         self.add_character(name, image_path, None, x, y, z_value, scale)
 
     def add_character(self, name: str, body_path: str, face_path: str = None, x: int = 0, y: int = 0, z_value: float = 0.0, scale: float = 1.0):
         if name in self.sprite_layer:
-            self.scene.removeItem(self.sprite_layer[name])
-            del self.sprite_layer[name]
+            old_item = self.sprite_layer.pop(name)
+            self.animator.cancel_target(old_item)
+            self._defer(lambda: self.scene.removeItem(old_item))
+            self.cache.unpin(name)
         
-        if not os.path.exists(body_path):
+        if not self.archives.exists(body_path):
             print(f"[VisualManager] Body not found: {body_path}")
             return
 
-        item = SpriteItem(QPixmap(body_path))
-        
-        if face_path:
-            if os.path.exists(face_path):
-                item.set_face(QPixmap(face_path))
-            else:
-                print(f"[VisualManager] Face not found: {face_path}")
-
+        # Empty until decoded; position/scale/presets apply right away
+        item = SpriteItem(QPixmap())
+        item.set_cache_mode(self.item_cache_mode)
         item.setPos(x, y)
         item.setScale(scale)
         item.setZValue(z_value)
         
-        self.scene.addItem(item)
+        # On stage with the burst's images; later commands already find it in sprite_layer
+        self._defer(lambda: self.scene.addItem(item))
         self.sprite_layer[name] = item
+        self._load_sprite_part(name, item, "body", body_path)
+        
+        if face_path:
+            if self.archives.exists(face_path):
+                self._load_sprite_part(name, item, "face", face_path)
+            else:
+                print(f"[VisualManager] Face not found: {face_path}")
 
     def set_sprite_transform(self, name: str, x: float = None, y: float = None, scale: float = None):
         if name not in self.sprite_layer:
             return
             
         item = self.sprite_layer[name]
-        
-        if x is not None or y is not None:
-            current_pos = item.pos
-            new_x = x if x is not None else current_pos.x()
-            new_y = y if y is not None else current_pos.y()
-            item.setPos(new_x, new_y)
-            
-        if scale is not None:
-            item.setScale(scale)
+        if scale is not None and isinstance(item, SpriteItem):
+            # Decode the level for the new scale now, so it joins the burst
+            self._refresh_body_level(name, item, scale)
+
+        def apply():
+            if self.sprite_layer.get(name) is not item:
+                return
+            if x is not None or y is not None:
+                # An explicit move wins over a running shake/jump
+                self.animator.cancel(item, "pos", finish=True)
+                current_pos = item.pos
+                new_x = x if x is not None else current_pos.x()
+                new_y = y if y is not None else current_pos.y()
+                item.setPos(new_x, new_y)
+            if scale is not None:
+                item.setScale(scale)
+                if isinstance(item, SpriteItem):
+                    self._schedule_bake(name, item)
+        # Lands with the burst's images (a move must not show the previous face)
+        self._defer(apply)
 
     def remove_sprite(self, name: str):
         if name in self.sprite_layer:
-            self.scene.removeItem(self.sprite_layer[name])
-            del self.sprite_layer[name]
+            item = self.sprite_layer.pop(name)
+            self.animator.cancel_target(item)
+            self._defer(lambda: self.scene.removeItem(item))
+            self.cache.unpin(name)
 
     def clear_all_sprites(self):
         for name in list(self.sprite_layer.keys()):
@@ -286,27 +823,23 @@ class VisualManager(QObject):
             return
             
         item = self.sprite_layer[name]
-        
-        if animation_type == "shake":
-            anim = QPropertyAnimation(item, b"pos")
-            anim.setDuration(500)
-            start_pos = item.pos
-            anim.setKeyValueAt(0, start_pos)
-            anim.setKeyValueAt(0.1, start_pos + QPointF(10, 0))
-            anim.setKeyValueAt(0.2, start_pos + QPointF(-10, 0))
-            anim.setKeyValueAt(0.3, start_pos + QPointF(10, 0))
-            anim.setKeyValueAt(0.4, start_pos + QPointF(-10, 0))
-            anim.setKeyValueAt(1.0, start_pos)
-            item.active_animation = anim
-            anim.start()
-            
-        elif animation_type == "jump":
-            anim = QPropertyAnimation(item, b"pos")
-            anim.setDuration(600)
+
+        def start():
+            if self.sprite_layer.get(name) is not item:
+                return
+            # Settle a running motion first so the new one starts from the rest position
+            self.animator.cancel(item, "pos", finish=True)
             start_pos = item.pos
-            anim.setKeyValueAt(0, start_pos)
-            anim.setKeyValueAt(0.5, start_pos + QPointF(0, -50))
-            anim.setKeyValueAt(1.0, start_pos)
-            anim.setEasingCurve(QEasingCurve.Type.OutQuad)
-            item.active_animation = anim
-            anim.start()
\ No newline at end of file
+
+            if animation_type == "shake":
+                keyframes = [(0.1, start_pos + QPointF(10, 0)), (0.2, start_pos + QPointF(-10, 0)),
+                             (0.3, start_pos + QPointF(10, 0)), (0.4, start_pos + QPointF(-10, 0))]
+                self.animator.animate(item, "pos", start_pos, 500, item.set_pos, start=start_pos,
+                                      keyframes=keyframes, group=name)
+
+            elif animation_type == "jump":
+                self.animator.animate(item, "pos", start_pos, 600, item.set_pos, start=start_pos,
+                                      keyframes=[(0.5, start_pos + QPointF(0, -50))],
+                                      easing=QEasingCurve.Type.OutQuad, group=name)
+        # Starts with the burst's images, from the position the burst leaves it at
+        self._defer(start)
@@ -9,7 +9,7 @@ from .prompt_assembler import PromptAssembler
 from .plot_planner import PlotPlanner
 
 class LLMChain:
-    def __init__(self, config: Dict[str, str] = None):
+    def __init__(self, config: Dict[str, str] = None, memory: MemoryManager = None):
         self.config = config or {}
         
         # 1. Setup Clients for each Functional Group
@@ -35,7 +35,7 @@ class LLMChain:
         )
         self.model_logic = self.config.get("model_logic", "gpt-4")
         
-        self.memory = MemoryManager()
+        self.memory = memory or MemoryManager()
         # Set threshold from config (default 5 if not in config, but pages.py defaults to 5)
         self.memory.plot_planning_threshold = self.config.get("plot_planning_freq", 5)
         
@@ -54,15 +54,16 @@ class LLMChain:
             return match.group(1).strip()
         return None
 
-    async def _retry_loop(self, task_name: str, func, *args, tag=None, retry_delay=2, max_retries=5, critical=False) -> str:
+    async def _retry_loop(self, task_name: str, func, *args, tag=None, retry_delay=2, max_retries=5, critical=False, **kwargs) -> str:
         """
         Generic retry loop.
         critical: if True, retries indefinitely with long delay (60s) and blocks system.
+        Extra keyword arguments (e.g. model) are passed through to func.
         """
         attempts = 0
         while True:
             try:
-                result = await func(*args)
+                result = await func(*args, **kwargs)
                 
                 # Validation
                 if tag:
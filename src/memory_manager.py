@@ -2,7 +2,9 @@ import json
 import os
 from typing import List, Dict, Any, Optional
 import asyncio
+import uuid
 from dataclasses import dataclass, field
+from .turn_archive import TurnArchive
 
 @dataclass
 class GameState:
@@ -14,7 +16,7 @@ class GameState:
     visible_characters: Dict[str, str] = field(default_factory=dict) # Name -> Expression/Face
 
 class MemoryManager:
-    def __init__(self):
+    def __init__(self, base_dir: str = "assets", save_dir: str = "saves"):
         # raw_history now stores simple dicts, but we track layers externally or implicitly
         self.raw_history: List[Dict[str, str]] = [] 
         
@@ -44,14 +46,67 @@ class MemoryManager:
         
         self._observers = []
         
-        # File Paths
-        self.path_summary_big = "assets/剧情总结/大总结.json"
-        self.path_summary_small = "assets/剧情总结/小总结.json"
-        self.path_history = "assets/剧情总结/未总结内容.json"
-        self.path_plot_plan = "assets/剧情规划存储/当前规划.txt"
-        self.path_gamestate = "assets/gamestate.json"
+        # File Paths (base_dir lets several sessions persist side by side, e.g. load tests)
+        self.base_dir = base_dir
+        self.path_summary_big = f"{base_dir}/剧情总结/大总结.json"
+        self.path_summary_small = f"{base_dir}/剧情总结/小总结.json"
+        self.path_history = f"{base_dir}/剧情总结/未总结内容.json"
+        self.path_plot_plan = f"{base_dir}/剧情规划存储/当前规划.txt"
+        self.path_gamestate = f"{base_dir}/gamestate.json"
+        self.dir_backlog = f"{base_dir}/剧情总结/对话记录"
+        self.save_dir = save_dir # Save slots (SavePage), scanned for timelines still in use
+        
+        # Every displayed line (never summarized away); backs the backlog view.
+        # One append-only file per timeline: saves record (timeline, line count),
+        # and loading one forks a new timeline from that prefix.
+        self.backlog_timeline = ""
         
         self._load_persistent_data()
+        self.turn_archive = TurnArchive(self.path_backlog)
+
+    @property
+    def path_backlog(self) -> str:
+        return self._backlog_path(self.backlog_timeline)
+
+    def _backlog_path(self, timeline: str) -> str:
+        # "" is the single archive written before timelines existed
+        if not timeline:
+            return f"{self.base_dir}/剧情总结/对话记录.jsonl"
+        return f"{self.dir_backlog}/{timeline}.jsonl"
+
+    def _new_backlog(self, source_timeline: str = None, count: int = 0):
+        """Starts a new timeline, seeded with the first `count` lines of `source_timeline`."""
+        self.backlog_timeline = uuid.uuid4().hex[:12]
+        source = self._backlog_path(source_timeline) if source_timeline is not None else None
+        self.turn_archive.switch(self.path_backlog, source, count)
+        self.prune_backlogs()
+
+    def prune_backlogs(self) -> int:
+        """Deletes timeline files that neither the current state nor any save slot points at."""
+        if not os.path.isdir(self.dir_backlog):
+            return 0
+        keep = {self.backlog_timeline}
+        if os.path.isdir(self.save_dir):
+            for name in os.listdir(self.save_dir):
+                if not (name.startswith("save_") and name.endswith(".json")):
+                    continue
+                try:
+                    with open(os.path.join(self.save_dir, name), 'r', encoding='utf-8') as f:
+                        backlog = json.load(f).get("game_state", {}).get("backlog") or {}
+                except Exception as e:
+                    print(f"[MemoryManager] Cannot read {name}, keeping all timelines: {e}")
+                    return 0
+                keep.add(backlog.get("timeline", ""))
+        removed = 0
+        for name in os.listdir(self.dir_backlog):
+            timeline, ext = os.path.splitext(name)
+            if ext == ".jsonl" and timeline not in keep:
+                try:
+                    os.remove(os.path.join(self.dir_backlog, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"[MemoryManager] Failed to remove timeline {name}: {e}")
+        return removed
 
     @property
     def big_summary(self) -> str:
@@ -103,6 +158,7 @@ class MemoryManager:
                 with open(self.path_history, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.global_layer_count = data.get("current_layer", 0)
+                    self.backlog_timeline = data.get("backlog_timeline", "")
                     self.small_summary_count_since_plan = data.get("small_summary_count_since_plan", 0)
                     history_map = data.get("history", {})
                     
@@ -172,6 +228,7 @@ class MemoryManager:
         history_data = {
             "current_layer": self.global_layer_count,
             "small_summary_count_since_plan": self.small_summary_count_since_plan,
+            "backlog_timeline": self.backlog_timeline,
             "history": history_map
         }
         
@@ -193,6 +250,8 @@ class MemoryManager:
         self.global_layer_count = 0
         self.last_summary_layer = 0
         self.small_summary_count_since_plan = 0
+        # Saves may still point at the old timeline: start a new one instead of deleting it
+        self._new_backlog()
         self._save_persistent_data()
         self._notify_observers()
 
@@ -335,7 +394,8 @@ class MemoryManager:
             "state": self.state.__dict__,
             "global_layer_count": self.global_layer_count,
             "last_summary_layer": self.last_summary_layer,
-            "small_summary_count_since_plan": self.small_summary_count_since_plan
+            "small_summary_count_since_plan": self.small_summary_count_since_plan,
+            "backlog": {"timeline": self.backlog_timeline, "lines": len(self.turn_archive)}
         }
 
     def load_from_dict(self, data: Dict[str, Any]):
@@ -363,4 +423,11 @@ class MemoryManager:
         self.state = GameState(**state_data)
         self.global_layer_count = data.get("global_layer_count", 0)
         self.last_summary_layer = data.get("last_summary_layer", 0)
-        self.small_summary_count_since_plan = data.get("small_summary_count_since_plan", 0)
\ No newline at end of file
+        self.small_summary_count_since_plan = data.get("small_summary_count_since_plan", 0)
+
+        # Backlog as of the save; saves from before timelines start with an empty one
+        backlog = data.get("backlog")
+        if backlog:
+            self._new_backlog(backlog.get("timeline", ""), backlog.get("lines", 0))
+        else:
+            self._new_backlog()
@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 from .memory_manager import MemoryManager
+from .frontend.expression_index import ExpressionIndex
 
 class PromptAssembler:
     """
@@ -14,6 +15,7 @@ class PromptAssembler:
         self.config = {}
         self.file_cache = {}
         self.date_guidance = []
+        self.expressions = None # ExpressionIndex, built on first use
         self._load_config()
         self._load_npcs()
 
@@ -215,6 +217,15 @@ class PromptAssembler:
                 lines.append("- Visible Characters: None")
             
             lines.append("")
+
+            # Expression vocabulary: labels and the face-code grammar, not every code
+            lines.append("# Character Expressions ([fg-Name-Expression]; a code that does not exist uses the nearest face)")
+            if self.expressions is None:
+                self.expressions = ExpressionIndex.from_files()
+            vocabulary = [self.expressions.vocabulary(name) for name in self.expressions.characters()]
+            lines.extend(f"- {v}" for v in vocabulary if v)
+            
+            lines.append("")
             
             # 2. Presets (Sprite Positions)
             lines.append("# Sprite Preset Positions")
@@ -247,7 +258,15 @@ class PromptAssembler:
                 with open("assets/sound_map.json", "r", encoding="utf-8") as f:
                     sound_map = json.load(f)
                     sfx_list = list(sound_map.keys())
-                    lines.append(", ".join(sfx_list))
+                # Real lengths from build_sound_cache.py, so [sound-name-duration] can match them
+                lengths = {}
+                if os.path.exists("assets/sound_meta.json"):
+                    with open("assets/sound_meta.json", "r", encoding="utf-8") as f:
+                        lengths = {path: e["duration_ms"] for path, e in json.load(f).get("sounds", {}).items()}
+                if lengths:
+                    sfx_list = [f"{name}({lengths[sound_map[name]['file']] / 1000:.1f}s)"
+                                if sound_map[name].get("file") in lengths else name for name in sfx_list]
+                lines.append(", ".join(sfx_list))
             except:
                 lines.append("(No sounds found)")
 
@@ -0,0 +1,138 @@
+import json
+import os
+from array import array
+from typing import Dict, List
+
+
+class TurnArchive:
+    """
+    Append-only log of every displayed dialogue line (JSONL on disk).
+
+    Only the file offset of every PAGE_SIZE-th line is kept in memory, so the
+    resident index stays tiny no matter how long a session runs. Readers fetch
+    whole pages with a single seek.
+    """
+
+    PAGE_SIZE = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        self._count = 0
+        self._page_offsets = array("Q")  # Byte offset of line (i * PAGE_SIZE)
+        self._end_offset = 0
+        self._build_index()
+
+    def _build_index(self):
+        self._count = 0
+        self._page_offsets = array("Q")
+        self._end_offset = 0
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Ignore a torn trailing write
+                    if self._count % self.PAGE_SIZE == 0:
+                        self._page_offsets.append(offset)
+                    offset += len(line)
+                    self._count += 1
+                self._end_offset = offset
+        except OSError as e:
+            print(f"[TurnArchive] Failed to index {self.path}: {e}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, speaker: str, text: str, role: str = "story", layer: int = 0):
+        """Appends one displayed line. role is 'story' or 'user'."""
+        record = {"speaker": speaker, "text": text, "role": role, "layer": layer}
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                if f.tell() != self._end_offset:
+                    # File changed underneath us (truncated, written elsewhere, or a torn
+                    # last line); resync and drop any partial tail so the record starts a line
+                    self._build_index()
+                    if f.tell() != self._end_offset:
+                        f.truncate(self._end_offset)
+                f.write(data)
+        except OSError as e:
+            print(f"[TurnArchive] Failed to append: {e}")
+            return
+
+        if self._count % self.PAGE_SIZE == 0:
+            self._page_offsets.append(self._end_offset)
+        self._end_offset += len(data)
+        self._count += 1
+
+    def read_page(self, page: int) -> List[Dict]:
+        """Returns up to PAGE_SIZE records of the given page."""
+        if page < 0 or page >= len(self._page_offsets):
+            return []
+        records = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._page_offsets[page])
+                for _ in range(self.PAGE_SIZE):
+                    line = f.readline()
+                    if not line:
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        records.append({"speaker": "", "text": "", "role": "story", "layer": 0})
+        except OSError as e:
+            print(f"[TurnArchive] Failed to read page {page}: {e}")
+        return records
+
+    def read(self, start: int, count: int) -> List[Dict]:
+        """Returns records [start, start + count)."""
+        start = max(0, start)
+        end = min(self._count, start + count)
+        result = []
+        index = start
+        while index < end:
+            page, offset = divmod(index, self.PAGE_SIZE)
+            page_records = self.read_page(page)
+            take = page_records[offset:offset + (end - index)]
+            if not take:
+                break
+            result.extend(take)
+            index += len(take)
+        return result
+
+    def switch(self, path: str, source: str = None, count: int = 0):
+        """
+        Switches to the archive at `path`. With `source`, the new archive
+        starts as a copy of its first `count` lines (the backlog of a save
+        being loaded); an existing file at `path` is replaced.
+        """
+        if source is not None:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path + ".tmp", "wb") as out:
+                    if count > 0 and os.path.exists(source):
+                        with open(source, "rb") as f:
+                            for line in f:
+                                if not line.endswith(b"\n"):
+                                    break
+                                out.write(line)
+                                count -= 1
+                                if count == 0:
+                                    break
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"[TurnArchive] Failed to copy {source}: {e}")
+        self.path = path
+        self._build_index()
+
+    def clear(self):
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            print(f"[TurnArchive] Failed to clear: {e}")
+        self._build_index()